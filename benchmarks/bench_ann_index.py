@@ -0,0 +1,73 @@
+"""
+Benchmark rappel / latence de l'index IVF face à la recherche exacte
+
+Galerie synthétique d'encodings 128D (identités regroupées comme de vrais
+visages), sondes = encodings enregistrés + bruit de capture.
+
+Pour exécuter: python benchmarks/bench_ann_index.py [taille_galerie]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.gallery import FaceGallery
+from core.ann_index import IVFIndex
+
+GALLERY_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+N_QUERIES = 1000
+N_PROBES = [1, 2, 4, 8, 16, 32]
+
+
+def synthetic_gallery(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Encodings synthétiques de norme ~1 répartis en groupes"""
+    n_groups = max(1, n // 25)
+    centers = rng.normal(0.0, 0.09, size=(n_groups, 128))
+    encodings = centers[rng.integers(0, n_groups, n)] + rng.normal(0.0, 0.04, size=(n, 128))
+    return encodings.astype(np.float32)
+
+
+def time_queries(gallery: FaceGallery, probes: np.ndarray, exact: bool):
+    rows = np.empty(probes.shape[0], dtype=np.int64)
+    start = time.perf_counter()
+    for i, probe in enumerate(probes):
+        rows[i] = gallery.match(probe, exact=exact)[0]
+    elapsed = time.perf_counter() - start
+    return rows, elapsed * 1000 / probes.shape[0]
+
+
+def main():
+    rng = np.random.default_rng(42)
+    encodings = synthetic_gallery(GALLERY_SIZE, rng)
+    picked = rng.choice(GALLERY_SIZE, N_QUERIES, replace=False)
+    probes = encodings[picked] + rng.normal(0.0, 0.02, size=(N_QUERIES, 128)).astype(np.float32)
+
+    index = IVFIndex()
+    gallery = FaceGallery(index=index, min_index_size=0)
+    gallery.reserve(GALLERY_SIZE)
+
+    start = time.perf_counter()
+    for personne_id, encoding in enumerate(encodings):
+        gallery.add(personne_id, f"user_{personne_id}", encoding)
+    print(f"Galerie: {GALLERY_SIZE} profils chargés en {time.perf_counter() - start:.2f}s "
+          f"({index.centroids.shape[0]} listes IVF)")
+
+    start = time.perf_counter()
+    gallery.rebuild_index()
+    print(f"Reconstruction complète de l'index: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    truth, exact_ms = time_queries(gallery, probes, exact=True)
+    print(f"\n{'Méthode':<16}{'Latence (ms)':>14}{'Rappel@1':>12}{'Accélération':>15}")
+    print(f"{'exacte':<16}{exact_ms:>14.3f}{1.0:>12.3f}{1.0:>14.1f}x")
+
+    for n_probe in N_PROBES:
+        index.n_probe = n_probe
+        rows, ivf_ms = time_queries(gallery, probes, exact=False)
+        recall = float(np.mean(rows == truth))
+        print(f"{f'ivf n_probe={n_probe}':<16}{ivf_ms:>14.3f}{recall:>12.3f}{exact_ms / ivf_ms:>14.1f}x")
+
+
+if __name__ == '__main__':
+    main()
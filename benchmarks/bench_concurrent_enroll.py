@@ -0,0 +1,85 @@
+"""
+Débit de reconnaissance pendant des enrôlements concurrents (galerie copie sur écriture)
+
+Des threads lecteurs reconnaissent en boucle des sondes de la galerie
+pendant qu'un thread écrivain enrôle et supprime des profils. Chaque
+réponse est vérifiée : une lecture ne doit jamais voir une galerie à
+moitié modifiée (mauvaise identité).
+
+Pour exécuter: python benchmarks/bench_concurrent_enroll.py [taille_galerie]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.face_recognition import FaceRecognitionEngine
+
+GALLERY_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+N_READERS = 2
+DURATION = 3.0
+ENROLL_INTERVAL = 0.02  # secondes entre deux enrôlements
+
+
+def run(engine, encodings, writer: bool):
+    stop = threading.Event()
+    counts = [0] * N_READERS
+    errors = [0] * N_READERS
+    enrolled = [0]
+
+    def reader(slot):
+        rng = np.random.default_rng(slot)
+        while not stop.is_set():
+            picked = rng.integers(0, GALLERY_SIZE, 4)
+            for personne_id, match in zip(picked, engine.recognize_faces_batch(list(encodings[picked]))):
+                errors[slot] += match[0] != personne_id + 1
+            counts[slot] += len(picked)
+
+    def enroller():
+        rng = np.random.default_rng(99)
+        while not stop.is_set():
+            personne_id = 10 ** 6 + enrolled[0]
+            engine.load_profile(personne_id, f"new_{personne_id}", rng.normal(0.0, 0.09, 128).astype(np.float32))
+            if enrolled[0] % 2:
+                engine.remove_profile(personne_id - 1)
+            enrolled[0] += 1
+            stop.wait(ENROLL_INTERVAL)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(N_READERS)]
+    if writer:
+        threads.append(threading.Thread(target=enroller))
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / DURATION, sum(errors), enrolled[0]
+
+
+def main():
+    logging.getLogger('FaceRecognitionSystem').setLevel(logging.WARNING)
+    engine = FaceRecognitionEngine()
+    rng = np.random.default_rng(0)
+    encodings = rng.normal(0.0, 0.09, size=(GALLERY_SIZE, 128)).astype(np.float32)
+    for i, encoding in enumerate(encodings):
+        engine.gallery.add(i + 1, f"user_{i}", encoding)
+    engine.publish_gallery()
+
+    start = time.perf_counter()
+    engine.publish_gallery()
+    publish_ms = (time.perf_counter() - start) * 1000
+
+    idle, idle_errors, _ = run(engine, encodings, writer=False)
+    busy, busy_errors, enrolled = run(engine, encodings, writer=True)
+    print(f"Galerie de {GALLERY_SIZE} profil(s), {N_READERS} lecteur(s), publication: {publish_ms:.1f} ms")
+    print(f"Sans écrivain: {idle:.0f} visages/s, erreurs: {idle_errors}")
+    print(f"Avec écrivain: {busy:.0f} visages/s ({enrolled} enrôlements), erreurs: {busy_errors}")
+
+
+if __name__ == '__main__':
+    main()
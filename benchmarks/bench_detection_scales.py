@@ -0,0 +1,103 @@
+"""
+Benchmark latence / rappel de la détection HOG selon l'échelle
+
+Référence = ancienne détection (pleine résolution, upsample 2). Chaque
+niveau (échelle, upsample) est mesuré sur la luminance réduite, ainsi que
+la pyramide complète du moteur (MIN_FACE_SIZE / DETECTION_SCALES).
+
+Pour exécuter: python benchmarks/bench_detection_scales.py [dossier ...]
+(par défaut debug_frames/ et uploads/)
+"""
+import os
+import sys
+import time
+import cv2
+import face_recognition
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.detection import detection_pyramid, scale_location
+from core.face_tracker import box_iou
+
+FOLDERS = sys.argv[1:] or [os.path.join(ROOT, 'debug_frames'), os.path.join(ROOT, 'uploads')]
+LEVELS = [(1.0, 2), (1.0, 1), (1.0, 0), (0.8, 1), (0.75, 0), (0.5, 1), (0.5, 0), (0.25, 1)]
+REPEAT = 3
+IOU_MATCH = 0.3
+
+CLAHE = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+
+
+def load_frames():
+    frames = []
+    for folder in FOLDERS:
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                image = cv2.imread(os.path.join(folder, name))
+                if image is not None:
+                    frames.append((name, cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))
+    return frames
+
+
+def detect(gray, levels):
+    """Premier niveau qui trouve un visage, boîtes en coordonnées natives"""
+    h, w = gray.shape[:2]
+    for scale, upsample in levels:
+        level = gray if scale == 1.0 else cv2.resize(gray, (0, 0), fx=scale, fy=scale,
+                                                      interpolation=cv2.INTER_AREA)
+        found = face_recognition.face_locations(CLAHE.apply(level), model='hog',
+                                                number_of_times_to_upsample=upsample)
+        if found:
+            return [scale_location(location, scale, h, w) for location in found]
+    return []
+
+
+def run(frames, levels):
+    """Latence moyenne (ms) et détections par frame"""
+    results = []
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        results = [detect(gray, levels) for _, gray in frames]
+    elapsed = (time.perf_counter() - start) * 1000 / (REPEAT * len(frames))
+    return elapsed, results
+
+
+def recall(reference, results):
+    expected = sum(len(boxes) for boxes in reference)
+    if expected == 0:
+        return float('nan')
+    matched = sum(
+        1
+        for ref_boxes, boxes in zip(reference, results)
+        for ref in ref_boxes
+        if any(box_iou(ref, box) >= IOU_MATCH for box in boxes)
+    )
+    return matched / expected
+
+
+def main():
+    frames = load_frames()
+    if not frames:
+        print("Aucune image trouvée dans", FOLDERS)
+        return
+    print(f"{len(frames)} frame(s): {', '.join(name for name, _ in frames)}")
+
+    reference_ms, reference = run(frames, [(1.0, 2)])
+    print(f"Référence (x1.00, upsample 2): {sum(len(b) for b in reference)} visage(s), {reference_ms:.1f} ms/frame\n")
+
+    print(f"{'Niveau':<34}{'Latence (ms)':>14}{'Visages':>10}{'Rappel':>10}{'Accélération':>15}")
+    pyramid = detection_pyramid()
+    configs = [(f"x{scale:.2f} upsample {upsample}", [(scale, upsample)]) for scale, upsample in LEVELS]
+    configs.append((f"pyramide {pyramid}", pyramid))
+
+    for label, levels in configs:
+        elapsed, results = run(frames, levels)
+        found = sum(len(boxes) for boxes in results)
+        print(f"{label:<34}{elapsed:>14.1f}{found:>10}{recall(reference, results):>10.2f}"
+              f"{reference_ms / elapsed:>14.1f}x")
+
+
+if __name__ == '__main__':
+    main()
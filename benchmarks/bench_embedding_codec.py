@@ -0,0 +1,49 @@
+"""
+Benchmark taille / décodage des embeddings : texte (virgules) vs binaire float32
+
+Pour exécuter: python benchmarks/bench_embedding_codec.py [nombre_profils]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.encryption import EncryptionManager
+from database.migrations import encode_embeddings_bulk
+
+N_PROFILES = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(0.0, 0.09, size=(N_PROFILES, 128))
+
+    texts = [EncryptionManager.encode_embedding_text(row) for row in matrix]
+    blobs = encode_embeddings_bulk(matrix.astype(np.float32))
+    assert blobs[0] == EncryptionManager.encode_embedding(matrix[0])
+
+    text_size = sum(len(text) for text in texts) / N_PROFILES
+    blob_size = sum(len(blob) for blob in blobs) / N_PROFILES
+
+    start = time.perf_counter()
+    legacy = np.stack([np.array([float(x) for x in text.split(',')]) for text in texts])
+    text_ms = (time.perf_counter() - start) * 1000
+
+    # psycopg2 renvoie les bytea sous forme de memoryview
+    views = [memoryview(blob) for blob in blobs]
+    start = time.perf_counter()
+    decoded = EncryptionManager.decode_embeddings(views)
+    blob_ms = (time.perf_counter() - start) * 1000
+
+    assert np.allclose(decoded, legacy, atol=1e-6)
+    print(f"{N_PROFILES} profils")
+    print(f"{'Format':<10}{'Octets/ligne':>14}{'Décodage (ms)':>16}")
+    print(f"{'texte':<10}{text_size:>14.0f}{text_ms:>16.1f}")
+    print(f"{'binaire':<10}{blob_size:>14.0f}{blob_ms:>16.1f}")
+    print(f"Taille /{text_size / blob_size:.1f}, décodage x{text_ms / blob_ms:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark démarrage à froid : chargement de la galerie profil par profil vs par blocs
+
+Les blocs simulent ce que renvoie ProfileService.iter_gallery() (bytea
+sous forme de memoryview). L'ancien chemin décode et ajoute chaque
+profil séparément, le nouveau décode un bloc entier et le copie dans
+les tableaux préalloués.
+
+Pour exécuter: python benchmarks/bench_gallery_load.py [nombre_profils ...]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import GALLERY_CHUNK_SIZE
+from core.gallery import FaceGallery
+from database.migrations import encode_embeddings_bulk
+from utils.encryption import EncryptionManager
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+
+def make_rows(count):
+    rng = np.random.default_rng(0)
+    blobs = encode_embeddings_bulk(rng.normal(0.0, 0.09, size=(count, 128)).astype(np.float32))
+    return [(i + 1, f"user_{i}", None, memoryview(blob)) for i, blob in enumerate(blobs)]
+
+
+def chunked(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def load_per_row(rows):
+    gallery = FaceGallery()
+    for personne_id, username, password, blob in rows:
+        gallery.add(personne_id, username, EncryptionManager.decode_embedding(blob), password)
+    return gallery
+
+
+def load_chunked(rows):
+    gallery = FaceGallery()
+    gallery.reserve(len(rows))
+    for chunk in chunked(rows, GALLERY_CHUNK_SIZE):
+        matrix = EncryptionManager.decode_embeddings([row[3] for row in chunk])
+        gallery.add_many([row[0] for row in chunk], [row[1] for row in chunk],
+                         matrix, [row[2] for row in chunk])
+    return gallery
+
+
+def main():
+    print(f"{'Profils':>8}{'Par profil (ms)':>18}{'Par blocs (ms)':>17}{'Gain':>8}")
+    for count in SIZES:
+        rows = make_rows(count)
+
+        start = time.perf_counter()
+        legacy = load_per_row(rows)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        bulk = load_chunked(rows)
+        bulk_ms = (time.perf_counter() - start) * 1000
+
+        assert len(bulk) == len(legacy) == count
+        assert np.array_equal(bulk.matrix, legacy.matrix)
+        print(f"{count:>8}{legacy_ms:>18.0f}{bulk_ms:>17.0f}{legacy_ms / bulk_ms:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Parité et latence : recherche pgvector (PostgreSQL) vs galerie en mémoire
+
+Nécessite une base configurée (config/database.py) avec l'extension
+pgvector disponible. Les sondes sont les embeddings enregistrés + bruit
+de capture ; chaque sonde est reconnue par les deux chemins.
+
+Pour exécuter: python benchmarks/bench_pgvector.py [nombre_sondes]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection
+from core.face_recognition import FaceRecognitionEngine
+from core.pgvector_backend import PgVectorRecognizer
+from utils.encryption import EncryptionManager
+
+N_QUERIES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+
+def main():
+    db = DatabaseConnection()
+    if not db.connect():
+        print("❌ Base de données inaccessible")
+        return
+
+    remote = PgVectorRecognizer(db)
+    if not remote.ensure_schema():
+        print("❌ Extension pgvector indisponible")
+        return
+
+    rows = db.execute_query(
+        """
+        SELECT p.personne_id, p.username, p.password, fp.embedding, fp.profile_id
+        FROM personne p
+        INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id
+        WHERE p.is_active = TRUE AND fp.embedding IS NOT NULL
+        """
+    ) or []
+    if not rows:
+        print("Aucun profil actif")
+        return
+
+    # Même chargement qu'au démarrage : un modèle par profile_id, seuils du moteur pour les deux chemins
+    engine = FaceRecognitionEngine()
+    engine.load_gallery([rows], len(rows))
+    matrix = EncryptionManager.decode_embeddings([row[3] for row in rows])
+
+    rng = np.random.default_rng(0)
+    picked = rng.choice(len(rows), min(N_QUERIES, len(rows)), replace=False)
+    probes = matrix[picked] + rng.normal(0.0, 0.02, size=(picked.size, matrix.shape[1])).astype(np.float32)
+
+    start = time.perf_counter()
+    local = [engine.recognize_face(probe) for probe in probes]
+    local_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+    engine.remote = remote
+    start = time.perf_counter()
+    server = [engine.recognize_face(probe) for probe in probes]
+    server_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+    start = time.perf_counter()
+    batch = engine.recognize_faces_batch(list(probes))
+    batch_ms = (time.perf_counter() - start) * 1000 / len(probes)
+
+    agree = np.mean([a[0] == b[0] for a, b in zip(local, server)])
+    agree_batch = np.mean([a[0] == b[0] for a, b in zip(local, batch)])
+    max_gap = max(abs(a[3] - b[3]) for a, b in zip(local, server))
+
+    print(f"{len(rows)} profil(s), {len(probes)} sonde(s)")
+    print(f"{'Chemin':<20}{'Latence (ms)':>14}{'Accord':>10}")
+    print(f"{'mémoire':<20}{local_ms:>14.3f}{1.0:>10.3f}")
+    print(f"{'pgvector':<20}{server_ms:>14.3f}{agree:>10.3f}")
+    print(f"{'pgvector (batch)':<20}{batch_ms:>14.3f}{agree_batch:>10.3f}")
+    print(f"Écart max de similarité: {max_gap:.2e}")
+    db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
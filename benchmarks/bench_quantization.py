@@ -0,0 +1,126 @@
+"""
+Galerie quantifiée (float16 / int8) + re-classement float32 vs galerie float32
+
+Galerie synthétique (embeddings dlib simulés, regroupés en familles de
+visages proches : les voisins sont à ~0.7 comme sur une vraie galerie) ;
+les sondes sont des modèles enregistrés + bruit de capture, plus des
+imposteurs absents de la galerie. Pour chaque mode : octets en RAM par modèle (la matrice
+float32 ne compte pas quand elle est dans un fichier mappé), octets
+parcourus par recherche, accord avec la recherche float32 exacte, taux de
+reconnaissance / fausses acceptations et latence, sans puis avec l'index IVF.
+
+Pour exécuter: python benchmarks/bench_quantization.py [nombre_modèles] [rerank]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import FACE_RECOGNITION_TOLERANCE, SIMILARITY_THRESHOLD
+from core.ann_index import IVFIndex
+from core.gallery import FaceGallery
+
+N_TEMPLATES = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+RERANK = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+N_PROBES = 500
+N_IMPOSTORS = 500
+
+
+def run(gallery, probes):
+    # Une sonde à la fois, comme le flux caméra
+    start = time.perf_counter()
+    results = [gallery.match(probe) for probe in probes]
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(probes)
+    rows, distances, _ = (np.array(column) for column in zip(*results))
+    accepted = (distances <= FACE_RECOGNITION_TOLERANCE) & (1 - distances >= SIMILARITY_THRESHOLD)
+    return rows, distances, accepted, elapsed_ms
+
+
+def main():
+    rng = np.random.default_rng(0)
+    families = rng.normal(0.0, 0.09, size=(max(1, N_TEMPLATES // 50), 128))
+    matrix = (families[rng.integers(0, families.shape[0], N_TEMPLATES)]
+              + rng.normal(0.0, 0.045, size=(N_TEMPLATES, 128))).astype(np.float32)
+    names = [str(i) for i in range(N_TEMPLATES)]
+
+    truth = rng.choice(N_TEMPLATES, N_PROBES, replace=False)
+    genuine = matrix[truth] + rng.normal(0.0, 0.02, size=(N_PROBES, 128)).astype(np.float32)
+    impostors = (families[rng.integers(0, families.shape[0], N_IMPOSTORS)]
+                 + rng.normal(0.0, 0.045, size=(N_IMPOSTORS, 128))).astype(np.float32)
+
+    print(f"{N_TEMPLATES} modèles, {N_PROBES} sondes + {N_IMPOSTORS} imposteurs, rerank={RERANK}")
+    print(f"{'Mode':<22}{'RAM/modèle':>12}{'Parcourus':>11}{'Accord':>9}{'Écart dist.':>13}"
+          f"{'Reconnus':>10}{'Fausses acc.':>14}{'ms/sonde':>10}")
+
+    modes = [
+        ('float32', None, False, False),
+        ('float16', 'float16', False, False),
+        ('int8', 'int8', False, False),
+        ('int8 + float32 disque', 'int8', True, False),
+        ('IVF float32', None, False, True),
+        ('IVF int8 + disque', 'int8', True, True),
+    ]
+    reference = None
+    ivf_state = None
+    with tempfile.TemporaryDirectory() as directory:
+        for label, quantization, on_disk, ivf in modes:
+            index = IVFIndex() if ivf else None
+            gallery = FaceGallery(initial_capacity=N_TEMPLATES, quantization=quantization, rerank=RERANK,
+                                  float32_dir=directory if on_disk else None,
+                                  index=index, min_index_size=N_TEMPLATES + 1)
+            gallery.add_many(range(N_TEMPLATES), names, matrix)
+            if ivf:
+                # Même index entraîné pour les deux modes IVF
+                if ivf_state is None:
+                    gallery.rebuild_index()
+                    ivf_state = gallery.index.get_state()
+                else:
+                    gallery.index.set_state(ivf_state, N_TEMPLATES)
+                gallery.min_index_size = 0
+            gallery.match(genuine[0])  # préchauffage
+
+            rows, distances, accepted, elapsed_ms = run(gallery, genuine)
+            _, _, false_accepts, _ = run(gallery, impostors)
+            if reference is None:
+                reference = rows, distances
+
+            usage = gallery.memory_usage()
+            resident = sum(usage.values()) - (usage['float32'] if on_disk else 0)
+            scanned = (usage['codes'] or usage['float32']) / N_TEMPLATES
+            agreement = np.mean(rows == reference[0])
+            gap = np.abs(distances - reference[1]).max()
+            recognized = np.mean(accepted & (rows == truth))
+
+            print(f"{label:<22}{resident / N_TEMPLATES:>12.0f}{scanned:>11.0f}{agreement:>9.1%}{gap:>13.1e}"
+                  f"{recognized:>10.1%}{np.mean(false_accepts):>14.2%}{elapsed_ms:>10.2f}")
+
+            if quantization is not None and not ivf and not on_disk:
+                # Sans re-classement : classement et distances sur les codes seuls (par paquets de sondes)
+                coarse_rows = np.empty(N_PROBES, dtype=np.int64)
+                coarse_distances = np.empty(N_PROBES)
+                for start in range(0, N_PROBES, 50):
+                    batch = genuine[start:start + 50]
+                    coarse = gallery._coarse_distances(batch)
+                    best = np.argmin(coarse, axis=1)
+                    squared = coarse[np.arange(batch.shape[0]), best] + np.einsum('ij,ij->i', batch, batch)
+                    coarse_rows[start:start + 50] = best
+                    coarse_distances[start:start + 50] = np.sqrt(np.maximum(squared, 0.0))
+                coarse_gap = np.abs(coarse_distances - reference[1]).max()
+                print(f"{'  sans re-classement':<22}{'':>12}{'':>11}{np.mean(coarse_rows == reference[0]):>9.1%}"
+                      f"{coarse_gap:>13.1e}")
+            del gallery
+
+    # Avant : la publication recopiait la matrice float32 pour la copie figée
+    gallery = FaceGallery(initial_capacity=N_TEMPLATES, quantization='int8', rerank=RERANK)
+    gallery.add_many(range(N_TEMPLATES), names, matrix)
+    view = gallery.freeze()
+    shared = np.shares_memory(view.matrix, gallery.matrix)
+    print(f"Copie publiée : matrice float32 {'partagée' if shared else 'copiée'} "
+          f"({gallery.memory_usage()['float32'] / 2 ** 20:.0f} Mo non dupliqués)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Taux de reconnaissance dès la première frame : un modèle vs plusieurs modèles par personne
+
+Identités synthétiques vues sous plusieurs conditions (éclairage, lunettes,
+angle) : chaque condition décale l'encoding de la personne. Les sondes
+viennent d'une condition au hasard + bruit de capture. Une sonde est
+reconnue si la bonne identité passe les seuils du moteur.
+
+Pour exécuter: python benchmarks/bench_templates.py [nombre_personnes]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import FACE_RECOGNITION_TOLERANCE, SIMILARITY_THRESHOLD, TEMPLATE_TOP_K
+from core.gallery import FaceGallery
+
+N_PEOPLE = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+N_CONDITIONS = 3
+N_PROBES = 2000
+
+
+def recognition_rate(gallery, probes, truth):
+    start = time.perf_counter()
+    rows, distances, _ = gallery.match_batch(probes)
+    elapsed_us = (time.perf_counter() - start) * 1e6 / len(probes)
+    accepted = (distances <= FACE_RECOGNITION_TOLERANCE) & (1 - distances >= SIMILARITY_THRESHOLD)
+    correct = accepted & (gallery.ids[rows] == truth)
+    wrong = accepted & (gallery.ids[rows] != truth)
+    return correct.mean(), wrong.mean(), elapsed_us
+
+
+def main():
+    rng = np.random.default_rng(0)
+    people = rng.normal(0.0, 0.09, size=(N_PEOPLE, 128))
+    conditions = rng.normal(0.0, 0.032, size=(N_PEOPLE, N_CONDITIONS, 128))
+    captures = people[:, None, :] + conditions  # une photo d'enrôlement par condition
+
+    truth = rng.integers(0, N_PEOPLE, N_PROBES)
+    seen = rng.integers(0, N_CONDITIONS, N_PROBES)
+    probes = (captures[truth, seen] + rng.normal(0.0, 0.02, size=(N_PROBES, 128))).astype(np.float32)
+
+    setups = [
+        ('1 modèle', 1, 'min'),
+        (f'{N_CONDITIONS} modèles (min)', N_CONDITIONS, 'min'),
+        (f'{N_CONDITIONS} modèles (mean_top{TEMPLATE_TOP_K})', N_CONDITIONS, 'mean_topk'),
+    ]
+    print(f"{N_PEOPLE} personnes, {N_PROBES} sondes")
+    print(f"{'Galerie':<26}{'Reconnus':>10}{'Erreurs':>10}{'µs/sonde':>10}")
+    for label, templates, aggregation in setups:
+        gallery = FaceGallery(aggregation=aggregation, top_k=TEMPLATE_TOP_K)
+        for k in range(templates):
+            gallery.add_many(range(N_PEOPLE), [str(i) for i in range(N_PEOPLE)],
+                             captures[:, k], template_ids=[k] * N_PEOPLE)
+        correct, wrong, elapsed_us = recognition_rate(gallery, probes, truth)
+        print(f"{label:<26}{correct:>10.1%}{wrong:>10.2%}{elapsed_us:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
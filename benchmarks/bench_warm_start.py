@@ -0,0 +1,98 @@
+"""
+Benchmark démarrage à froid vs démarrage à chaud (instantané de galerie mappé)
+
+La base est simulée en mémoire avec la même interface que ProfileService
+(iter_gallery / gallery_credentials / gallery_watermark). Au démarrage à
+chaud, CHANGED profils ont été modifiés et REMOVED désactivés depuis
+l'instantané.
+
+Pour exécuter: python benchmarks/bench_warm_start.py [nombre_profils ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import GALLERY_CHUNK_SIZE
+from core.face_recognition import FaceRecognitionEngine
+from database.migrations import encode_embeddings_bulk
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+CHANGED = 50
+REMOVED = 20
+
+
+class FakeProfileService:
+    """Profils en mémoire (personne_id, username, password, embedding, updated_at)"""
+
+    def __init__(self, count):
+        rng = np.random.default_rng(0)
+        blobs = encode_embeddings_bulk(rng.normal(0.0, 0.09, size=(count, 128)).astype(np.float32))
+        # Une modification par seconde : seule la fin rentre dans GALLERY_WATERMARK_OVERLAP
+        start = datetime(2026, 1, 1)
+        self.rows = {i + 1: [i + 1, f"user_{i}", 'hash', memoryview(blob), start + timedelta(seconds=i)]
+                     for i, blob in enumerate(blobs)}
+
+    def touch(self, changed, removed):
+        rng = np.random.default_rng(1)
+        stamp = self.gallery_watermark() + timedelta(seconds=1)
+        ids = rng.choice(list(self.rows), changed + removed, replace=False)
+        fresh = encode_embeddings_bulk(rng.normal(0.0, 0.09, size=(changed, 128)).astype(np.float32))
+        for personne_id, blob in zip(ids[:changed], fresh):
+            self.rows[personne_id][3:] = [memoryview(blob), stamp]
+        for personne_id in ids[changed:]:
+            del self.rows[personne_id]
+        return ids[:changed]
+
+    def count_gallery(self):
+        return len(self.rows)
+
+    def gallery_watermark(self):
+        return max(row[4] for row in self.rows.values())
+
+    def gallery_credentials(self):
+        return [tuple(row[:3]) for row in self.rows.values()]
+
+    def iter_gallery(self, chunk_size=GALLERY_CHUNK_SIZE, since=None, personne_ids=None):
+        wanted = set(personne_ids or [])
+        rows = [tuple(row[:4]) for row in self.rows.values()
+                if since is None or row[4] > since or row[0] in wanted]
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    print(f"{'Profils':>8}{'Froid (ms)':>12}{'Chaud (ms)':>12}")
+    try:
+        for count in SIZES:
+            service = FakeProfileService(count)
+            shutil.rmtree(directory, ignore_errors=True)
+
+            engine = FaceRecognitionEngine()
+            start = time.perf_counter()
+            engine.warm_start(service, directory)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            changed = service.touch(CHANGED, REMOVED)
+            engine = FaceRecognitionEngine()
+            start = time.perf_counter()
+            engine.warm_start(service, directory)
+            warm_ms = (time.perf_counter() - start) * 1000
+
+            # Première reconnaissance comprise (pages de la matrice lues à la demande)
+            probe = engine.gallery.encoding(engine.gallery.row_of(int(changed[0])))
+            assert engine.recognize_face(probe)[0] == changed[0]
+            assert len(engine.gallery) == count - REMOVED
+            print(f"{count:>8}{cold_ms:>12.0f}{warm_ms:>12.0f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
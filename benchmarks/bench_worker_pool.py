@@ -0,0 +1,88 @@
+"""
+Benchmark débit du pool de processus face au moteur mono-processus
+
+Les frames de debug_frames/ et uploads/ sont traitées en boucle ; la
+galerie contient les visages de ces frames plus des profils synthétiques.
+Avec --crash, un processus est tué en cours de route pour vérifier la relance.
+
+Pour exécuter: python benchmarks/bench_worker_pool.py [n_workers] [--crash]
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.face_recognition import FaceRecognitionEngine
+
+N_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else os.cpu_count()
+CRASH = '--crash' in sys.argv
+N_FRAMES = 64
+SYNTHETIC_PROFILES = 5000
+
+
+def load_frames():
+    frames = []
+    for folder in ('debug_frames', 'uploads'):
+        path = os.path.join(ROOT, folder)
+        for name in sorted(os.listdir(path)) if os.path.isdir(path) else []:
+            image = cv2.imread(os.path.join(path, name))
+            if image is not None:
+                frames.append(image)
+    return frames
+
+
+def main():
+    frames = load_frames()
+    engine = FaceRecognitionEngine()
+
+    rng = np.random.default_rng(0)
+    for i in range(SYNTHETIC_PROFILES):
+        engine.gallery.add(100000 + i, f"synth_{i}", rng.normal(0.0, 0.09, 128))
+    for i, frame in enumerate(frames):
+        _, encodings = engine.detect_faces(frame)
+        for encoding in encodings:
+            engine.gallery.add(i + 1, f"frame_{i}", encoding)
+    engine.publish_gallery()
+    print(f"{len(frames)} frame(s) source, galerie de {len(engine.gallery)} profil(s)")
+
+    stream = [frames[i % len(frames)] for i in range(N_FRAMES)]
+
+    start = time.perf_counter()
+    expected = []
+    for frame in stream:
+        _, encodings = engine.detect_faces(frame)
+        expected.append([r[0] for r in engine.recognize_faces_batch(encodings)])
+    single = N_FRAMES / (time.perf_counter() - start)
+    print(f"Mono-processus: {single:.1f} frames/s")
+
+    engine.start_worker_pool(N_WORKERS)
+    engine.submit_frame(frames[0])
+    engine.collect_frame()  # attendre le chargement des modèles dans les processus
+
+    start = time.perf_counter()
+    received = []
+    for i, frame in enumerate(stream):
+        engine.submit_frame(frame)
+        if CRASH and i == N_FRAMES // 2:
+            engine.worker_pool._workers[0].kill()
+        while engine.worker_pool.pending() > engine.worker_pool.n_slots:
+            received.append(engine.collect_frame())
+    while engine.worker_pool.pending():
+        received.append(engine.collect_frame())
+    pooled = N_FRAMES / (time.perf_counter() - start)
+
+    ordered = [r[0] for r in received] == list(range(1, N_FRAMES + 1))
+    identical = [[x[0] for x in r[3]] for r in received] == expected
+    stats = engine.worker_pool.get_stats()
+    engine.stop_worker_pool()
+
+    print(f"Pool {N_WORKERS} processus: {pooled:.1f} frames/s ({pooled / single:.1f}x), "
+          f"ordre respecté: {ordered}, résultats identiques: {identical}, relances: {stats['restarts']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,106 @@
 
 # ===== RECONNAISSANCE FACIALE =====
 FACE_RECOGNITION_TOLERANCE = 0.6
-FACE_DETECTION_MODEL = 'hog'  # 'hog' (rapide) ou 'cnn' (précis)
+FACE_DETECTION_MODEL = 'hog'  # chaîne de DETECTOR_CHAINS : 'hog', 'dnn' ou 'haar'
 MIN_FACE_SIZE = (50, 50)
 SIMILARITY_THRESHOLD = 0.6
+# Plusieurs visages devant la caméra : 'all' = tous doivent être reconnus (refus si un inconnu
+# est présent, anti-talonnage), 'any' = un seul visage reconnu ouvre pour le groupe
+GROUP_ACCESS_POLICY = 'all'
+
+# ===== MODÈLES MULTIPLES PAR PERSONNE =====
+MAX_TEMPLATES_PER_PERSON = 5  # photos (éclairage, lunettes, angle) conservées par personne
+TEMPLATE_PRUNING = 'redundant'  # au-delà du plafond : 'oldest' ou 'redundant' (le moins utile)
+TEMPLATE_AGGREGATION = 'min'  # score d'une identité : 'min' ou 'mean_topk'
+TEMPLATE_TOP_K = 2  # modèles moyennés avec 'mean_topk'
+
+# ===== BACKEND DE RECONNAISSANCE =====
+RECOGNITION_BACKEND = 'memory'  # 'memory' (galerie en RAM) ou 'pgvector' (recherche côté PostgreSQL)
+PGVECTOR_INDEX = 'hnsw'  # 'hnsw' ou 'ivfflat'
+PGVECTOR_EF_SEARCH = 40  # hnsw.ef_search
+PGVECTOR_PROBES = 10  # ivfflat.probes
+
+# ===== PYRAMIDE DE DÉTECTION =====
+# Échelles grossières parcourues d'abord, puis le niveau le plus fin (déduit de MIN_FACE_SIZE)
+DETECTION_SCALES = (0.5,)
+HOG_WINDOW_SIZE = 80  # plus petit visage (px) vu par le détecteur HOG de dlib
+
+# ===== DÉTECTION AUTOUR DU DERNIER VISAGE (ROI) =====
+ROI_DETECTION_ENABLED = True  # chercher d'abord près de la dernière boîte connue, pleine frame si échec
+ROI_MARGIN = 0.6  # marge ajoutée de chaque côté de la dernière boîte (fraction de sa taille)
+ROI_TARGET_FACE_SIZE = 100  # taille (px) du visage attendu après mise à l'échelle de la fenêtre
+ROI_FULL_SCAN_INTERVAL = 5  # détections ROI consécutives avant une pleine frame (nouveaux visages)
+
+# ===== DÉTECTEURS =====
+# Chaînes de repli : (détecteur, budget en ms depuis le début de la frame)
+DETECTOR_CHAINS = {
+    'hog': [('hog', 80), ('haar', 120)],
+    'dnn': [('dnn', 60), ('hog', 120), ('haar', 150)],
+    'haar': [('haar', 60), ('hog', 150)],
+}
+DNN_PROTOTXT = 'assets/models/deploy.prototxt'
+DNN_CAFFEMODEL = 'assets/models/res10_300x300_ssd_iter_140000.caffemodel'
+DNN_CONFIDENCE = 0.6
+
+# ===== INDEX ANN (grandes galeries) =====
+ANN_INDEX_BACKEND = 'ivf'  # 'exact' (force brute) ou 'ivf'
+ANN_MIN_GALLERY_SIZE = 5000  # recherche exacte en dessous de ce nombre de profils
+ANN_NLIST = 0  # listes IVF (0 = automatique, ~2 * sqrt(n))
+ANN_NPROBE = 8  # listes parcourues par recherche
+GALLERY_QUANTIZATION = None  # None (float32), 'float16' ou 'int8' : parcours sur une copie compacte
+GALLERY_RERANK = 64  # candidats re-classés en float32 exact après le parcours quantifié
+GALLERY_FLOAT32_DIR = None  # avec quantification : matrice float32 dans un fichier mappé de ce répertoire (None = RAM)
+GALLERY_COMPACT_RATIO = 0.25  # part de lignes retirées (remplacements, suppressions) déclenchant un compactage
+
+# ===== SUIVI DES VISAGES =====
+TRACKING_ENABLED = True  # Suivre les visages entre deux détections complètes
+TRACKER_REDETECT_INTERVAL = 10  # frames entre deux détections complètes
+TRACKER_MIN_POINTS = 8  # points suivis minimum avant de déclarer la perte
+TRACKER_MAX_FB_ERROR = 1.5  # erreur aller-retour max (pixels) d'un point suivi
+TRACKER_MAX_SCALE_CHANGE = 1.25  # variation d'échelle max par frame (dérive)
+TRACKER_IOU_MATCH = 0.3  # IoU min pour rattacher une détection à une piste
+
+# ===== CACHE DES ENCODINGS (par piste suivie) =====
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_TTL = 1.0  # secondes avant ré-encodage forcé
+EMBEDDING_CACHE_MAX_ENTRIES = 32  # pistes mémorisées au maximum
+EMBEDDING_CACHE_MIN_IOU = 0.7  # IoU min avec la boîte encodée pour réutiliser
+EMBEDDING_CACHE_MAX_SHARPNESS_CHANGE = 0.5  # variation relative de netteté tolérée
+
+# ===== CONTRÔLE QUALITÉ AVANT ENCODAGE =====
+QUALITY_GATE_ENABLED = True  # visages flous, mal exposés, trop petits ou de profil : ni encodés ni comptés
+QUALITY_MIN_SHARPNESS = 20.0  # variance du laplacien sur la boîte du visage
+QUALITY_MIN_BRIGHTNESS = 40  # luminosité moyenne (0-255)
+QUALITY_MAX_BRIGHTNESS = 220
+QUALITY_MAX_CLIPPED = 0.3  # part max de pixels saturés (noirs ou blancs)
+QUALITY_MAX_YAW = 35  # degrés (estimé depuis les repères 5 points)
+
+# ===== ENCODAGE EN DEUX TEMPS =====
+ENCODING_MODEL = 'large'  # repères 68 points : modèles enregistrés (enrôlement) et encode_faces par défaut
+ENCODING_JITTERS = 1
+FRAME_ENCODING_MODEL = 'small'  # repères 5 points : encodage rapide des visages de chaque frame
+TWO_STAGE_ENABLED = True  # ré-encoder précisément les visages dont la distance est proche du seuil
+TWO_STAGE_BAND = 0.05  # demi-largeur de la zone grise autour du seuil de décision
+TWO_STAGE_MODEL = 'large'  # repères 68 points
+TWO_STAGE_JITTERS = 4
+
+# ===== CHARGEMENT DE LA GALERIE =====
+GALLERY_CHUNK_SIZE = 2000  # lignes lues par bloc depuis le curseur serveur
+GALLERY_SNAPSHOT_ENABLED = True  # instantané disque mappé au démarrage (+ lignes modifiées seulement)
+GALLERY_SNAPSHOT_DIR = 'cache/gallery'
+
+# ===== RECHARGEMENT À CHAUD DE LA GALERIE =====
+GALLERY_LISTENER_ENABLED = True  # LISTEN/NOTIFY sur les changements de personne / face_profiles
+GALLERY_NOTIFY_CHANNEL = 'gallery_changes'
+GALLERY_NOTIFY_DEBOUNCE = 0.2  # secondes d'attente pour regrouper les notifications
+GALLERY_POLL_INTERVAL = 30  # secondes entre deux rattrapages par updated_at (repli)
+# updated_at = début de la transaction : une écriture validée tard peut porter une date
+# antérieure au watermark, le rattrapage relit donc cette fenêtre (> plus longue transaction)
+GALLERY_WATERMARK_OVERLAP = 120  # secondes
+
+# ===== PROCESSUS DE RECONNAISSANCE =====
+RECOGNITION_WORKERS = 0  # processus de détection/encodage (0 = processus principal uniquement)
+WORKER_SLOTS_PER_WORKER = 2  # tampons de frames partagés par processus
 
 # ===== SÉCURITÉ =====
 MAX_FAILED_FACE_ATTEMPTS = 3
@@ -27,6 +124,19 @@ FRAME_HEIGHT = 480
 FPS = 30
 CAMERA_FLIP = True  # Inverser horizontalement
 
+# ===== DIFFUSION WEB (MJPEG) =====
+STREAM_JPEG_QUALITY = 80  # qualité JPEG, un seul encodage par frame pour tous les clients
+STREAM_CLIENT_QUEUE = 2  # frames en attente par client ; au-delà la plus ancienne est abandonnée
+EVENT_BUFFER_SIZE = 256  # derniers événements gardés en mémoire pour la reprise des clients SSE
+EVENT_BACKFILL_PAGE = 500  # événements d'accès relus par requête keyset à la reprise d'un client
+ACCESS_NOTIFY_CHANNEL = 'access_events'  # NOTIFY (payload: access_id) à chaque décision enregistrée
+ACCESS_POLL_INTERVAL = 5  # secondes entre deux relectures de acces_log sans notification (repli)
+ACCESS_GAP_TIMEOUT = 2.0  # secondes d'attente d'un access_id manquant (transaction non validée) avant de le sauter
+SSE_KEEPALIVE = 15  # secondes entre deux commentaires keep-alive sur un flux SSE inactif
+PAGE_SIZE_DEFAULT = 100  # lignes par page de /api/logs et /api/users (curseur keyset)
+PAGE_SIZE_MAX = 500
+WEB_RECOGNITION_FPS = 5  # cadence de la reconnaissance web (0 = aussi vite que possible) ; le flux suit la caméra
+
 # ===== INTERFACE UTILISATEUR =====
 UI_THEME = 'light'
 LANGUAGE = 'fr'
@@ -2,9 +2,13 @@
 from .face_recognition import FaceRecognitionEngine
 from .authentication import AuthenticationManager
 from .antispoofing import AntiSpoofingDetector
+from .face_tracker import FaceTracker
+from .embedding_cache import EmbeddingCache
 
 __all__ = [
     'FaceRecognitionEngine',
     'AuthenticationManager',
-    'AntiSpoofingDetector'
+    'AntiSpoofingDetector',
+    'FaceTracker',
+    'EmbeddingCache'
 ]
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""Flux des décisions d'accès (PostgreSQL LISTEN/NOTIFY + relecture keyset de acces_log)"""
+import select
+import threading
+import time
+from typing import Callable, Optional
+from config.settings import (
+    ACCESS_NOTIFY_CHANNEL,
+    ACCESS_POLL_INTERVAL,
+    ACCESS_GAP_TIMEOUT,
+    EVENT_BACKFILL_PAGE
+)
+from database.connection import DatabaseConnection
+from services.access_service import AccessService
+from utils.logger import Logger
+
+logger = Logger()
+
+
+class AccessEventListener:
+    """
+    Séquenceur unique des décisions d'accès, quelle que soit l'application qui les écrit
+
+    Le trigger de acces_log notifie chaque access_id validé ; le thread
+    relit alors acces_log après son curseur (pages keyset) et publie les
+    événements dans l'ordre des access_id. Un access_id manquant peut
+    être une transaction pas encore validée : les événements suivants sont
+    retenus jusqu'à gap_timeout secondes, puis le trou est sauté
+    (transaction annulée). Toutes les poll_interval secondes, et à chaque
+    reconnexion, une relecture couvre les notifications perdues. Le thread
+    a sa propre connexion.
+    """
+
+    def __init__(self, publish: Callable[[dict], None], after_id: int = 0,
+                 channel: str = ACCESS_NOTIFY_CHANNEL, poll_interval: float = ACCESS_POLL_INTERVAL,
+                 gap_timeout: float = ACCESS_GAP_TIMEOUT, page_size: int = EVENT_BACKFILL_PAGE):
+        self.publish = publish
+        self.cursor = after_id  # dernier access_id publié (ou sauté)
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        self.page_size = page_size
+
+        self.db: Optional[DatabaseConnection] = None
+        self.access_service: Optional[AccessService] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_poll = 0.0
+        self._gap_since: Optional[float] = None  # premier constat du trou après le curseur
+        self._stats = {'notifications': 0, 'published': 0, 'skipped': 0, 'polls': 0, 'reconnects': 0}
+
+    def start(self):
+        """Démarrer l'écoute en arrière-plan"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='access-listener', daemon=True)
+        self._thread.start()
+        logger.log_info(f"✅ Écoute des décisions d'accès ({self.channel}, après {self.cursor})")
+
+    def stop(self):
+        """Arrêter l'écoute et fermer la connexion"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._disconnect()
+
+    def _connect(self) -> bool:
+        db = DatabaseConnection.dedicated()
+        if not db.connect():
+            return False
+        db.cursor.execute(f"LISTEN {self.channel}")
+        db.connection.commit()
+        self.db = db
+        self.access_service = AccessService(db)
+        # Ce qui a été validé pendant la déconnexion
+        self._poll()
+        return True
+
+    def _disconnect(self):
+        if self.db is not None:
+            try:
+                self.db.disconnect()
+            except Exception:
+                pass
+        self.db = None
+        self.access_service = None
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if self.db is None:
+                    if not self._connect():
+                        self._stop.wait(backoff)
+                        backoff = min(backoff * 2, 60.0)
+                        continue
+                    backoff = 1.0
+
+                # Notifications déjà lues du socket pendant la relecture précédente
+                notified = self._drain()
+                if not notified:
+                    ready, _, _ = select.select([self.db.connection], [], [], self._timeout())
+                    if ready:
+                        notified = self._drain()
+                if notified or self._gap_since is not None or \
+                        time.monotonic() - self._last_poll >= self.poll_interval:
+                    self._poll()
+
+            except Exception as e:
+                logger.log_error(f"❌ Écoute des décisions d'accès interrompue: {e}")
+                self._stats['reconnects'] += 1
+                self._disconnect()
+                self._stop.wait(backoff)
+
+    def _timeout(self) -> float:
+        """Attente maximale avant la prochaine relecture (trou en attente ou repli périodique)"""
+        deadline = self._last_poll + self.poll_interval
+        if self._gap_since is not None:
+            deadline = min(deadline, self._gap_since + self.gap_timeout)
+        return max(0.0, min(1.0, deadline - time.monotonic()))
+
+    def _drain(self) -> int:
+        """Nombre de notifications reçues depuis le dernier appel (le payload ne sert pas : on relit)"""
+        connection = self.db.connection
+        connection.poll()
+        count = len(connection.notifies)
+        del connection.notifies[:]
+        self._stats['notifications'] += count
+        return count
+
+    def _poll(self):
+        """Publier les décisions validées après le curseur, dans l'ordre des access_id"""
+        self._last_poll = time.monotonic()
+        self._stats['polls'] += 1
+        while not self._stop.is_set():
+            page = self.access_service.get_access_events(self.cursor, self.page_size)
+            self.db.connection.commit()
+            if not self._publish_page(page) or len(page) < self.page_size:
+                return
+
+    def _publish_page(self, page: list) -> bool:
+        """
+        Publier une page tant que les access_id se suivent
+
+        Returns:
+            False si un trou récent retient la suite de la page
+        """
+        for event in page:
+            if event['id'] > self.cursor + 1:
+                now = time.monotonic()
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < self.gap_timeout:
+                    return False
+                self._stats['skipped'] += event['id'] - self.cursor - 1
+                logger.log_debug(f"Décisions d'accès {self.cursor + 1}..{event['id'] - 1} absentes, sautées")
+            self._gap_since = None
+            self.publish(event)
+            self.cursor = event['id']
+            self._stats['published'] += 1
+        return True
+
+    def get_stats(self) -> dict:
+        """Compteurs de notifications, événements publiés, trous sautés et reconnexions"""
+        return dict(self._stats, cursor=self.cursor, connected=self.db is not None)
@@ -0,0 +1,254 @@
+"""Index de plus proches voisins approchés pour les grandes galeries"""
+import numpy as np
+from typing import Dict, Optional
+from utils.logger import Logger
+
+logger = Logger()
+
+
+class GalleryIndex:
+    """
+    Interface d'un index branché sur FaceGallery (recherche exacte par défaut)
+
+    L'index est adressé par numéro de ligne de la galerie. Les lignes ne
+    sont jamais réécrites (une ligne retirée reste indexée, la galerie
+    l'écarte des résultats) : la galerie notifie chaque ajout, et le
+    renumérotage lors du compactage.
+    """
+
+    name = 'exact'
+
+    def __init__(self, **options):
+        pass
+
+    def is_ready(self) -> bool:
+        """L'index peut-il répondre (sinon recherche exacte)"""
+        return False
+
+    def needs_rebuild(self, count: int) -> bool:
+        """Faut-il (ré)entraîner l'index pour cette taille de galerie"""
+        return False
+
+    def rebuild(self, matrix: np.ndarray):
+        """Reconstruire l'index à partir de la matrice en mémoire"""
+
+    def add(self, row: int, vector: np.ndarray):
+        """Indexer une nouvelle ligne (toujours après les lignes déjà indexées)"""
+
+    def compact(self, rows: np.ndarray):
+        """Ne garder que ces lignes, renumérotées 0..len(rows)-1 dans cet ordre"""
+
+    def clear(self):
+        """Vider l'index"""
+
+    def candidates(self, probe: np.ndarray) -> Optional[np.ndarray]:
+        """Lignes candidates pour une sonde (None = toute la galerie)"""
+        return None
+
+    def get_state(self, rows: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """Tableaux à sauvegarder pour restaurer l'index sans ré-entraînement (lignes rows seulement)"""
+        return {}
+
+    def set_state(self, state: Dict[str, np.ndarray], count: int):
+        """Restaurer un état issu de get_state (count lignes indexées)"""
+
+    def frozen(self, count: int) -> 'GalleryIndex':
+        """Copie en lecture seule pour une galerie figée de count lignes"""
+        return self
+
+
+class IVFIndex(GalleryIndex):
+    """
+    Index IVF (fichiers inversés) en NumPy pur
+
+    Les centroïdes sont appris par k-means sur la galerie ; chaque ligne
+    est rattachée à son centroïde le plus proche. Une recherche ne parcourt
+    que les n_probe listes les plus proches de la sonde. Les ajouts sont
+    incrémentaux (pas de ré-entraînement).
+    """
+
+    name = 'ivf'
+
+    def __init__(self, n_lists: int = 0, n_probe: int = 8, kmeans_iterations: int = 8,
+                 train_sample: int = 50000, regrow_factor: float = 4.0, seed: int = 0):
+        self.n_lists = n_lists  # 0 = automatique (~2 * sqrt(n))
+        self.n_probe = n_probe
+        self.kmeans_iterations = kmeans_iterations
+        self.train_sample = train_sample
+        self.regrow_factor = regrow_factor
+        self._rng = np.random.default_rng(seed)
+
+        self.centroids: Optional[np.ndarray] = None
+        self._centroid_norms: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._assign = np.empty(0, dtype=np.int32)
+        self._count = 0
+
+        # Disposition CSR (lignes triées par liste) des _layout_count premières lignes ;
+        # les lignes ajoutées ensuite sont parcourues telles quelles jusqu'au prochain tri
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._layout_count = 0
+
+    def is_ready(self) -> bool:
+        return self.centroids is not None
+
+    def needs_rebuild(self, count: int) -> bool:
+        if self.centroids is None:
+            return True
+        return count > self.regrow_factor * self._trained_size
+
+    def _nearest_centroids(self, vectors: np.ndarray, block: int = 16384) -> np.ndarray:
+        # Par blocs : n x n_lists d'un coup ne tient pas en RAM sur une grande galerie
+        nearest = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], block):
+            products = vectors[start:start + block] @ self.centroids.T
+            nearest[start:start + block] = np.argmin(self._centroid_norms - 2.0 * products, axis=1)
+        return nearest
+
+    def _train(self, matrix: np.ndarray):
+        n = matrix.shape[0]
+        k = self.n_lists or int(2 * np.sqrt(n))
+        k = max(1, min(k, n))
+
+        # ~32 points par liste suffisent pour placer les centroïdes
+        sample_size = min(n, self.train_sample, 32 * k)
+        if sample_size < n:
+            sample = matrix[self._rng.choice(n, sample_size, replace=False)]
+        else:
+            sample = matrix
+        centroids = sample[self._rng.choice(sample.shape[0], k, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            norms = np.einsum('ij,ij->i', centroids, centroids)
+            labels = np.argmin(norms - 2.0 * (sample @ centroids.T), axis=1)
+            counts = np.bincount(labels, minlength=k)
+
+            filled = np.flatnonzero(counts)
+            order = np.argsort(labels, kind='stable')
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            centroids[filled] = sums / counts[filled, None]
+
+            # Réamorcer les listes vides sur des points aléatoires
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                centroids[empty] = sample[self._rng.choice(sample.shape[0], empty.size)]
+
+        self.centroids = centroids.astype(np.float32)
+        self._centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self._trained_size = n
+
+    def rebuild(self, matrix: np.ndarray):
+        n = matrix.shape[0]
+        if n == 0:
+            self.clear()
+            return
+        self._train(matrix)
+        self._assign = np.empty(max(n, self._assign.shape[0]), dtype=np.int32)
+        self._assign[:n] = self._nearest_centroids(matrix)
+        self._count = n
+        self._order = None
+        logger.log_info(f"Index IVF reconstruit: {n} profil(s), {self.centroids.shape[0]} liste(s)")
+
+    def add(self, row: int, vector: np.ndarray):
+        if self.centroids is None:
+            return
+        if row >= self._assign.shape[0]:
+            # Nouveau tableau : les copies figées gardent l'ancien
+            grown = np.empty(max(2 * self._assign.shape[0], row + 1), dtype=np.int32)
+            grown[:self._count] = self._assign[:self._count]
+            self._assign = grown
+        self._assign[row] = self._nearest_centroids(vector.reshape(1, -1))[0]
+        self._count = max(self._count, row + 1)
+
+    def compact(self, rows: np.ndarray):
+        if self.centroids is None:
+            return
+        self._assign = self._assign[:self._count][rows]
+        self._count = rows.shape[0]
+        self._order = None
+
+    def clear(self):
+        # Nouveau tableau : les copies figées gardent leurs affectations
+        self._assign = np.empty(0, dtype=np.int32)
+        self._count = 0
+        self._order = None
+
+    def get_state(self, rows: np.ndarray = None) -> Dict[str, np.ndarray]:
+        if self.centroids is None:
+            return {}
+        assign = self._assign[:self._count]
+        return {
+            'centroids': self.centroids,
+            'assign': assign if rows is None else assign[rows],
+            'trained_size': np.array(self._trained_size)
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray], count: int):
+        if 'centroids' not in state or state['assign'].shape[0] != count:
+            return
+        self.centroids = np.ascontiguousarray(state['centroids'], dtype=np.float32)
+        self._centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        self._trained_size = int(state['trained_size'])
+        self._assign = np.array(state['assign'], dtype=np.int32)
+        self._count = count
+        self._order = None
+
+    def frozen(self, count: int) -> 'IVFIndex':
+        """
+        Copie en lecture seule sans recopie : les affectations des lignes
+        existantes ne changent plus (ajouts en fin, nouveaux tableaux au
+        ré-entraînement et au compactage), la disposition est partagée
+        """
+        copy = IVFIndex(n_lists=self.n_lists, n_probe=self.n_probe)
+        if self.centroids is None:
+            return copy
+        self._ensure_layout()
+        copy.centroids, copy._centroid_norms = self.centroids, self._centroid_norms
+        copy._trained_size = self._trained_size
+        copy._assign = self._assign[:count]
+        copy._count = count
+        copy._order, copy._offsets, copy._layout_count = self._order, self._offsets, self._layout_count
+        return copy
+
+    def _ensure_layout(self):
+        # Tri complet seulement quand les lignes non triées dépassent 1/8 des lignes triées
+        unsorted = self._count - self._layout_count
+        if self._order is not None and 0 <= unsorted <= max(1024, self._layout_count // 8):
+            return
+        assign = self._assign[:self._count]
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._order = np.argsort(assign, kind='stable')
+        self._layout_count = self._count
+
+    def candidates(self, probe: np.ndarray) -> Optional[np.ndarray]:
+        if self.centroids is None or self._count == 0:
+            return None
+        self._ensure_layout()
+        order, offsets, sorted_count = self._order, self._offsets, self._layout_count
+
+        n_probe = min(self.n_probe, self.centroids.shape[0])
+        scores = self._centroid_norms - 2.0 * (self.centroids @ probe)
+        lists = np.argpartition(scores, n_probe - 1)[:n_probe]
+        parts = [order[offsets[k]:offsets[k + 1]] for k in lists]
+        if sorted_count < self._count:
+            tail = np.flatnonzero(np.isin(self._assign[sorted_count:self._count], lists))
+            parts.append(tail + sorted_count)
+        return np.concatenate(parts)
+
+
+INDEX_BACKENDS = {
+    'exact': GalleryIndex,
+    'ivf': IVFIndex,
+}
+
+
+def create_index(backend: str, **options) -> GalleryIndex:
+    """Instancier un backend d'index par son nom"""
+    index_class = INDEX_BACKENDS.get(backend)
+    if index_class is None:
+        logger.log_warning(f"Backend d'index inconnu '{backend}', recherche exacte utilisée")
+        index_class = GalleryIndex
+    return index_class(**options)
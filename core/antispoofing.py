@@ -44,12 +44,15 @@ class AntiSpoofingDetector:
         """Désactivé - on utilise uniquement le mouvement de tête"""
         return True
 
-    def detect_head_turn(self, frame: np.ndarray, face_location: Tuple) -> bool:
+    def detect_head_turn(self, frame: np.ndarray, face_location: Tuple, roi: Optional[Tuple] = None) -> bool:
         """
         Détection RAPIDE et TOLÉRANTE du mouvement gauche/droite
         - Très permissif sur la distance
         - Accepte les mouvements rapides
         - Ne perd pas le tracking facilement
+        - roi : fenêtre de recherche autour de la position précédente ; un
+          visage dont le centre en sort (autre visage, fausse détection)
+          n'est pas compté comme un mouvement
         """
         if not HEAD_TURN_DETECTION_ENABLED:
             return True
@@ -59,8 +62,15 @@ class AntiSpoofingDetector:
 
             # Centre et largeur du visage
             center_x = (left + right) // 2
+            center_y = (top + bottom) // 2
             face_width = right - left
 
+            if roi is not None:
+                roi_top, roi_right, roi_bottom, roi_left = roi
+                if not (roi_left <= center_x <= roi_right and roi_top <= center_y <= roi_bottom):
+                    logger.log_debug("Visage hors de la zone attendue - échantillon ignoré")
+                    return False
+
             # Ajouter à l'historique pour stabilité
             self.position_history.append(center_x)
             if len(self.position_history) > self.history_size:
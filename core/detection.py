@@ -0,0 +1,343 @@
+"""Détecteurs de visages (registre, pyramide d'échelles, chaîne de repli)"""
+import os
+import time
+from abc import ABC, abstractmethod
+import cv2
+import numpy as np
+import face_recognition
+from typing import Dict, List, Optional, Tuple
+from config.settings import (
+    MIN_FACE_SIZE,
+    DETECTION_SCALES,
+    HOG_WINDOW_SIZE,
+    FACE_DETECTION_MODEL,
+    DETECTOR_CHAINS,
+    DNN_PROTOTXT,
+    DNN_CAFFEMODEL,
+    DNN_CONFIDENCE,
+    FRAME_WIDTH,
+    FRAME_HEIGHT,
+    ROI_MARGIN,
+    ROI_TARGET_FACE_SIZE
+)
+from core.face_tracker import box_iou
+from utils.logger import Logger
+
+logger = Logger()
+
+Location = Tuple[int, int, int, int]  # (top, right, bottom, left) comme dlib
+
+
+def detection_pyramid(min_face_size: Tuple[int, int] = MIN_FACE_SIZE,
+                      scales=DETECTION_SCALES,
+                      window: int = HOG_WINDOW_SIZE) -> List[Tuple[float, int]]:
+    """
+    Niveaux (échelle, upsample) à essayer, du plus grossier au plus fin
+
+    Le dernier niveau est le moins coûteux qui voit encore un visage de
+    min_face_size : le détecteur ne trouve que des visages d'au moins
+    `window` pixels, d'où un facteur effectif window / min_face_size
+    obtenu par réduction puis, si besoin, par upsample (x2 chacun).
+    Les échelles grossières configurées (upsample 0) sont parcourues avant.
+    """
+    required = window / float(min(min_face_size))
+    upsample = max(0, int(np.ceil(np.log2(required))))
+    finest = (round(required / 2 ** upsample, 3), upsample)
+
+    coarse = [(float(scale), 0) for scale in sorted(scales) if 0 < scale <= 1.0 and scale < required]
+    return coarse + [finest]
+
+
+def scale_location(location: Location, scale: float, height: int, width: int) -> Location:
+    """Ramener une boîte détectée sur une image réduite aux coordonnées natives"""
+    top, right, bottom, left = (int(round(v / scale)) for v in location)
+    return max(0, top), min(width, right), min(height, bottom), max(0, left)
+
+
+def expand_box(location: Location, margin: float, height: int, width: int) -> Location:
+    """Fenêtre élargie de margin (fraction de la taille) de chaque côté, bornée à l'image"""
+    top, right, bottom, left = location
+    pad_y, pad_x = int((bottom - top) * margin), int((right - left) * margin)
+    return max(0, top - pad_y), min(width, right + pad_x), min(height, bottom + pad_y), max(0, left - pad_x)
+
+
+def roi_scale(face_size: int, target: int = ROI_TARGET_FACE_SIZE) -> float:
+    """Échelle qui amène un visage de face_size pixels à la taille visée pour HOG"""
+    return float(np.clip(target / max(1, face_size), 0.25, 4.0))
+
+
+class FaceDetector(ABC):
+    """
+    Détecteur de visages enregistré dans DETECTORS
+
+    Le modèle est chargé une seule fois par load() ; detect() reçoit la
+    frame BGR et sa luminance (calculée une fois pour toute la chaîne).
+    """
+
+    name = ''
+
+    def __init__(self):
+        self.clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+
+    def load(self) -> bool:
+        """Charger le modèle (False si indisponible)"""
+        return True
+
+    @abstractmethod
+    def detect(self, frame: np.ndarray, gray: np.ndarray) -> List[Location]:
+        """Boîtes (top, right, bottom, left) en coordonnées de la frame"""
+
+
+class HOGDetector(FaceDetector):
+    """
+    HOG de dlib sur la pyramide de luminance réduite
+
+    Tous les niveaux sont parcourus : un niveau grossier ne voit que les
+    grands visages, s'arrêter au premier qui trouve quelque chose cacherait
+    une personne plus éloignée derrière une personne proche de la caméra.
+    Les boîtes des différents niveaux sont fusionnées (IoU).
+    """
+
+    name = 'hog'
+
+    def __init__(self, pyramid: List[Tuple[float, int]] = None):
+        super().__init__()
+        self.pyramid = pyramid or detection_pyramid()
+
+    def detect(self, frame: np.ndarray, gray: np.ndarray) -> List[Location]:
+        h, w = gray.shape[:2]
+        merged: List[Location] = []
+        for scale, upsample in self.pyramid:
+            if scale == 1.0:
+                level = gray
+            else:
+                level = cv2.resize(gray, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            # ✅ Contraste amélioré (CRITIQUE pour faible éclairage)
+            found = face_recognition.face_locations(
+                self.clahe.apply(level),
+                model='hog',
+                number_of_times_to_upsample=upsample
+            )
+            logger.log_debug(f"HOG x{scale:.2f} (upsample {upsample}): {len(found)} visage(s)")
+            for location in found:
+                candidate = scale_location(location, scale, h, w)
+                # Même visage vu à deux niveaux : la boîte du niveau le plus grossier est gardée
+                if all(box_iou(candidate, other) < 0.5 for other in merged):
+                    merged.append(candidate)
+        return merged
+
+
+class HaarDetector(FaceDetector):
+    """Cascade de Haar OpenCV (chargée une fois)"""
+
+    name = 'haar'
+
+    def __init__(self):
+        super().__init__()
+        self.cascade: Optional[cv2.CascadeClassifier] = None
+
+    def load(self) -> bool:
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        return not self.cascade.empty()
+
+    def detect(self, frame: np.ndarray, gray: np.ndarray) -> List[Location]:
+        faces = self.cascade.detectMultiScale(
+            self.clahe.apply(gray),
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=MIN_FACE_SIZE
+        )
+        # Convertir format OpenCV (x,y,w,h) vers format dlib (top,right,bottom,left)
+        return [(int(y), int(x + fw), int(y + fh), int(x)) for (x, y, fw, fh) in faces]
+
+
+class DNNDetector(FaceDetector):
+    """SSD res10 300x300 d'OpenCV DNN (CPU), fichiers modèle locaux"""
+
+    name = 'dnn'
+
+    def __init__(self, prototxt: str = DNN_PROTOTXT, caffemodel: str = DNN_CAFFEMODEL,
+                 confidence: float = DNN_CONFIDENCE):
+        super().__init__()
+        self.prototxt = prototxt
+        self.caffemodel = caffemodel
+        self.confidence = confidence
+        self.net = None
+
+    def load(self) -> bool:
+        if not (os.path.isfile(self.prototxt) and os.path.isfile(self.caffemodel)):
+            logger.log_warning(f"⚠️ Modèle DNN introuvable ({self.caffemodel})")
+            return False
+        self.net = cv2.dnn.readNetFromCaffe(self.prototxt, self.caffemodel)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return True
+
+    def detect(self, frame: np.ndarray, gray: np.ndarray) -> List[Location]:
+        h, w = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+
+        kept = detections[detections[:, 2] >= self.confidence]
+        boxes = np.clip(kept[:, 3:7], 0.0, 1.0) * np.array([w, h, w, h])
+        min_w, min_h = MIN_FACE_SIZE
+        return [
+            (int(y1), int(x2), int(y2), int(x1))
+            for x1, y1, x2, y2 in boxes
+            if x2 - x1 >= min_w and y2 - y1 >= min_h
+        ]
+
+
+DETECTORS: Dict[str, type] = {
+    'hog': HOGDetector,
+    'haar': HaarDetector,
+    'dnn': DNNDetector,
+}
+
+
+class DetectorChain:
+    """
+    Chaîne de repli de détecteurs préchargés
+
+    Chaque maillon a un budget (ms depuis le début de la frame) : un
+    détecteur de repli n'est lancé que si sa latence moyenne tient encore
+    dans son budget. Le premier détecteur est toujours lancé.
+    """
+
+    def __init__(self, chain: List[Tuple[str, float]]):
+        self.detectors: List[Tuple[FaceDetector, float]] = []
+        self.latency_ms: Dict[str, float] = {}
+        self.skipped: Dict[str, int] = {}
+        self.roi_clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(4, 4))
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.roi_latency_ms = 0.0
+
+        for name, budget_ms in chain:
+            detector_class = DETECTORS.get(name)
+            if detector_class is None:
+                logger.log_warning(f"Détecteur inconnu '{name}' ignoré")
+                continue
+            detector = detector_class()
+            try:
+                if not detector.load():
+                    continue
+            except Exception as e:
+                logger.log_error(f"❌ Erreur chargement détecteur {name}: {e}")
+                continue
+            self.detectors.append((detector, float(budget_ms)))
+            self.skipped[name] = 0
+
+        if not self.detectors:
+            logger.log_warning("Aucun détecteur chargé, repli sur HOG")
+            self.detectors = [(HOGDetector(), float('inf'))]
+            self.skipped['hog'] = 0
+
+    @classmethod
+    def from_settings(cls, model: str = FACE_DETECTION_MODEL) -> 'DetectorChain':
+        """Chaîne sélectionnée par FACE_DETECTION_MODEL"""
+        chain = DETECTOR_CHAINS.get(model)
+        if chain is None:
+            if model in DETECTORS:
+                chain = [(model, float('inf'))]
+            else:
+                logger.log_warning(f"FACE_DETECTION_MODEL '{model}' inconnu, chaîne 'hog' utilisée")
+                chain = DETECTOR_CHAINS['hog']
+        return cls(chain)
+
+    @property
+    def names(self) -> List[str]:
+        return [detector.name for detector, _ in self.detectors]
+
+    def warmup(self, width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT):
+        """Premier passage à vide (allocations, initialisation) et latence initiale"""
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        gray = np.zeros((height, width), dtype=np.uint8)
+        for detector, _ in self.detectors:
+            try:
+                detector.detect(frame, gray)  # premier appel : initialisation paresseuse
+                start = time.perf_counter()
+                detector.detect(frame, gray)
+                self.latency_ms[detector.name] = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                logger.log_warning(f"Préchauffage {detector.name} échoué: {e}")
+        logger.log_info("✅ Détecteurs prêts: " + ", ".join(
+            f"{name} ({latency:.0f} ms)" for name, latency in self.latency_ms.items()
+        ))
+
+    def detect(self, frame: np.ndarray) -> List[Location]:
+        """Premier détecteur de la chaîne qui trouve au moins un visage"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        start = time.perf_counter()
+
+        for i, (detector, budget_ms) in enumerate(self.detectors):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            expected_ms = self.latency_ms.get(detector.name, 0.0)
+            if i > 0 and elapsed_ms + expected_ms > budget_ms:
+                self.skipped[detector.name] += 1
+                logger.log_debug(f"{detector.name} ignoré (budget {budget_ms:.0f} ms dépassé)")
+                continue
+
+            before = time.perf_counter()
+            try:
+                locations = detector.detect(frame, gray)
+            except Exception as e:
+                logger.log_debug(f"{detector.name} échoué: {e}")
+                continue
+            latency = (time.perf_counter() - before) * 1000
+            self.latency_ms[detector.name] = 0.8 * self.latency_ms.get(detector.name, latency) + 0.2 * latency
+
+            if locations:
+                logger.log_debug(f"{detector.name}: {len(locations)} visage(s)")
+                return locations
+        return []
+
+    def detect_around(self, frame: np.ndarray, boxes: List[Location], margin: float = ROI_MARGIN) -> List[Location]:
+        """
+        HOG limité à une fenêtre élargie autour de boîtes connues
+
+        Chaque fenêtre est mise à l'échelle pour que le visage attendu
+        (taille de la boîte précédente) fasse ROI_TARGET_FACE_SIZE pixels :
+        réduction pour un visage proche, agrandissement pour un visage
+        lointain, au lieu d'un upsample x2 de toute la frame.
+
+        Returns:
+            Visages trouvés (coordonnées de la frame) ; liste vide = repli pleine frame
+        """
+        height, width = frame.shape[:2]
+        start = time.perf_counter()
+        found: List[Location] = []
+
+        for box in boxes:
+            top, right, bottom, left = expand_box(box, margin, height, width)
+            if bottom - top < 2 or right - left < 2:
+                continue
+            gray = cv2.cvtColor(frame[top:bottom, left:right], cv2.COLOR_BGR2GRAY)
+            scale = roi_scale(min(box[2] - box[0], box[1] - box[3]))
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            level = cv2.resize(gray, (0, 0), fx=scale, fy=scale, interpolation=interpolation)
+            for location in face_recognition.face_locations(self.roi_clahe.apply(level), model='hog',
+                                                            number_of_times_to_upsample=0):
+                t, r, b, l = scale_location(location, scale, bottom - top, right - left)
+                candidate = (t + top, r + left, b + top, l + left)
+                # Fenêtres qui se chevauchent : un même visage n'est gardé qu'une fois
+                if all(box_iou(candidate, other) < 0.5 for other in found):
+                    found.append(candidate)
+
+        latency = (time.perf_counter() - start) * 1000
+        self.roi_latency_ms = 0.8 * self.roi_latency_ms + 0.2 * latency if self.roi_latency_ms else latency
+        if found:
+            self.roi_hits += 1
+        else:
+            self.roi_misses += 1
+        return found
+
+    def get_stats(self) -> dict:
+        """Latence moyenne et sauts (budget) par détecteur, réussites de la recherche ROI"""
+        stats = {
+            name: {'latency_ms': self.latency_ms.get(name, 0.0), 'skipped': self.skipped.get(name, 0)}
+            for name in self.names
+        }
+        stats['roi'] = {'latency_ms': self.roi_latency_ms, 'hits': self.roi_hits, 'misses': self.roi_misses}
+        return stats
@@ -0,0 +1,122 @@
+"""Cache des encodings faciaux par piste de suivi"""
+import time
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Iterable, Optional
+from config.settings import (
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_MIN_IOU,
+    EMBEDDING_CACHE_MAX_SHARPNESS_CHANGE
+)
+from core.face_tracker import box_iou
+
+
+class _CacheEntry:
+    """Encoding mémorisé avec le contexte de sa capture"""
+
+    __slots__ = ('encoding', 'location', 'sharpness', 'created_at', 'refined')
+
+    def __init__(self, encoding: np.ndarray, location, sharpness: float, created_at: float):
+        self.encoding = encoding
+        self.location = location
+        self.sharpness = sharpness
+        self.created_at = created_at
+        self.refined = False  # encoding précis (2e passe) plutôt que rapide
+
+
+class EmbeddingCache:
+    """
+    Réutilise l'encoding d'un visage suivi tant que son recadrage n'a pas
+    assez changé : boîte proche (IoU), netteté comparable, âge < TTL.
+    Les entrées les plus anciennes sont évincées au-delà de max_entries.
+    """
+
+    def __init__(self, ttl: float = EMBEDDING_CACHE_TTL,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 min_iou: float = EMBEDDING_CACHE_MIN_IOU,
+                 max_sharpness_change: float = EMBEDDING_CACHE_MAX_SHARPNESS_CHANGE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_iou = min_iou
+        self.max_sharpness_change = max_sharpness_change
+        self._entries: 'OrderedDict[int, _CacheEntry]' = OrderedDict()
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def sharpness(gray: np.ndarray, location) -> float:
+        """Score de netteté (variance du laplacien) du recadrage du visage"""
+        top, right, bottom, left = location
+        crop = gray[max(0, top):max(0, bottom), max(0, left):max(0, right)]
+        if crop.size == 0:
+            return 0.0
+        return float(cv2.Laplacian(crop, cv2.CV_32F).var())
+
+    def get(self, track_id: int, location, sharpness: float, now: float = None) -> Optional[np.ndarray]:
+        """Encoding mémorisé pour cette piste, ou None s'il faut ré-encoder"""
+        now = time.monotonic() if now is None else now
+        entry = self._entries.get(track_id)
+
+        if entry is None or not self._still_valid(entry, location, sharpness, now):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(track_id)
+        self.hits += 1
+        return entry.encoding
+
+    def _still_valid(self, entry: _CacheEntry, location, sharpness: float, now: float) -> bool:
+        if now - entry.created_at > self.ttl:
+            return False
+        if box_iou(entry.location, location) < self.min_iou:
+            return False
+        reference = max(entry.sharpness, 1e-6)
+        return abs(sharpness - entry.sharpness) / reference <= self.max_sharpness_change
+
+    def put(self, track_id: int, location, sharpness: float, encoding: np.ndarray, now: float = None):
+        """Mémoriser l'encoding frais d'une piste"""
+        now = time.monotonic() if now is None else now
+        self._entries[track_id] = _CacheEntry(encoding, location, sharpness, now)
+        self._entries.move_to_end(track_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def refine(self, track_id: int, encoding: np.ndarray):
+        """Remplacer l'encoding d'une piste par sa version précise (même validité)"""
+        entry = self._entries.get(track_id)
+        if entry is not None:
+            entry.encoding = encoding
+            entry.refined = True
+
+    def is_refined(self, track_id: int) -> bool:
+        """L'encoding mémorisé de la piste vient-il déjà de la passe précise"""
+        entry = self._entries.get(track_id)
+        return entry is not None and entry.refined
+
+    def retain(self, track_ids: Iterable[int]):
+        """Oublier les pistes qui ne sont plus suivies"""
+        alive = set(track_ids)
+        for track_id in [tid for tid in self._entries if tid not in alive]:
+            del self._entries[track_id]
+            self.evictions += 1
+
+    def clear(self):
+        """Vider le cache (les compteurs sont conservés)"""
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Compteurs hit/miss du cache"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries)
+        }
@@ -0,0 +1,185 @@
+"""Contrôle qualité des visages avant l'encodage (netteté, exposition, taille, lacet)"""
+import cv2
+import numpy as np
+import face_recognition
+from typing import List, Optional, Tuple
+from config.settings import (
+    MIN_FACE_SIZE,
+    QUALITY_GATE_ENABLED,
+    QUALITY_MIN_SHARPNESS,
+    QUALITY_MIN_BRIGHTNESS,
+    QUALITY_MAX_BRIGHTNESS,
+    QUALITY_MAX_CLIPPED,
+    QUALITY_MAX_YAW
+)
+
+Location = Tuple[int, int, int, int]  # (top, right, bottom, left) comme dlib
+
+# Profondeur du nez rapportée à l'écart des yeux (modèle de tête moyen) pour estimer le lacet
+NOSE_DEPTH_RATIO = 0.6
+# Niveaux de gris considérés comme saturés (noir / blanc)
+CLIP_LOW, CLIP_HIGH = 10, 245
+
+# Consigne affichée pour chaque motif de rejet (texte OpenCV, sans accents)
+QUALITY_HINTS = {
+    'size': "Approchez-vous",
+    'exposure': "Eclairage insuffisant",
+    'sharpness': "Image floue - restez immobile",
+    'yaw': "Regardez la camera",
+}
+
+
+class FaceQuality:
+    """Mesures de qualité d'un visage et motif de rejet éventuel"""
+
+    __slots__ = ('sharpness', 'brightness', 'clipped', 'size', 'yaw', 'reason')
+
+    def __init__(self, sharpness: float, brightness: float, clipped: float, size: int):
+        self.sharpness = sharpness
+        self.brightness = brightness
+        self.clipped = clipped  # part des pixels saturés
+        self.size = size  # plus petit côté de la boîte (pixels)
+        self.yaw: Optional[float] = None  # degrés, estimé seulement si le reste passe
+        self.reason: Optional[str] = None  # None = visage exploitable
+
+    @property
+    def passed(self) -> bool:
+        return self.reason is None
+
+
+class FaceQualityGate:
+    """
+    Écarte les visages inexploitables avant l'encodage (le plus coûteux)
+
+    Netteté (variance du laplacien), exposition (luminosité moyenne et
+    part de pixels saturés) et taille sont calculées pour toutes les
+    boîtes d'un coup via des images intégrales ; le lacet (repères 5
+    points) n'est estimé que pour les visages qui passent ces contrôles.
+    Un visage rejeté n'est ni encodé ni compté comme une tentative.
+    """
+
+    def __init__(self, min_sharpness: float = QUALITY_MIN_SHARPNESS,
+                 brightness_range: Tuple[float, float] = (QUALITY_MIN_BRIGHTNESS, QUALITY_MAX_BRIGHTNESS),
+                 max_clipped: float = QUALITY_MAX_CLIPPED, max_yaw: float = QUALITY_MAX_YAW,
+                 min_size: Tuple[int, int] = MIN_FACE_SIZE, enabled: bool = QUALITY_GATE_ENABLED):
+        self.min_sharpness = min_sharpness
+        self.brightness_range = brightness_range
+        self.max_clipped = max_clipped
+        self.max_yaw = max_yaw
+        self.min_size = min(min_size)
+        self.enabled = enabled
+
+        # Compteurs
+        self.assessed = 0
+        self.rejected = {'size': 0, 'exposure': 0, 'sharpness': 0, 'yaw': 0}
+
+    @staticmethod
+    def _box_sums(integral: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """Somme d'une image sur chaque boîte (top, right, bottom, left) à partir de son intégrale"""
+        top, right, bottom, left = boxes.T
+        return integral[bottom, right] - integral[top, right] - integral[bottom, left] + integral[top, left]
+
+    def assess(self, frame: np.ndarray, locations: List[Location]) -> List[FaceQuality]:
+        """Mesurer la qualité de chaque visage localisé (frame BGR)"""
+        if len(locations) == 0:
+            return []
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        boxes = np.array(locations, dtype=np.int64).reshape(-1, 4)
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, height)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, width)
+        areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 1] - boxes[:, 3]), 1).astype(np.float64)
+        sizes = np.minimum(boxes[:, 2] - boxes[:, 0], boxes[:, 1] - boxes[:, 3])
+
+        # Une seule passe sur la zone couvrant tous les visages
+        top, left = boxes[:, 0].min(), boxes[:, 3].min()
+        bottom, right = boxes[:, 2].max(), boxes[:, 1].max()
+        region = gray[top:bottom, left:right]
+        local = boxes - np.array([top, left, top, left])
+
+        laplacian = cv2.Laplacian(region, cv2.CV_64F)
+        lap_sum, lap_sq = cv2.integral2(laplacian)
+        gray_sum = cv2.integral(region)
+        clipped_sum = cv2.integral(((region <= CLIP_LOW) | (region >= CLIP_HIGH)).astype(np.uint8))
+
+        lap_mean = self._box_sums(lap_sum, local) / areas
+        sharpness = self._box_sums(lap_sq, local) / areas - lap_mean ** 2
+        brightness = self._box_sums(gray_sum, local) / areas
+        clipped = self._box_sums(clipped_sum, local) / areas
+
+        reports = [
+            FaceQuality(float(s), float(b), float(c), int(z))
+            for s, b, c, z in zip(sharpness, brightness, clipped, sizes)
+        ]
+        low, high = self.brightness_range
+        for report in reports:
+            if report.size < self.min_size:
+                report.reason = 'size'
+            elif not low <= report.brightness <= high or report.clipped > self.max_clipped:
+                report.reason = 'exposure'
+            elif report.sharpness < self.min_sharpness:
+                report.reason = 'sharpness'
+
+        candidates = [i for i, report in enumerate(reports) if report.passed]
+        if candidates:
+            for i, yaw in zip(candidates, self._estimate_yaw(gray, [locations[i] for i in candidates])):
+                reports[i].yaw = yaw
+                if yaw is not None and abs(yaw) > self.max_yaw:
+                    reports[i].reason = 'yaw'
+
+        self.assessed += len(reports)
+        for report in reports:
+            if report.reason is not None:
+                self.rejected[report.reason] += 1
+        return reports
+
+    @staticmethod
+    def _estimate_yaw(gray: np.ndarray, locations: List[Location]) -> List[Optional[float]]:
+        """
+        Lacet approximatif (degrés) depuis les repères 5 points
+
+        Décalage horizontal du nez par rapport au milieu des yeux, rapporté
+        à l'écart des yeux : ~0 de face, croît vers le profil.
+        """
+        try:
+            landmarks = face_recognition.face_landmarks(gray, locations, model='small')
+        except Exception:
+            return [None] * len(locations)
+
+        yaws = []
+        for points in landmarks:
+            eyes = np.array(points['left_eye'] + points['right_eye'], dtype=np.float64)
+            left_eye = eyes[:2].mean(axis=0)
+            right_eye = eyes[2:].mean(axis=0)
+            eye_distance = np.linalg.norm(left_eye - right_eye)
+            if eye_distance < 1e-6:
+                yaws.append(None)
+                continue
+            offset = (points['nose_tip'][0][0] - (left_eye[0] + right_eye[0]) / 2) / eye_distance
+            yaws.append(float(np.degrees(np.arctan(offset / NOSE_DEPTH_RATIO))))
+        return yaws
+
+    def filter(self, frame: np.ndarray, tracks: List) -> Tuple[List, List[Tuple[object, FaceQuality]]]:
+        """
+        Séparer les pistes exploitables des autres
+
+        Returns:
+            Tuple (pistes retenues, [(piste rejetée, mesures)])
+        """
+        if not self.enabled or len(tracks) == 0:
+            return tracks, []
+        reports = self.assess(frame, [track.location for track in tracks])
+        kept = [track for track, report in zip(tracks, reports) if report.passed]
+        rejected = [(track, report) for track, report in zip(tracks, reports) if not report.passed]
+        return kept, rejected
+
+    def get_stats(self) -> dict:
+        """Visages examinés et rejets par motif"""
+        rejected = sum(self.rejected.values())
+        return {
+            'assessed': self.assessed,
+            'rejected': rejected,
+            'reject_rate': rejected / self.assessed if self.assessed else 0.0,
+            'by_reason': dict(self.rejected)
+        }
@@ -2,10 +2,45 @@
 import face_recognition
 import numpy as np
 import cv2
-from typing import List, Tuple, Optional
-from config.settings import FACE_RECOGNITION_TOLERANCE, SIMILARITY_THRESHOLD
+import time
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterable, List, Tuple, Optional
+from config.settings import (
+    FACE_RECOGNITION_TOLERANCE,
+    SIMILARITY_THRESHOLD,
+    GROUP_ACCESS_POLICY,
+    ANN_INDEX_BACKEND,
+    ANN_MIN_GALLERY_SIZE,
+    ANN_NLIST,
+    ANN_NPROBE,
+    EMBEDDING_CACHE_ENABLED,
+    RECOGNITION_WORKERS,
+    GALLERY_SNAPSHOT_DIR,
+    GALLERY_WATERMARK_OVERLAP,
+    TEMPLATE_AGGREGATION,
+    TEMPLATE_TOP_K,
+    GALLERY_QUANTIZATION,
+    GALLERY_RERANK,
+    GALLERY_FLOAT32_DIR,
+    GALLERY_COMPACT_RATIO,
+    ENCODING_MODEL,
+    ENCODING_JITTERS,
+    FRAME_ENCODING_MODEL,
+    TWO_STAGE_ENABLED,
+    TWO_STAGE_BAND,
+    TWO_STAGE_MODEL,
+    TWO_STAGE_JITTERS,
+    ROI_DETECTION_ENABLED,
+    ROI_MARGIN
+)
 from utils.logger import Logger
 from utils.encryption import EncryptionManager
+from core.gallery import FaceGallery
+from core.gallery_snapshot import load_snapshot, save_snapshot
+from core.ann_index import create_index
+from core.detection import DetectorChain, expand_box
 
 logger = Logger()
 
@@ -14,164 +49,541 @@ class FaceRecognitionEngine:
     """Moteur optimisé pour performances ET fiabilité"""
 
     def __init__(self):
-        self.known_encodings = []
-        self.known_names = []
-        self.known_ids = []
-        self.known_passwords = []
+        self.gallery = FaceGallery(
+            index=create_index(ANN_INDEX_BACKEND, n_lists=ANN_NLIST, n_probe=ANN_NPROBE),
+            min_index_size=ANN_MIN_GALLERY_SIZE,
+            aggregation=TEMPLATE_AGGREGATION,
+            top_k=TEMPLATE_TOP_K,
+            quantization=GALLERY_QUANTIZATION,
+            rerank=GALLERY_RERANK,
+            float32_dir=GALLERY_FLOAT32_DIR,
+            compact_ratio=GALLERY_COMPACT_RATIO
+        )
         self.frame_skip_counter = 0
-        logger.log_info("✅ Moteur optimisé initialisé")
-
-    def load_profile(self, personne_id: int, username: str, embedding: str, password: str = None):
-        """Charger un profil"""
+        self.worker_pool = None
+        self.gallery_listener = None
+        self.remote = None  # PgVectorRecognizer si RECOGNITION_BACKEND = 'pgvector'
+        # Copie sur écriture : les écrivains modifient self.gallery sous verrou puis
+        # publient une copie figée ; les recherches lisent gallery_view sans verrou
+        self.gallery_lock = threading.RLock()
+        self.gallery_view = self.gallery.freeze()
+        self._batch_depth = 0  # publication différée à la fin de batch_update
+        self.gallery_watermark = None  # face_profiles.updated_at déjà appliqué à la galerie
+        # Reconnaissance en deux temps : visages examinés, ré-encodés, décision changée
+        self.two_stage_stats = {'faces': 0, 'stage2': 0, 'changed': 0, 'stage2_ms': 0.0}
+
+        # Détecteurs chargés et préchauffés une seule fois (FACE_DETECTION_MODEL)
+        self.detectors = DetectorChain.from_settings()
+        self.detectors.warmup()
+        logger.log_info(f"✅ Moteur optimisé initialisé (détection: {' > '.join(self.detectors.names)})")
+
+    def load_profile(self, personne_id: int, username: str, embedding, password: str = None,
+                     template_id: int = 0):
+        """Charger un profil (embedding encodé en base ou déjà en numpy ; template_id = profile_id)"""
         try:
-            encoding = EncryptionManager.decode_embedding(embedding)
-            self.known_encodings.append(encoding)
-            self.known_names.append(username)
-            self.known_ids.append(personne_id)
-            self.known_passwords.append(password)
+            if isinstance(embedding, np.ndarray):
+                encoding = embedding
+            else:
+                encoding = EncryptionManager.decode_embedding(embedding)
+            with self.gallery_lock:
+                self.gallery.add(personne_id, username, encoding, password, template_id)
+                self.publish_gallery()
             logger.log_info(f"✅ Profil chargé: {username}")
         except Exception as e:
             logger.log_error(f"❌ Erreur chargement profil: {e}")
 
-    def detect_faces(self, frame: np.ndarray) -> Tuple[List, List]:
-        """Détecter les visages - VERSION ULTRA-ROBUSTE"""
-        try:
-            # ✅ NE PAS SKIP DE FRAMES pour maximiser la détection
-            h, w, c = frame.shape
+    def publish_gallery(self):
+        """Publier une copie figée de la galerie aux recherches (remplacement atomique)"""
+        with self.gallery_lock:
+            if not self._batch_depth:
+                self.gallery_view = self.gallery.freeze()
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Regrouper plusieurs modifications (load_profile, remove_profile...)
+        sous le verrou : une seule publication à la sortie
+        """
+        with self.gallery_lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                self.publish_gallery()
+
+    def _add_rows(self, rows: List[Tuple]) -> int:
+        """Décoder un bloc (personne_id, username, password, embedding[, profile_id]) et l'ajouter"""
+        matrix = EncryptionManager.decode_embeddings([row[3] for row in rows])
+        with self.gallery_lock:
+            return self.gallery.add_many(
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                matrix,
+                [row[2] for row in rows],
+                [row[4] if len(row) > 4 else 0 for row in rows]
+            )
 
-            # ✅ AMÉLIORER LE CONTRASTE avant détection (CRITIQUE pour faible éclairage)
-            lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-            l = clahe.apply(l)
-            enhanced_frame = cv2.merge([l, a, b])
-            enhanced_frame = cv2.cvtColor(enhanced_frame, cv2.COLOR_LAB2BGR)
+    def load_gallery(self, chunks: Iterable[List[Tuple]], expected: int = 0) -> int:
+        """
+        Charger la galerie bloc par bloc (lignes personne_id, username, password, embedding)
 
-            # ✅ TENTATIVE 1 : Détection sur frame ORIGINALE (sans réduction)
-            rgb_full = cv2.cvtColor(enhanced_frame, cv2.COLOR_BGR2RGB)
+        Chaque bloc est décodé en une passe vectorisée puis copié dans les
+        tableaux préalloués de la galerie ; un seul log récapitulatif.
+        """
+        start = time.perf_counter()
+        if expected:
+            with self.gallery_lock:
+                self.gallery.reserve(len(self.gallery) + expected)
 
-            face_locations = []
+        loaded = 0
+        for rows in chunks:
             try:
-                face_locations = face_recognition.face_locations(
-                    rgb_full,
-                    model='hog',
-                    number_of_times_to_upsample=2  # ← AUGMENTÉ à 2 pour meilleure détection
-                )
-                logger.log_debug(f"Tentative 1 (full): {len(face_locations)} visage(s)")
+                loaded += self._add_rows(rows)
             except Exception as e:
-                logger.log_debug(f"Tentative 1 échouée: {e}")
-
-            # ✅ TENTATIVE 2 : Si échec, essayer avec réduction légère (85%)
-            if len(face_locations) == 0:
-                try:
-                    small_frame = cv2.resize(rgb_full, (0, 0), fx=0.85, fy=0.85)
-                    face_locations_small = face_recognition.face_locations(
-                        small_frame,
-                        model='hog',
-                        number_of_times_to_upsample=2
-                    )
-
-                    # Rescale les positions
-                    scale_factor = 1 / 0.85
-                    face_locations = [
-                        (int(top * scale_factor),
-                         int(right * scale_factor),
-                         int(bottom * scale_factor),
-                         int(left * scale_factor))
-                        for (top, right, bottom, left) in face_locations_small
-                    ]
-                    logger.log_debug(f"Tentative 2 (85%): {len(face_locations)} visage(s)")
-                except Exception as e:
-                    logger.log_debug(f"Tentative 2 échouée: {e}")
-
-            # ✅ TENTATIVE 3 : Utiliser OpenCV Haar Cascade en dernier recours
-            if len(face_locations) == 0:
-                try:
-                    gray = cv2.cvtColor(enhanced_frame, cv2.COLOR_BGR2GRAY)
-                    face_cascade = cv2.CascadeClassifier(
-                        cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-                    )
-                    faces = face_cascade.detectMultiScale(
-                        gray,
-                        scaleFactor=1.1,
-                        minNeighbors=5,
-                        minSize=(60, 60)
-                    )
-
-                    # Convertir format OpenCV (x,y,w,h) vers format dlib (top,right,bottom,left)
-                    face_locations = [
-                        (y, x + w, y + h, x)
-                        for (x, y, w, h) in faces
-                    ]
-                    logger.log_debug(f"Tentative 3 (Haar): {len(face_locations)} visage(s)")
-                except Exception as e:
-                    logger.log_debug(f"Tentative 3 échouée: {e}")
-
-            # Aucun visage trouvé
+                logger.log_error(f"❌ Erreur chargement d'un bloc de profils: {e}")
+        self.publish_gallery()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        megabytes = len(self.gallery) * self.gallery.dim * 4 / (1024 * 1024)
+        logger.log_info(
+            f"✅ Galerie chargée: {len(self.gallery)} profil(s) en {elapsed_ms:.0f} ms ({megabytes:.1f} Mo)"
+        )
+        return loaded
+
+    def sync_gallery(self, profile_service) -> Tuple[int, int]:
+        """
+        Rattraper les modifications faites en base depuis gallery_watermark
+
+        Seuls les profils modifiés depuis le watermark (moins
+        GALLERY_WATERMARK_OVERLAP, pour les transactions validées après
+        la lecture du watermark) ou réactivés sont lus et décodés ; les profils désactivés ou supprimés sont retirés,
+        noms et mots de passe sont relus sans les embeddings. Les lectures
+        se font hors verrou, seule l'application le prend.
+
+        Returns:
+            (profils ajoutés ou mis à jour, profils retirés)
+        """
+        if self.gallery_watermark is None:
+            self.gallery_watermark = profile_service.gallery_watermark()
+            return 0, 0
+
+        watermark = profile_service.gallery_watermark()
+        credentials = profile_service.gallery_credentials()
+        known = self.gallery_view
+        missing = [row[0] for row in credentials if row[0] not in known]
+        since = self.gallery_watermark - timedelta(seconds=GALLERY_WATERMARK_OVERLAP)
+        chunks = list(profile_service.iter_gallery(since=since, personne_ids=missing))
+
+        with self.gallery_lock:
+            updated = sum(self._add_rows(rows) for rows in chunks)
+            removed = self.gallery.sync_credentials(credentials)
+            self.publish_gallery()
+        self.gallery_watermark = watermark
+        return updated, removed
+
+    def refresh_profiles(self, profile_service, personne_ids: List[int]) -> Tuple[int, int]:
+        """
+        Relire quelques personnes (notification de la base) et appliquer
+
+        Les modèles de ces personnes sont remplacés par ceux lus en base :
+        une personne sans profil actif disparaît de la galerie.
+
+        Returns:
+            (profils ajoutés ou mis à jour, personnes retirées)
+        """
+        chunks = list(profile_service.iter_gallery(personne_ids=personne_ids))
+        found = {row[0] for rows in chunks for row in rows}
+
+        with self.gallery_lock:
+            removed = 0
+            for personne_id in personne_ids:
+                if self.gallery.remove(personne_id) and personne_id not in found:
+                    removed += 1
+            updated = sum(self._add_rows(rows) for rows in chunks)
+            self.publish_gallery()
+        return updated, removed
+
+    def warm_start(self, profile_service, directory: str = GALLERY_SNAPSHOT_DIR) -> int:
+        """
+        Charger la galerie depuis l'instantané disque puis la mettre à jour
+
+        Sans instantané valide, chargement complet. L'instantané est réécrit
+        s'il a changé.
+
+        Returns:
+            Nombre de profils en galerie
+        """
+        start = time.perf_counter()
+        snapshot = load_snapshot(directory, self.gallery.dim, self.gallery.index, self.gallery.min_index_size,
+                                 **self.gallery.options())
+
+        if snapshot is None:
+            self.gallery_watermark = profile_service.gallery_watermark()
+            self.load_gallery(profile_service.iter_gallery(), profile_service.count_gallery())
+            save_snapshot(self.gallery, directory, self.gallery_watermark)
+            return len(self.gallery)
+
+        self.gallery, since = snapshot
+        self.publish_gallery()
+        self.gallery_watermark = since
+        version = self.gallery.version
+        updated, removed = self.sync_gallery(profile_service)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.log_info(
+            f"✅ Démarrage à chaud: {len(self.gallery)} profil(s) en {elapsed_ms:.0f} ms "
+            f"({updated} mis à jour, {removed} retiré(s))"
+        )
+        if self.gallery.version != version or self.gallery_watermark != since:
+            save_snapshot(self.gallery, directory, self.gallery_watermark)
+        return len(self.gallery)
+
+    def remove_profile(self, personne_id: int) -> bool:
+        """Retirer un profil de la galerie (l'index est mis à jour incrémentalement)"""
+        with self.gallery_lock:
+            removed = self.gallery.remove(personne_id)
+            if removed:
+                self.publish_gallery()
+        if removed:
+            logger.log_info(f"✅ Profil retiré: {personne_id}")
+        return removed
+
+    def use_pgvector(self, db) -> bool:
+        """Déléguer la reconnaissance à PostgreSQL/pgvector (pas de galerie en RAM)"""
+        from core.pgvector_backend import PgVectorRecognizer
+
+        remote = PgVectorRecognizer(db, dim=self.gallery.dim)
+        if not remote.ensure_schema():
+            logger.log_warning("pgvector indisponible, galerie en mémoire utilisée")
+            return False
+        self.remote = remote
+        logger.log_info(f"✅ Reconnaissance pgvector: {remote.count()} profil(s) indexé(s)")
+        return True
+
+    def rebuild_index(self):
+        """Ré-entraîner l'index ANN sur la galerie déjà en mémoire"""
+        with self.gallery_lock:
+            self.gallery.rebuild_index()
+            self.publish_gallery()
+
+    def locate_faces(self, frame: np.ndarray, around: List = None) -> List[Tuple[int, int, int, int]]:
+        """
+        Localiser les visages (sans encodage) via la chaîne de détecteurs
+
+        Args:
+            frame: Frame BGR
+            around: Dernières boîtes connues ; la recherche commence dans une
+                fenêtre élargie autour d'elles, pleine frame seulement si rien n'y est trouvé
+        """
+        try:
+            face_locations = []
+            if around and ROI_DETECTION_ENABLED:
+                face_locations = self.detectors.detect_around(frame, around)
             if len(face_locations) == 0:
-                return [], []
+                face_locations = self.detectors.detect(frame)
+            if len(face_locations) > 0:
+                logger.log_info(f"✅ {len(face_locations)} visage(s) détecté(s)")
+            return face_locations
 
-            logger.log_info(f"✅ {len(face_locations)} visage(s) détecté(s)")
+        except Exception as e:
+            logger.log_error(f"❌ Erreur générale détection: {e}")
+            import traceback
+            logger.log_error(traceback.format_exc())
+            return []
 
-            # ✅ ENCODER sur frame originale (non modifiée pour précision)
-            try:
-                rgb_original = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                face_encodings = face_recognition.face_encodings(
-                    rgb_original,
-                    face_locations,
-                    num_jitters=1,
-                    model='large'
-                )
+    def roi_around(self, location: Tuple[int, int, int, int], frame_shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """Fenêtre de recherche (ROI) élargie autour d'une boîte, comme pour locate_faces"""
+        return expand_box(location, ROI_MARGIN, frame_shape[0], frame_shape[1])
 
-                return face_locations, face_encodings
+    def encode_faces(self, frame: np.ndarray, face_locations: List, num_jitters: int = ENCODING_JITTERS,
+                     model: str = ENCODING_MODEL) -> List[np.ndarray]:
+        """Encoder des visages déjà localisés (ENCODING_MODEL, celui des modèles enregistrés)"""
+        if len(face_locations) == 0:
+            return []
 
-            except Exception as e:
-                logger.log_error(f"❌ Erreur encodage: {e}")
-                return face_locations, []
+        # ✅ ENCODER sur frame originale (non modifiée pour précision)
+        try:
+            rgb_original = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            return face_recognition.face_encodings(
+                rgb_original,
+                face_locations,
+                num_jitters=num_jitters,
+                model=model
+            )
 
         except Exception as e:
-            logger.log_error(f"❌ Erreur générale détection: {e}")
-            import traceback
-            logger.log_error(traceback.format_exc())
+            logger.log_error(f"❌ Erreur encodage: {e}")
+            return []
+
+    def encode_probes(self, frame: np.ndarray, face_locations: List) -> List[np.ndarray]:
+        """Encoder les visages d'une frame à identifier (FRAME_ENCODING_MODEL, voir recognize_faces_two_stage)"""
+        return self.encode_faces(frame, face_locations, model=FRAME_ENCODING_MODEL)
+
+    def encode_tracked_faces(self, frame: np.ndarray, tracks: List, cache=None) -> List[np.ndarray]:
+        """
+        Encoder des visages suivis en réutilisant le cache par piste
+
+        Args:
+            frame: Frame BGR
+            tracks: Pistes FaceTracker (track_id, location)
+            cache: EmbeddingCache (None = encodage systématique)
+
+        Returns:
+            Un encoding par piste, ou liste vide si l'encodage a échoué
+        """
+        if cache is None or not EMBEDDING_CACHE_ENABLED:
+            return self.encode_probes(frame, [track.location for track in tracks])
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        encodings = [None] * len(tracks)
+        misses = []
+
+        for i, track in enumerate(tracks):
+            sharpness = cache.sharpness(gray, track.location)
+            encoding = cache.get(track.track_id, track.location, sharpness)
+            if encoding is None:
+                misses.append((i, sharpness))
+            else:
+                encodings[i] = encoding
+
+        if misses:
+            fresh = self.encode_probes(frame, [tracks[i].location for i, _ in misses])
+            if len(fresh) != len(misses):
+                return []
+            for (i, sharpness), encoding in zip(misses, fresh):
+                encodings[i] = encoding
+                cache.put(tracks[i].track_id, tracks[i].location, sharpness, encoding)
+
+        cache.retain(track.track_id for track in tracks)
+        return encodings
+
+    def detect_faces(self, frame: np.ndarray, around: List = None) -> Tuple[List, List]:
+        """Détecter (autour de around d'abord, voir locate_faces) et encoder les visages d'une frame"""
+        face_locations = self.locate_faces(frame, around=around)
+        if len(face_locations) == 0:
             return [], []
+        return face_locations, self.encode_probes(frame, face_locations)
+
+    @staticmethod
+    def admits_group(results: List[Tuple], policy: str = GROUP_ACCESS_POLICY) -> bool:
+        """
+        Décision d'accès pour tous les visages d'une frame
+
+        Args:
+            results: (personne_id, ...) par visage, personne_id None = inconnu
+            policy: 'all' (un inconnu présent = refus) ou 'any'
+
+        Returns:
+            True si le groupe peut entrer
+        """
+        known = sum(1 for result in results if result[0])
+        if known == 0:
+            return False
+        return policy == 'any' or known == len(results)
+
+    @staticmethod
+    def _accepts(distance: float) -> bool:
+        """La distance passe-t-elle les deux seuils de reconnaissance"""
+        return distance <= FACE_RECOGNITION_TOLERANCE and 1 - distance >= SIMILARITY_THRESHOLD
+
+    def _resolve_identity(self, identity: Optional[Tuple], distance: float,
+                          margin: float) -> Tuple[Optional[int], Optional[str], Optional[str], float]:
+        """Appliquer les seuils à la meilleure identité (personne_id, username, password) d'une recherche"""
+        similarity_score = 1 - distance
+
+        if identity is not None and self._accepts(distance):
+            personne_id, username, password = identity
+            logger.log_info(f"✅ RECONNU: {username} (similarité: {similarity_score:.2%}, marge: {margin:.3f})")
+            return personne_id, username, password, similarity_score
+
+        logger.log_debug(f"Visage détecté mais non reconnu (meilleur score: {similarity_score:.2%})")
+        return None, None, None, 0.0
+
+    def _resolve_match(self, gallery: FaceGallery, row: int, distance: float,
+                       margin: float) -> Tuple[Optional[int], Optional[str], Optional[str], float]:
+        """Appliquer les seuils au meilleur candidat d'une recherche (sur la galerie interrogée)"""
+        return self._resolve_identity(gallery.entry(row) if row >= 0 else None, distance, margin)
+
+    def _resolve_remote(self, match: Optional[Tuple]) -> Tuple[Optional[int], Optional[str], Optional[str], float]:
+        """Appliquer les seuils au résultat pgvector ((personne_id, username, password), distance, marge)"""
+        if match is None:
+            return None, None, None, 0.0
+        return self._resolve_identity(*match)
 
     def recognize_face(self, face_encoding: np.ndarray) -> Tuple[Optional[int], Optional[str], Optional[str], float]:
-        """Reconnaître un visage"""
-        if len(self.known_encodings) == 0:
+        """Reconnaître un visage (une seule passe vectorisée sur la galerie)"""
+        if self.remote is not None:
+            return self._resolve_remote(self.remote.match(face_encoding))
+        gallery = self.gallery_view
+        if len(gallery) == 0:
             return None, None, None, 0.0
 
         try:
-            # Comparer avec tolérance
-            matches = face_recognition.compare_faces(
-                self.known_encodings,
-                face_encoding,
-                tolerance=FACE_RECOGNITION_TOLERANCE
-            )
+            return self._resolve_match(gallery, *gallery.match(face_encoding))
 
-            face_distances = face_recognition.face_distance(
-                self.known_encodings,
-                face_encoding
-            )
+        except Exception as e:
+            logger.log_error(f"❌ Erreur reconnaissance: {e}")
+            return None, None, None, 0.0
 
-            if True in matches:
-                best_match_index = np.argmin(face_distances)
+    def recognize_faces_batch(self, face_encodings: List[np.ndarray]) -> List[Tuple[Optional[int], Optional[str], Optional[str], float]]:
+        """Reconnaître tous les visages d'une frame en un seul produit matriciel"""
+        unknown = (None, None, None, 0.0)
+        if len(face_encodings) == 0:
+            return []
+        if self.remote is not None:
+            return [self._resolve_remote(match) for match in self.remote.match_batch(face_encodings)]
+        gallery = self.gallery_view
+        if len(gallery) == 0:
+            return [unknown] * len(face_encodings)
 
-                if matches[best_match_index]:
-                    personne_id = self.known_ids[best_match_index]
-                    username = self.known_names[best_match_index]
-                    password = self.known_passwords[best_match_index]
-                    similarity_score = 1 - face_distances[best_match_index]
+        try:
+            rows, distances, margins = gallery.match_batch(np.asarray(face_encodings))
+            return [
+                self._resolve_match(gallery, int(row), float(distance), float(margin))
+                for row, distance, margin in zip(rows, distances, margins)
+            ]
 
-                    if similarity_score >= SIMILARITY_THRESHOLD:
-                        logger.log_info(f"✅ RECONNU: {username} (similarité: {similarity_score:.2%})")
-                        return personne_id, username, password, similarity_score
+        except Exception as e:
+            logger.log_error(f"❌ Erreur reconnaissance batch: {e}")
+            return [unknown] * len(face_encodings)
+
+    def recognize_faces_two_stage(self, frame: np.ndarray, face_locations: List, face_encodings: List[np.ndarray],
+                                  tracks: List = None, cache=None) -> Tuple[List[np.ndarray], List[Tuple]]:
+        """
+        Reconnaître en deux temps : encodings rapides, ré-encodage précis dans la zone grise
+
+        Seuls les visages dont la meilleure distance est à TWO_STAGE_BAND
+        près du seuil de décision sont ré-encodés (TWO_STAGE_MODEL,
+        TWO_STAGE_JITTERS) puis recherchés à nouveau. Avec un cache par
+        piste, l'encoding précis y remplace le rapide : une piste n'est pas
+        ré-encodée à chaque frame tant que son entrée reste valide.
+
+        Returns:
+            Tuple (encodings, résultats) ; les encodings précis remplacent les rapides
+        """
+        unknown = (None, None, None, 0.0)
+        if not TWO_STAGE_ENABLED or self.remote is not None or len(face_encodings) == 0:
+            return face_encodings, self.recognize_faces_batch(face_encodings)
+        gallery = self.gallery_view
+        if len(gallery) == 0:
+            return face_encodings, [unknown] * len(face_encodings)
 
-            logger.log_debug(f"Visage détecté mais non reconnu (meilleur score: {1 - min(face_distances):.2%})")
-            return None, None, None, 0.0
+        try:
+            rows, distances, margins = gallery.match_batch(np.asarray(face_encodings))
+            decision = min(FACE_RECOGNITION_TOLERANCE, 1 - SIMILARITY_THRESHOLD)
+            grey = [
+                i for i, distance in enumerate(distances)
+                if abs(distance - decision) <= TWO_STAGE_BAND
+                and not (cache is not None and tracks and cache.is_refined(tracks[i].track_id))
+            ]
+            self.two_stage_stats['faces'] += len(face_encodings)
+
+            encodings = list(face_encodings)
+            if grey:
+                start = time.perf_counter()
+                precise = self.encode_faces(frame, [face_locations[i] for i in grey],
+                                            num_jitters=TWO_STAGE_JITTERS, model=TWO_STAGE_MODEL)
+                self.two_stage_stats['stage2_ms'] += (time.perf_counter() - start) * 1000
+                if len(precise) == len(grey):
+                    self.two_stage_stats['stage2'] += len(grey)
+                    new_rows, new_distances, new_margins = gallery.match_batch(np.asarray(precise))
+                    for k, i in enumerate(grey):
+                        if (self._accepts(new_distances[k]) != self._accepts(distances[i])
+                                or (self._accepts(new_distances[k]) and new_rows[k] != rows[i])):
+                            self.two_stage_stats['changed'] += 1
+                        rows[i], distances[i], margins[i] = new_rows[k], new_distances[k], new_margins[k]
+                        encodings[i] = precise[k]
+                        if cache is not None and tracks:
+                            cache.refine(tracks[i].track_id, precise[k])
+
+            return encodings, [
+                self._resolve_match(gallery, int(row), float(distance), float(margin))
+                for row, distance, margin in zip(rows, distances, margins)
+            ]
 
         except Exception as e:
-            logger.log_error(f"❌ Erreur reconnaissance: {e}")
-            return None, None, None, 0.0
+            logger.log_error(f"❌ Erreur reconnaissance en deux temps: {e}")
+            return face_encodings, [unknown] * len(face_encodings)
+
+    def get_two_stage_stats(self) -> dict:
+        """Fréquence et coût de la 2e passe (ré-encodage précis)"""
+        stats = dict(self.two_stage_stats)
+        stats['stage2_rate'] = stats['stage2'] / stats['faces'] if stats['faces'] else 0.0
+        stats['stage2_avg_ms'] = stats['stage2_ms'] / stats['stage2'] if stats['stage2'] else 0.0
+        return stats
+
+    def start_worker_pool(self, n_workers: int = RECOGNITION_WORKERS):
+        """Lancer le pool de processus (détection + encodage sur tous les cœurs ; 0 = pas de pool)"""
+        from core.worker_pool import RecognitionWorkerPool
+
+        if self.worker_pool is None:
+            if n_workers is not None and n_workers < 1:
+                return None
+            self.worker_pool = RecognitionWorkerPool(n_workers)
+            self.worker_pool.start()
+        return self.worker_pool
+
+    def stop_worker_pool(self):
+        """Arrêter le pool de processus"""
+        if self.worker_pool is not None:
+            self.worker_pool.stop()
+            self.worker_pool = None
+
+    def start_gallery_listener(self):
+        """Appliquer en continu les changements de profils faits par d'autres postes"""
+        from core.gallery_listener import GalleryListener
+
+        if self.gallery_listener is None:
+            self.gallery_listener = GalleryListener(self)
+            self.gallery_listener.start()
+        return self.gallery_listener
+
+    def stop_gallery_listener(self):
+        """Arrêter l'écoute des changements de profils"""
+        if self.gallery_listener is not None:
+            self.gallery_listener.stop()
+            self.gallery_listener = None
+
+    def submit_frame(self, frame: np.ndarray) -> int:
+        """
+        Confier une frame au pool de processus
+
+        La galerie partagée est republiée si elle a changé depuis l'envoi précédent.
+        """
+        pool = self.worker_pool or self.start_worker_pool()
+        if pool is None:
+            raise RuntimeError("Pool de processus désactivé (RECOGNITION_WORKERS = 0)")
+        gallery = self.gallery_view
+        if pool.gallery_version != gallery.version:
+            pool.publish_gallery(gallery)
+        return pool.submit(frame)
+
+    def collect_frame(self, timeout: float = None) -> Optional[Tuple[int, List, List, List]]:
+        """
+        Résultat suivant du pool, dans l'ordre de soumission
+
+        Returns:
+            Tuple (tâche, locations, encodings, résultats de reconnaissance) ou None
+        """
+        if self.worker_pool is None:
+            return None
+        result = self.worker_pool.get(timeout)
+        if result is None:
+            return None
+
+        gallery = self.gallery_view
+        if result.matches is not None and result.gallery_version == gallery.version:
+            # Les processus ne reçoivent que les lignes non retirées
+            live = gallery.live_rows()
+            recognized = [
+                self._resolve_match(gallery, int(live[row]) if row >= 0 else -1, float(distance), float(margin))
+                for row, distance, margin in zip(*result.matches)
+            ]
+        else:
+            # Galerie modifiée pendant le traitement : recherche locale
+            recognized = self.recognize_faces_batch(result.encodings)
+        return result.task_id, result.locations, result.encodings, recognized
 
     def create_encoding(self, image: np.ndarray) -> Optional[np.ndarray]:
         """Créer un encoding à partir d'une image"""
@@ -207,17 +619,24 @@ class FaceRecognitionEngine:
 
     def clear_profiles(self):
         """Effacer tous les profils chargés"""
-        self.known_encodings = []
-        self.known_names = []
-        self.known_ids = []
-        self.known_passwords = []
+        with self.gallery_lock:
+            self.gallery.clear()
+            self.publish_gallery()
         self.frame_skip_counter = 0
         logger.log_info("✅ Profils effacés")
 
     def get_loaded_profiles_count(self) -> int:
         """Obtenir le nombre de profils chargés"""
-        return len(self.known_encodings)
+        if self.remote is not None:
+            return self.remote.count()
+        return self.gallery_view.people_count
 
     def is_profile_loaded(self, personne_id: int) -> bool:
         """Vérifier si un profil est chargé"""
-        return personne_id in self.known_ids
\ No newline at end of file
+        return personne_id in self.gallery_view
+
+    def get_loaded_credentials(self) -> List[Tuple[int, str, Optional[str]]]:
+        """Obtenir (personne_id, username, password) des profils chargés"""
+        if self.remote is not None:
+            return self.remote.credentials()
+        return self.gallery_view.credentials()
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""Suivi des visages entre deux détections complètes (flux optique)"""
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+from config.settings import (
+    TRACKING_ENABLED,
+    TRACKER_REDETECT_INTERVAL,
+    TRACKER_MIN_POINTS,
+    TRACKER_MAX_FB_ERROR,
+    TRACKER_MAX_SCALE_CHANGE,
+    TRACKER_IOU_MATCH,
+    ROI_DETECTION_ENABLED,
+    ROI_FULL_SCAN_INTERVAL
+)
+from utils.logger import Logger
+
+logger = Logger()
+
+Location = Tuple[int, int, int, int]  # (top, right, bottom, left) comme dlib
+
+
+def box_iou(a: Location, b: Location) -> float:
+    """Intersection sur union de deux boîtes (top, right, bottom, left)"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTrack:
+    """Un visage suivi d'une frame à l'autre"""
+
+    def __init__(self, track_id: int, location: Location):
+        self.track_id = track_id
+        self.location = location
+        self.points: Optional[np.ndarray] = None  # points caractéristiques (N, 1, 2)
+        self.lost = False
+
+    def __repr__(self):
+        return f"<FaceTrack(id={self.track_id}, location={self.location})>"
+
+
+class FaceTracker:
+    """
+    Propage les boîtes de visage par flux optique (Lucas-Kanade) et ne
+    relance la détection complète du moteur qu'en cas de perte de suivi,
+    de dérive, ou tous les redetect_interval frames.
+
+    La détection cherche d'abord autour des dernières boîtes connues (ROI) ;
+    toutes les ROI_FULL_SCAN_INTERVAL détections, la frame entière est
+    parcourue pour trouver les visages entrés dans le champ.
+    """
+
+    def __init__(self, face_engine, redetect_interval: int = None):
+        if redetect_interval is None:
+            # Suivi désactivé = détection complète à chaque frame
+            redetect_interval = TRACKER_REDETECT_INTERVAL if TRACKING_ENABLED else 0
+        self.face_engine = face_engine
+        self.redetect_interval = redetect_interval
+        self.tracks: List[FaceTrack] = []
+        self.last_update_detected = False
+
+        self._prev_gray: Optional[np.ndarray] = None
+        self._frames_since_detection = 0
+        self._roi_detections = 0
+        self._next_track_id = 1
+
+        # Statistiques
+        self.detection_count = 0
+        self.tracked_count = 0
+
+    def reset(self):
+        """Oublier tous les visages suivis (la prochaine frame sera détectée)"""
+        self.tracks = []
+        self._prev_gray = None
+        self._frames_since_detection = 0
+
+    def update(self, frame: np.ndarray, hint: Optional[Location] = None) -> List[FaceTrack]:
+        """
+        Mettre à jour les pistes pour une nouvelle frame
+
+        Args:
+            frame: Frame BGR
+            hint: Dernière position connue d'un visage, pour la recherche ROI
+                quand aucune piste n'est en cours
+
+        Returns:
+            Liste des visages suivis (location au format dlib)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self._needs_detection(gray):
+            self._detect(frame, gray, hint)
+        else:
+            self._propagate(gray)
+            if any(track.lost for track in self.tracks):
+                logger.log_debug("Suivi perdu - nouvelle détection")
+                self._detect(frame, gray, hint)
+            else:
+                self.last_update_detected = False
+                self.tracked_count += 1
+                self._frames_since_detection += 1
+
+        self._prev_gray = gray
+        return list(self.tracks)
+
+    def _needs_detection(self, gray: np.ndarray) -> bool:
+        if not self.tracks or self._prev_gray is None:
+            return True
+        if self._prev_gray.shape != gray.shape:
+            return True
+        return self._frames_since_detection >= self.redetect_interval
+
+    def _search_regions(self, hint: Optional[Location]) -> Optional[List[Location]]:
+        """Boîtes autour desquelles chercher, None = pleine frame"""
+        if not ROI_DETECTION_ENABLED or self._roi_detections >= ROI_FULL_SCAN_INTERVAL:
+            return None
+        # Les pistes perdues gardent leur dernière position : le visage est sans doute tout près
+        boxes = [track.location for track in self.tracks]
+        if not boxes and hint is not None:
+            boxes = [tuple(int(v) for v in hint)]
+        return boxes or None
+
+    def _detect(self, frame: np.ndarray, gray: np.ndarray, hint: Optional[Location] = None):
+        """Détection (ROI puis pleine frame) et association aux pistes existantes (IoU)"""
+        around = self._search_regions(hint)
+        locations = self.face_engine.locate_faces(frame, around=around)
+        self._roi_detections = self._roi_detections + 1 if around else 0
+        previous = [track for track in self.tracks if not track.lost]
+        tracks = []
+
+        for location in locations:
+            best, best_iou = None, TRACKER_IOU_MATCH
+            for track in previous:
+                iou = box_iou(track.location, location)
+                if iou >= best_iou:
+                    best, best_iou = track, iou
+
+            if best is not None:
+                previous.remove(best)
+                track = best
+                track.location = tuple(int(v) for v in location)
+                track.lost = False
+            else:
+                track = FaceTrack(self._next_track_id, tuple(int(v) for v in location))
+                self._next_track_id += 1
+
+            track.points = self._seed_points(gray, track.location)
+            tracks.append(track)
+
+        self.tracks = tracks
+        self.last_update_detected = True
+        self.detection_count += 1
+        self._frames_since_detection = 0
+
+    @staticmethod
+    def _seed_points(gray: np.ndarray, location: Location) -> Optional[np.ndarray]:
+        """Points à suivre dans le cœur de la boîte (évite le fond)"""
+        top, right, bottom, left = location
+        margin_y, margin_x = (bottom - top) // 8, (right - left) // 8
+        mask = np.zeros_like(gray)
+        mask[max(0, top + margin_y):max(0, bottom - margin_y),
+             max(0, left + margin_x):max(0, right - margin_x)] = 255
+        return cv2.goodFeaturesToTrack(gray, maxCorners=60, qualityLevel=0.01,
+                                       minDistance=5, mask=mask)
+
+    def _propagate(self, gray: np.ndarray):
+        """Déplacer chaque boîte selon le flux optique de ses points"""
+        height, width = gray.shape[:2]
+        lk_params = dict(winSize=(15, 15), maxLevel=2,
+                         criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+        for track in self.tracks:
+            if track.points is None or len(track.points) < TRACKER_MIN_POINTS:
+                track.lost = True
+                continue
+
+            # Aller-retour pour rejeter les points mal suivis
+            forward, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, track.points, None, **lk_params)
+            backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, forward, None, **lk_params)
+            fb_error = np.linalg.norm((track.points - backward).reshape(-1, 2), axis=1)
+            good = (status.reshape(-1) == 1) & (status_back.reshape(-1) == 1) & (fb_error < TRACKER_MAX_FB_ERROR)
+
+            if good.sum() < TRACKER_MIN_POINTS:
+                track.lost = True
+                continue
+
+            old = track.points.reshape(-1, 2)[good]
+            new = forward.reshape(-1, 2)[good]
+            shift = np.median(new - old, axis=0)
+
+            # Échelle : rapport des dispersions autour du centre médian
+            old_spread = np.linalg.norm(old - np.median(old, axis=0), axis=1)
+            new_spread = np.linalg.norm(new - np.median(new, axis=0), axis=1)
+            valid = old_spread > 1.0
+            scale = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+            if not (1.0 / TRACKER_MAX_SCALE_CHANGE <= scale <= TRACKER_MAX_SCALE_CHANGE):
+                track.lost = True  # dérive
+                continue
+
+            top, right, bottom, left = track.location
+            center_x = (left + right) / 2.0 + shift[0]
+            center_y = (top + bottom) / 2.0 + shift[1]
+            half_w = (right - left) * scale / 2.0
+            half_h = (bottom - top) * scale / 2.0
+            location = (int(round(center_y - half_h)), int(round(center_x + half_w)),
+                        int(round(center_y + half_h)), int(round(center_x - half_w)))
+
+            # Boîte sortie de l'image = suivi perdu
+            if location[0] < -half_h or location[3] < -half_w or \
+                    location[2] > height + half_h or location[1] > width + half_w:
+                track.lost = True
+                continue
+
+            track.location = (max(0, location[0]), min(width, location[1]),
+                              min(height, location[2]), max(0, location[3]))
+            track.points = new.reshape(-1, 1, 2).astype(np.float32)
+
+    def get_stats(self) -> dict:
+        """Statistiques détection / suivi"""
+        total = self.detection_count + self.tracked_count
+        return {
+            'detections': self.detection_count,
+            'tracked_frames': self.tracked_count,
+            'detection_ratio': self.detection_count / total if total else 0.0,
+            'active_tracks': len(self.tracks)
+        }
@@ -0,0 +1,265 @@
+"""Pipeline capture / traitement en threads (la frame la plus récente gagne)"""
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Optional, Tuple
+from utils.logger import Logger
+
+logger = Logger()
+
+
+class FrameResult:
+    """Frame traitée publiée sur le canal de résultats"""
+
+    __slots__ = ('seq', 'frame', 'source', 'captured_at', 'capture_ms', 'process_ms', 'latency_ms')
+
+    def __init__(self, seq: int, frame: np.ndarray, source: np.ndarray, captured_at: float,
+                 capture_ms: float, process_ms: float, latency_ms: float):
+        self.seq = seq  # numéro de la frame capturée (croissant)
+        self.frame = frame  # sortie du traitement (frame annotée)
+        self.source = source  # frame brute
+        self.captured_at = captured_at
+        self.capture_ms = capture_ms
+        self.process_ms = process_ms
+        self.latency_ms = latency_ms  # capture -> publication
+
+
+class FramePipeline:
+    """
+    Thread de capture + worker de traitement + canal de résultats
+
+    La capture dépose chaque frame dans un emplacement unique : si le
+    worker n'a pas encore pris la précédente, elle est abandonnée (comptée
+    dans dropped, ou dans throttled si le worker attend à cause de
+    max_fps). Le worker traite donc toujours la frame la plus récente.
+    Plusieurs consommateurs (UI Tkinter, flux web) lisent le dernier
+    résultat publié via wait_result(), chacun avec son propre curseur ;
+    wait_frame() donne les frames brutes au rythme de la caméra, pour
+    afficher sans attendre le traitement.
+    """
+
+    def __init__(self, source, process: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 flip: bool = False, name: str = 'camera', max_fps: float = 0.0):
+        """
+        Args:
+            source: Objet avec read() -> (ok, frame), ex. cv2.VideoCapture
+            process: Traitement frame -> frame annotée (None = passe-plat)
+            flip: Miroir horizontal à la capture
+            name: Nom utilisé dans les logs et les threads
+            max_fps: Cadence maximale du traitement (0 = aussi vite que possible)
+        """
+        self.source = source
+        self.process = process
+        self.flip = flip
+        self.name = name
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
+        self._running = False
+        self._threads = []
+
+        # Emplacement de la dernière frame capturée (non traitée)
+        self._frame_cond = threading.Condition()
+        self._pending = None
+        self._latest_source: Optional[np.ndarray] = None
+        self._latest_seq = 0
+
+        # Canal de résultats
+        self._result_cond = threading.Condition()
+        self._result: Optional[FrameResult] = None
+
+        # Statistiques
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0  # remplacées pendant le traitement (worker en retard)
+        self.throttled = 0  # remplacées pendant l'attente imposée par max_fps
+        self.read_failures = 0
+        self._throttling = False
+        self._capture_ms = 0.0
+        self._process_ms = 0.0
+        self._latency_ms = 0.0
+        # Intervalles lissés entre deux captures / deux résultats (FPS courants)
+        self._capture_interval_ms = 0.0
+        self._process_interval_ms = 0.0
+        self._last_captured = 0.0
+        self._last_processed = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Lancer les threads de capture et de traitement"""
+        if self._running:
+            return
+        # Limiter la file du pilote à une frame (évite les frames périmées)
+        if hasattr(self.source, 'set'):
+            self.source.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name=f"{self.name}-capture", daemon=True),
+            threading.Thread(target=self._process_loop, name=f"{self.name}-process", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.log_info(f"✅ Pipeline {self.name} démarré")
+
+    def stop(self, timeout: float = 1.0):
+        """Arrêter les threads (la source n'est pas libérée)"""
+        if not self._running:
+            return
+        self._running = False
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        with self._result_cond:
+            self._result_cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+        logger.log_info(f"Pipeline {self.name} arrêté ({self.dropped} frame(s) abandonnée(s), "
+                        f"{self.throttled} écartée(s) par max_fps)")
+
+    def _capture_loop(self):
+        seq = 0
+        while self._running:
+            start = time.perf_counter()
+            try:
+                ok, frame = self.source.read()
+            except Exception as e:
+                logger.log_error(f"Erreur capture {self.name}: {e}")
+                ok, frame = False, None
+
+            if not ok or frame is None:
+                self.read_failures += 1
+                time.sleep(0.05)
+                continue
+
+            if self.flip:
+                frame = cv2.flip(frame, 1)
+            captured_at = time.perf_counter()
+            self._capture_ms = self._smooth(self._capture_ms, (captured_at - start) * 1000)
+            if self._last_captured:
+                self._capture_interval_ms = self._smooth(self._capture_interval_ms,
+                                                         (captured_at - self._last_captured) * 1000)
+            self._last_captured = captured_at
+
+            seq += 1
+            with self._frame_cond:
+                if self._pending is not None:
+                    if self._throttling:
+                        self.throttled += 1
+                    else:
+                        self.dropped += 1
+                self._pending = (seq, frame, captured_at)
+                self._latest_source = frame
+                self._latest_seq = seq
+                self.captured += 1
+                self._frame_cond.notify_all()
+
+    def _process_loop(self):
+        while True:
+            with self._frame_cond:
+                while self._running and self._pending is None:
+                    self._frame_cond.wait(0.5)
+                if not self._running:
+                    return
+                seq, source, captured_at = self._pending
+                self._pending = None
+
+            start = time.perf_counter()
+            output = source
+            if self.process is not None:
+                try:
+                    output = self.process(source.copy())
+                except Exception as e:
+                    logger.log_error(f"Erreur traitement {self.name}: {e}")
+                    output = source
+            done = time.perf_counter()
+
+            self._process_ms = self._smooth(self._process_ms, (done - start) * 1000)
+            self._latency_ms = self._smooth(self._latency_ms, (done - captured_at) * 1000)
+            if self._last_processed:
+                self._process_interval_ms = self._smooth(self._process_interval_ms,
+                                                         (done - self._last_processed) * 1000)
+            self._last_processed = done
+            result = FrameResult(seq, output, source, captured_at,
+                                 self._capture_ms, (done - start) * 1000, (done - captured_at) * 1000)
+
+            with self._result_cond:
+                self._result = result
+                self.processed += 1
+                self._result_cond.notify_all()
+
+            # Budget de traitement : les frames capturées entre-temps sont écartées (throttled)
+            remaining = self.min_interval - (time.perf_counter() - start)
+            if remaining > 0:
+                with self._frame_cond:
+                    self._throttling = True
+                    self._frame_cond.wait_for(lambda: not self._running, remaining)
+                    self._throttling = False
+
+    @staticmethod
+    def _smooth(previous: float, value: float) -> float:
+        return value if previous == 0.0 else 0.9 * previous + 0.1 * value
+
+    @property
+    def latest_result(self) -> Optional[FrameResult]:
+        """Dernier résultat publié (non bloquant)"""
+        return self._result
+
+    def wait_result(self, after_seq: int = 0, timeout: float = None) -> Optional[FrameResult]:
+        """
+        Attendre un résultat plus récent que after_seq
+
+        Returns:
+            Le dernier résultat, ou None si timeout / pipeline arrêté
+        """
+        with self._result_cond:
+            self._result_cond.wait_for(
+                lambda: not self._running or (self._result is not None and self._result.seq > after_seq),
+                timeout
+            )
+            result = self._result
+        if result is None or result.seq <= after_seq:
+            return None
+        return result
+
+    def wait_frame(self, after_seq: int = 0, timeout: float = None) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Attendre une frame brute capturée après after_seq (rythme caméra)
+
+        Returns:
+            (seq, frame) de la dernière capture (ne pas modifier), ou None si timeout / pipeline arrêté
+        """
+        with self._frame_cond:
+            self._frame_cond.wait_for(lambda: not self._running or self._latest_seq > after_seq, timeout)
+            seq, frame = self._latest_seq, self._latest_source
+        if frame is None or seq <= after_seq:
+            return None
+        return seq, frame
+
+    def latest_frame(self) -> Optional[np.ndarray]:
+        """Copie de la dernière frame brute capturée"""
+        frame = self._latest_source
+        return frame.copy() if frame is not None else None
+
+    @staticmethod
+    def _rate(interval_ms: float) -> float:
+        return 1000.0 / interval_ms if interval_ms > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        """Compteurs, latences lissées par étage (ms) et FPS courants (intervalles lissés)"""
+        return {
+            'captured': self.captured,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'throttled': self.throttled,
+            'read_failures': self.read_failures,
+            'capture_fps': self._rate(self._capture_interval_ms),
+            'capture_ms': self._capture_ms,
+            'process_ms': self._process_ms,
+            'latency_ms': self._latency_ms,
+            'fps': self._rate(self._process_interval_ms)
+        }
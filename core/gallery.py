@@ -0,0 +1,777 @@
+"""Galerie d'encodings faciaux contiguë pour la reconnaissance vectorisée"""
+import os
+import sys
+import tempfile
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from core.ann_index import GalleryIndex
+
+ENCODING_DIM = 128
+AGGREGATIONS = ('min', 'mean_topk')
+QUANTIZATIONS = (None, 'float16', 'int8')
+SCAN_BLOCK = 1024  # lignes converties à la fois (le bloc float32 reste en cache)
+ALIVE = np.iinfo(np.int64).max  # _removed d'une ligne jamais retirée
+
+
+def best_identity(ids: np.ndarray, distances: np.ndarray, aggregation: str = 'min',
+                  top_k: int = 1) -> Tuple[int, float, float]:
+    """
+    Meilleure identité parmi des lignes candidates (galerie ou top-k pgvector)
+
+    Le score d'une personne est sa meilleure distance ('min') ou la
+    moyenne de ses top_k meilleures ('mean_topk') ; la marge est l'écart
+    avec la 2e identité (inf s'il n'y en a qu'une).
+
+    Returns:
+        Tuple (position de la meilleure ligne de l'identité, score agrégé, marge)
+    """
+    ids = np.asarray(ids)
+    distances = np.asarray(distances, dtype=np.float64)
+    order = np.lexsort((distances, ids))
+    member_ids, member_distances = ids[order], distances[order]
+
+    first = np.empty(order.shape[0], dtype=bool)
+    first[0] = True
+    np.not_equal(member_ids[1:], member_ids[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+
+    if aggregation == 'min' or top_k <= 1:
+        scores = member_distances[starts]
+    else:
+        group = np.cumsum(first) - 1
+        keep = (np.arange(order.shape[0]) - starts[group]) < top_k
+        scores = np.bincount(group[keep], weights=member_distances[keep]) / np.bincount(group[keep])
+
+    if scores.shape[0] == 1:
+        best, margin = 0, float('inf')
+    else:
+        best_two = np.argpartition(scores, 1)[:2]
+        if scores[best_two[1]] < scores[best_two[0]]:
+            best_two = best_two[::-1]
+        best = int(best_two[0])
+        margin = float(scores[best_two[1]] - scores[best])
+
+    return int(order[starts[best]]), float(scores[best]), margin
+
+
+class FaceGallery:
+    """
+    Galerie préallouée d'encodings (matrice float32 + tableaux id/nom)
+
+    Une ligne est un modèle (template) : une personne peut en avoir
+    plusieurs (éclairage, lunettes, angle), identifiés par template_id
+    (profile_id en base, 0 par défaut). Les lignes ne sont jamais
+    réécrites : un ajout écrit en fin de matrice, un remplacement ou une
+    suppression marque l'ancienne ligne comme retirée (version de la
+    suppression dans _removed) et les recherches l'écartent. Quand les
+    lignes retirées dépassent compact_ratio des lignes (et au moins
+    compact_min), la galerie est recopiée en une fois sans elles. Un index
+    ANN optionnel est tenu à jour à chaque ajout et n'est interrogé
+    qu'au-delà de min_index_size profils (recherche exacte en dessous).
+
+    Dès qu'une personne a plusieurs modèles, le score d'une identité
+    agrège ses distances : 'min' (meilleur modèle) ou 'mean_topk'
+    (moyenne de ses top_k meilleurs modèles). La marge est alors mesurée
+    entre identités et non entre lignes.
+
+    Avec quantization ('float16' ou 'int8' avec une échelle par ligne),
+    une copie compacte de la matrice sert au parcours grossier ; seules
+    les `rerank` lignes les plus proches sont re-classées avec les
+    distances float32 exactes. Avec float32_dir, la matrice float32 est
+    un fichier temporaire mappé en mémoire : ses pages peuvent quitter la
+    RAM, seuls les codes y restent pour le parcours.
+    """
+
+    def __init__(self, dim: int = ENCODING_DIM, initial_capacity: int = 256,
+                 index: GalleryIndex = None, min_index_size: int = 0,
+                 aggregation: str = 'min', top_k: int = 1, shortlist: int = 32,
+                 quantization: str = None, rerank: int = 64, float32_dir: str = None,
+                 compact_ratio: float = 0.25, compact_min: int = 256):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Agrégation inconnue: {aggregation} (attendu {', '.join(AGGREGATIONS)})")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Quantification inconnue: {quantization} (attendu float16 ou int8)")
+        self.dim = dim
+        self.index = index or GalleryIndex()
+        self.min_index_size = min_index_size
+        self.aggregation = aggregation
+        self.top_k = max(1, top_k)
+        self.shortlist = shortlist  # lignes les plus proches dont on agrège les identités
+        self.quantization = quantization
+        self.rerank = max(2, rerank)  # lignes re-classées en float32 après le parcours quantifié
+        self.float32_dir = float32_dir
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self._count = 0  # lignes écrites, retirées comprises
+        self._dead = 0  # lignes retirées parmi elles
+        self._allocate(initial_capacity)
+        self._rows: Optional[Dict[Tuple[int, int], int]] = {}  # (personne_id, template_id) -> ligne
+        self._people: Optional[Dict[int, int]] = {}  # personne_id -> nombre de modèles
+        self._people_count = 0
+        self._multi = 0  # personnes ayant plusieurs modèles
+        self._live: Optional[Tuple[int, np.ndarray]] = None  # (version, lignes vivantes) en cache
+        self.version = 0  # incrémentée une fois par modification
+
+    def options(self) -> dict:
+        """Options de recherche à reprendre pour une galerie équivalente"""
+        return {'aggregation': self.aggregation, 'top_k': self.top_k, 'shortlist': self.shortlist,
+                'quantization': self.quantization, 'rerank': self.rerank, 'float32_dir': self.float32_dir,
+                'compact_ratio': self.compact_ratio, 'compact_min': self.compact_min}
+
+    def _allocate(self, capacity: int):
+        """Tableaux neufs : les copies figées gardent les anciens"""
+        self._matrix = self._allocate_matrix(capacity)
+        self._codes, self._scales = self._empty_codes(capacity)
+        self._norms = np.empty(capacity, dtype=np.float32)  # normes au carré
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._templates = np.empty(capacity, dtype=np.int64)
+        self._names = np.empty(capacity, dtype=object)
+        self._passwords = np.empty(capacity, dtype=object)
+        self._removed = np.empty(capacity, dtype=np.int64)  # version de la suppression, ALIVE sinon
+
+    def _allocate_matrix(self, capacity: int) -> np.ndarray:
+        """Matrice float32 en RAM, ou dans un fichier temporaire mappé (supprimé à la fermeture)"""
+        if self.float32_dir is None or capacity == 0:
+            return np.empty((capacity, self.dim), dtype=np.float32)
+        os.makedirs(self.float32_dir, exist_ok=True)
+        with tempfile.TemporaryFile(dir=self.float32_dir) as handle:
+            return np.memmap(handle, dtype=np.float32, mode='w+', shape=(capacity, self.dim))
+
+    def _empty_codes(self, capacity: int) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        if self.quantization is None:
+            return None, None
+        if self.quantization == 'float16':
+            return np.empty((capacity, self.dim), dtype=np.float16), None
+        return np.empty((capacity, self.dim), dtype=np.int8), np.empty(capacity, dtype=np.float32)
+
+    def _quantize(self, start: int, end: int):
+        """Recalculer les codes des lignes [start, end) à partir de la matrice float32"""
+        if self.quantization is None:
+            return
+        for first in range(start, end, SCAN_BLOCK):
+            last = min(end, first + SCAN_BLOCK)
+            vectors = self._matrix[first:last]
+            if self.quantization == 'float16':
+                self._codes[first:last] = vectors
+                continue
+            peak = np.abs(vectors).max(axis=1)
+            scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+            self._codes[first:last] = np.rint(vectors / scales[:, None])
+            self._scales[first:last] = scales
+
+    def _index_people(self):
+        """Recompter les modèles par personne à partir de _ids"""
+        people, counts = np.unique(self._ids[:self._count], return_counts=True)
+        self._people = dict(zip(people.tolist(), counts.tolist()))
+        self._people_count = len(self._people)
+        self._multi = int(np.count_nonzero(counts > 1))
+
+    @classmethod
+    def attach(cls, matrix: np.ndarray, norms: np.ndarray, ids: np.ndarray, **options) -> 'FaceGallery':
+        """Galerie en lecture seule sur des tableaux existants (ex. mémoire partagée)"""
+        count, dim = matrix.shape
+        gallery = cls(dim=dim, initial_capacity=0, **options)
+        gallery._count = count
+        gallery._matrix, gallery._norms, gallery._ids = matrix, norms, ids
+        gallery._templates = np.zeros(count, dtype=np.int64)
+        gallery._names = np.full(count, None, dtype=object)
+        gallery._passwords = np.full(count, None, dtype=object)
+        gallery._removed = np.full(count, ALIVE, dtype=np.int64)
+        gallery._codes, gallery._scales = gallery._empty_codes(count)
+        gallery._quantize(0, count)
+        gallery._index_people()
+        return gallery
+
+    @classmethod
+    def restore(cls, matrix: np.ndarray, ids: np.ndarray, names: List[str], templates: np.ndarray = None,
+                index: GalleryIndex = None, min_index_size: int = 0, **options) -> 'FaceGallery':
+        """
+        Galerie modifiable sur des tableaux existants (ex. instantané mappé)
+
+        La capacité est égale au nombre de lignes : le premier ajout copie
+        les tableaux en mémoire. Les mots de passe ne sont pas restaurés.
+        """
+        count, dim = matrix.shape
+        gallery = cls(dim=dim, initial_capacity=0, index=index, min_index_size=min_index_size, **options)
+        gallery._count = count
+        gallery._matrix = matrix
+        gallery._norms = np.einsum('ij,ij->i', matrix, matrix)
+        gallery._ids = np.asarray(ids, dtype=np.int64)
+        gallery._templates = (np.zeros(count, dtype=np.int64) if templates is None
+                              else np.asarray(templates, dtype=np.int64))
+        gallery._names = np.array(names, dtype=object).reshape(count)
+        gallery._passwords = np.full(count, None, dtype=object)
+        gallery._removed = np.full(count, ALIVE, dtype=np.int64)
+        gallery._rows = dict(zip(zip(gallery._ids.tolist(), gallery._templates.tolist()), range(count)))
+        gallery._codes, gallery._scales = gallery._empty_codes(count)
+        gallery._quantize(0, count)
+        gallery._index_people()
+        return gallery
+
+    def freeze(self) -> 'FaceGallery':
+        """
+        Copie figée de la galerie, publiée aux lecteurs
+
+        Rien n'est recopié : la copie est une vue sur les count premières
+        lignes de chaque tableau. Les ajouts écrivent au-delà, les
+        suppressions ne marquent que des versions postérieures à celle de
+        la copie, réallocations et compactage créent de nouveaux tableaux.
+        Seuls noms et mots de passe sont mis à jour en place par
+        sync_credentials. Les dictionnaires de recherche par clé ne sont
+        reconstruits que si un lecteur les demande.
+        """
+        count = self._count
+        frozen = FaceGallery(dim=self.dim, initial_capacity=0, index=self.index.frozen(count),
+                             min_index_size=self.min_index_size, **self.options())
+        frozen._count, frozen._dead = count, self._dead
+        frozen._matrix = self._matrix[:count]
+        if self._codes is not None:
+            frozen._codes = self._codes[:count]
+        if self._scales is not None:
+            frozen._scales = self._scales[:count]
+        frozen._norms = self._norms[:count]
+        frozen._ids = self._ids[:count]
+        frozen._templates = self._templates[:count]
+        frozen._names = self._names[:count]
+        frozen._passwords = self._passwords[:count]
+        frozen._removed = self._removed[:count]
+        frozen._rows = frozen._people = None
+        frozen._people_count = self._people_count
+        frozen._multi = self._multi
+        frozen.version = self.version
+        return frozen
+
+    def _lookup(self) -> Tuple[Dict[Tuple[int, int], int], Dict[int, int]]:
+        """(clé -> ligne, personne -> modèles), reconstruits à la demande sur une copie figée"""
+        if self._rows is None:
+            rows = self.live_rows()
+            ids, templates = self._ids[rows].tolist(), self._templates[rows].tolist()
+            people: Dict[int, int] = {}
+            for personne_id in ids:
+                people[personne_id] = people.get(personne_id, 0) + 1
+            self._people = people
+            self._rows = dict(zip(zip(ids, templates), rows.tolist()))
+        return self._rows, self._people
+
+    def _dead_mask(self, rows=None) -> Optional[np.ndarray]:
+        """Lignes retirées (au regard de cette version) parmi rows (None = toutes)"""
+        if not self._dead:
+            return None
+        removed = self._removed[:self._count] if rows is None else self._removed[rows]
+        return removed <= self.version
+
+    def live_rows(self) -> np.ndarray:
+        """Numéros des lignes non retirées, dans l'ordre"""
+        cached = self._live
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        dead = self._dead_mask()
+        rows = np.arange(self._count) if dead is None else np.flatnonzero(~dead)
+        self._live = (self.version, rows)
+        return rows
+
+    def _live_slice(self, array: np.ndarray) -> np.ndarray:
+        return array[:self._count] if not self._dead else array[self.live_rows()]
+
+    def __len__(self) -> int:
+        return self._count - self._dead
+
+    def __contains__(self, personne_id: int) -> bool:
+        return personne_id in self._lookup()[1]
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Encodings des lignes non retirées (len x dim ; vue sans copie tant qu'aucune ne l'est)"""
+        return self._live_slice(self._matrix)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._live_slice(self._ids)
+
+    @property
+    def templates(self) -> np.ndarray:
+        return self._live_slice(self._templates)
+
+    @property
+    def names(self) -> np.ndarray:
+        return self._live_slice(self._names)
+
+    @property
+    def passwords(self) -> np.ndarray:
+        return self._live_slice(self._passwords)
+
+    @property
+    def people_count(self) -> int:
+        """Nombre de personnes distinctes"""
+        return self._people_count
+
+    def row_of(self, personne_id: int, template_id: int = 0) -> Optional[int]:
+        """Ligne occupée par un modèle d'une personne (ou None)"""
+        return self._lookup()[0].get((personne_id, template_id))
+
+    def templates_of(self, personne_id: int) -> List[int]:
+        """template_id des modèles chargés d'une personne"""
+        return self.templates[self.ids == personne_id].tolist()
+
+    def entry(self, row: int) -> Tuple[int, str, Optional[str]]:
+        """Retourner (personne_id, username, password) d'une ligne"""
+        return int(self._ids[row]), self._names[row], self._passwords[row]
+
+    def encoding(self, row: int) -> np.ndarray:
+        """Encoding d'une ligne (numéro renvoyé par match ou row_of)"""
+        return self._matrix[row]
+
+    def reserve(self, capacity: int):
+        """Garantir une capacité minimale (évite les réallocations en chargement massif)"""
+        if capacity <= self.capacity:
+            return
+
+        def grow(array: np.ndarray) -> np.ndarray:
+            new = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            new[:self._count] = array[:self._count]
+            return new
+
+        matrix = self._allocate_matrix(capacity)
+        matrix[:self._count] = self._matrix[:self._count]
+        self._matrix = matrix
+        if self._codes is not None:
+            self._codes = grow(self._codes)
+        if self._scales is not None:
+            self._scales = grow(self._scales)
+        self._norms = grow(self._norms)
+        self._ids = grow(self._ids)
+        self._templates = grow(self._templates)
+        self._names = grow(self._names)
+        self._passwords = grow(self._passwords)
+        self._removed = grow(self._removed)
+
+    def _count_template(self, personne_id: int, delta: int):
+        before = self._people.get(personne_id, 0)
+        after = before + delta
+        if after:
+            self._people[personne_id] = after
+        else:
+            self._people.pop(personne_id, None)
+        self._people_count += (after > 0) - (before > 0)
+        self._multi += (after > 1) - (before > 1)
+
+    def _bury(self, row: int):
+        """Marquer une ligne retirée à partir de la prochaine version"""
+        self._removed[row] = self.version + 1
+        self._dead += 1
+
+    def _index_rows(self, start: int, end: int):
+        """Indexer les lignes [start, end) ajoutées (ré-entraînement si la galerie a trop grandi)"""
+        if len(self) >= self.min_index_size and self.index.needs_rebuild(len(self)):
+            self.index.rebuild(self._matrix[:self._count])
+        else:
+            for row in range(start, end):
+                self.index.add(row, self._matrix[row])
+
+    def add(self, personne_id: int, username: str, encoding: np.ndarray,
+            password: str = None, template_id: int = 0) -> int:
+        """
+        Ajouter (ou remplacer) un modèle d'une personne
+
+        Returns:
+            Ligne occupée dans la matrice
+        """
+        vector = np.asarray(encoding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Dimension d'encoding invalide: {vector.shape[0]} (attendu {self.dim})")
+
+        key = (personne_id, template_id)
+        previous = self._rows.get(key)
+        if self._count == self.capacity:
+            self.reserve(max(2 * self.capacity, 16))
+        if previous is None:
+            self._count_template(personne_id, 1)
+        else:
+            self._bury(previous)
+
+        row = self._count
+        self._matrix[row] = vector
+        self._quantize(row, row + 1)
+        self._norms[row] = np.dot(vector, vector)
+        self._ids[row] = personne_id
+        self._templates[row] = template_id
+        self._names[row] = username
+        self._passwords[row] = password
+        self._removed[row] = ALIVE
+        self._rows[key] = row
+        self._count += 1
+        self.version += 1
+
+        self._index_rows(row, row + 1)
+        self._maybe_compact()
+        return self._rows[key]
+
+    def add_many(self, personne_ids, usernames, encodings: np.ndarray, passwords=None,
+                 template_ids=None) -> int:
+        """
+        Ajouter un bloc de modèles en une copie (chargement massif)
+
+        Les modèles déjà présents sont remplacés (anciennes lignes retirées).
+
+        Returns:
+            Nombre de modèles ajoutés ou remplacés
+        """
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, self.dim)
+        n = encodings.shape[0]
+        if passwords is None:
+            passwords = [None] * n
+        if template_ids is None:
+            template_ids = [0] * n
+        personne_ids = [int(personne_id) for personne_id in personne_ids]
+        template_ids = [int(template_id) for template_id in template_ids]
+
+        start = self._count
+        if start + n > self.capacity:
+            self.reserve(max(2 * self.capacity, start + n))
+        end = start + n
+
+        self._matrix[start:end] = encodings
+        self._quantize(start, end)
+        self._norms[start:end] = np.einsum('ij,ij->i', encodings, encodings)
+        self._ids[start:end] = personne_ids
+        self._templates[start:end] = template_ids
+        self._names[start:end] = usernames
+        self._passwords[start:end] = passwords
+        self._removed[start:end] = ALIVE
+        for row, key in enumerate(zip(personne_ids, template_ids), start):
+            previous = self._rows.get(key)
+            if previous is None:
+                self._count_template(key[0], 1)
+            else:
+                self._bury(previous)
+            self._rows[key] = row
+        self._count = end
+        self.version += 1
+
+        self._index_rows(start, end)
+        self._maybe_compact()
+        return n
+
+    def _remove_row(self, row: int):
+        """Retirer une ligne (marquée, recopiée au prochain compactage)"""
+        personne_id = int(self._ids[row])
+        del self._rows[(personne_id, int(self._templates[row]))]
+        self._count_template(personne_id, -1)
+        self._bury(row)
+
+    def remove(self, personne_id: int) -> bool:
+        """Retirer une personne (tous ses modèles)"""
+        if personne_id not in self._people:
+            return False
+        rows = np.flatnonzero((self._ids[:self._count] == personne_id) & (self._removed[:self._count] == ALIVE))
+        for row in rows:
+            self._remove_row(int(row))
+        self.version += 1
+        self._maybe_compact()
+        return True
+
+    def remove_template(self, personne_id: int, template_id: int) -> bool:
+        """Retirer un seul modèle d'une personne"""
+        row = self._rows.get((personne_id, template_id))
+        if row is None:
+            return False
+        self._remove_row(row)
+        self.version += 1
+        self._maybe_compact()
+        return True
+
+    def sync_credentials(self, credentials: List[Tuple]) -> int:
+        """
+        Aligner la galerie sur les modèles actifs en base
+
+        Args:
+            credentials: (personne_id, username, password, template_id) par modèle
+                actif ; sans template_id, seules les personnes sont comparées
+
+        Les modèles absents de la liste sont retirés, les noms et mots de
+        passe des autres sont mis à jour.
+
+        Returns:
+            Nombre de modèles retirés
+        """
+        people = {int(row[0]): (row[1], row[2]) for row in credentials}
+        if credentials and len(credentials[0]) > 3:
+            active = {(int(row[0]), int(row[3])) for row in credentials}
+            stale = [key for key in self._rows if key not in active]
+        else:
+            stale = [key for key in self._rows if key[0] not in people]
+        for key in stale:
+            self._remove_row(self._rows[key])
+        if stale:
+            self.version += 1
+            self._maybe_compact()
+
+        for (personne_id, _), row in self._rows.items():
+            self._names[row], self._passwords[row] = people[personne_id]
+        return len(stale)
+
+    def clear(self):
+        """Vider la galerie (la capacité est conservée)"""
+        self._allocate(self.capacity)
+        self._rows = {}
+        self._people = {}
+        self._people_count = 0
+        self._multi = 0
+        self._count = 0
+        self._dead = 0
+        self.version += 1
+        self.index.clear()
+
+    def _maybe_compact(self):
+        if self._dead and self._dead >= max(self.compact_min, self.compact_ratio * self._count):
+            self.compact()
+
+    def compact(self):
+        """
+        Recopier les lignes non retirées dans de nouveaux tableaux
+
+        Les copies figées gardent les anciens tableaux ; l'index est
+        renuméroté sans ré-entraînement.
+        """
+        if not self._dead:
+            return
+        live = self.live_rows()
+        n = live.shape[0]
+
+        def take(array: np.ndarray) -> np.ndarray:
+            new = np.empty((self.capacity,) + array.shape[1:], dtype=array.dtype)
+            new[:n] = array[live]
+            return new
+
+        matrix = self._allocate_matrix(self.capacity)
+        for start in range(0, n, SCAN_BLOCK):
+            end = min(n, start + SCAN_BLOCK)
+            matrix[start:end] = self._matrix[live[start:end]]
+        self._matrix = matrix
+        if self._codes is not None:
+            self._codes = take(self._codes)
+        if self._scales is not None:
+            self._scales = take(self._scales)
+        self._norms = take(self._norms)
+        self._ids = take(self._ids)
+        self._templates = take(self._templates)
+        self._names = take(self._names)
+        self._passwords = take(self._passwords)
+        self._removed = np.empty(self.capacity, dtype=np.int64)
+        self._removed[:n] = ALIVE
+        self._rows = dict(zip(zip(self._ids[:n].tolist(), self._templates[:n].tolist()), range(n)))
+        self.index.compact(live)
+        self._count, self._dead = n, 0
+        self.version += 1
+
+    def rebuild_index(self):
+        """Ré-entraîner l'index sur la galerie en mémoire (sans rechargement BD)"""
+        self.index.rebuild(self._matrix[:self._count])
+
+    def uses_index(self) -> bool:
+        """La recherche passe-t-elle par l'index approché"""
+        return len(self) >= self.min_index_size and self.index.is_ready()
+
+    def distances(self, probe: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """Distances euclidiennes entre une sonde et la galerie (ou un sous-ensemble de lignes)"""
+        probe = np.asarray(probe, dtype=np.float32).reshape(-1)
+        if rows is None:
+            matrix, norms = self._matrix[:self._count], self._norms[:self._count]
+        else:
+            matrix, norms = self._matrix[rows], self._norms[rows]
+        squared = norms + np.dot(probe, probe) - 2.0 * (matrix @ probe)
+        distances = np.sqrt(np.maximum(squared, 0.0))
+        dead = self._dead_mask(rows)
+        if dead is not None:
+            distances[dead] = np.inf
+        return distances
+
+    def _match_identity(self, distances: np.ndarray, rows: np.ndarray = None) -> Tuple[int, float, float]:
+        """
+        Meilleure identité pour une sonde, scores agrégés par personne
+
+        Les identités retenues sont celles des `shortlist` lignes les plus
+        proches ; tous leurs modèles parmi les lignes examinées sont agrégés.
+
+        Returns:
+            Tuple (meilleure ligne de l'identité, score agrégé, marge avec la 2e identité)
+        """
+        ids = self._ids[:self._count] if rows is None else self._ids[rows]
+        n = distances.shape[0]
+        alive = np.isfinite(distances)  # lignes retirées : distance infinie
+        if n > self.shortlist:
+            near = np.argpartition(distances, self.shortlist - 1)[:self.shortlist]
+            members = np.flatnonzero(np.isin(ids, ids[near]) & alive)
+        else:
+            members = np.flatnonzero(alive)
+        if members.size == 0:
+            return (0 if rows is None else int(rows[0])), float('inf'), 0.0
+
+        best, score, margin = best_identity(ids[members], distances[members], self.aggregation, self.top_k)
+        row = int(members[best])
+        return (row if rows is None else int(rows[row])), score, margin
+
+    def _coarse_distances(self, probes: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Distances approchées sur les codes quantifiés (N sondes x lignes)
+
+        Au carré et sans la norme des sondes (constante par sonde) : ne
+        sert qu'à classer. Les codes sont convertis par blocs de SCAN_BLOCK
+        lignes pour borner la mémoire temporaire.
+        """
+        n = self._count if rows is None else rows.shape[0]
+        coarse = np.empty((probes.shape[0], n), dtype=np.float32)
+        for start in range(0, n, SCAN_BLOCK):
+            end = min(n, start + SCAN_BLOCK)
+            block = slice(start, end) if rows is None else rows[start:end]
+            products = probes @ self._codes[block].astype(np.float32).T
+            if self._scales is not None:
+                products *= self._scales[block]
+            coarse[:, start:end] = self._norms[block] - 2.0 * products
+        dead = self._dead_mask(rows)
+        if dead is not None:
+            coarse[:, dead] = np.inf
+        return coarse
+
+    def _rerank_rows(self, probe: np.ndarray, rows: np.ndarray = None) -> Optional[np.ndarray]:
+        """Lignes à re-classer en float32 : les `rerank` plus proches selon les codes"""
+        n = self._count if rows is None else rows.shape[0]
+        if n <= self.rerank:
+            return rows
+        coarse = self._coarse_distances(probe.reshape(1, -1), rows)[0]
+        near = np.sort(np.argpartition(coarse, self.rerank - 1)[:self.rerank])
+        return near if rows is None else rows[near]
+
+    def _match_rows(self, probe: np.ndarray, rows: np.ndarray = None) -> Tuple[int, float, float]:
+        """Plus proche voisin exact (float32) parmi des lignes (None = toute la galerie)"""
+        distances = self.distances(probe, rows)
+        if self._multi:
+            return self._match_identity(distances, rows)
+        if distances.shape[0] == 1:
+            best = 0 if rows is None else int(rows[0])
+            return best, float(distances[0]), float('inf')
+
+        best_two = np.argpartition(distances, 1)[:2]
+        if distances[best_two[1]] < distances[best_two[0]]:
+            best_two = best_two[::-1]
+        best_distance = float(distances[best_two[0]])
+        margin = float(distances[best_two[1]]) - best_distance
+        best = int(best_two[0]) if rows is None else int(rows[best_two[0]])
+        return best, best_distance, margin
+
+    def match(self, probe: np.ndarray, exact: bool = False) -> Tuple[int, float, float]:
+        """
+        Trouver le plus proche voisin en une seule passe
+
+        Args:
+            probe: Encoding à identifier
+            exact: Ignorer l'index approché et les codes quantifiés
+
+        Returns:
+            Tuple (ligne, distance, marge) ; ligne = -1 si la galerie est vide.
+            La marge est l'écart entre le 2e meilleur et le meilleur candidat.
+        """
+        if len(self) == 0:
+            return -1, float('inf'), 0.0
+
+        probe = np.asarray(probe, dtype=np.float32).reshape(-1)
+        rows = None
+        if not exact and self.uses_index():
+            rows = self.index.candidates(probe)
+            if rows is not None and rows.size == 0:
+                rows = None
+        if not exact and self.quantization is not None:
+            rows = self._rerank_rows(probe, rows)
+        return self._match_rows(probe, rows)
+
+    def match_batch(self, probes: np.ndarray, exact: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Identifier N sondes d'un coup (un seul produit matriciel N x count)
+
+        Returns:
+            Tuple de tableaux (lignes, distances, marges) de taille N
+        """
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, self.dim)
+        n = probes.shape[0]
+        if len(self) == 0 or n == 0:
+            return np.full(n, -1, dtype=np.int64), np.full(n, np.inf, dtype=np.float32), np.zeros(n, dtype=np.float32)
+
+        if not exact and self.uses_index():
+            # Chaque sonde a ses propres listes candidates
+            results = [self.match(probe) for probe in probes]
+            rows, distances, margins = (np.array(column) for column in zip(*results))
+            return rows, distances, margins
+
+        if not exact and self.quantization is not None and self._count > self.rerank:
+            # Un parcours quantifié pour toutes les sondes, puis re-classement exact par sonde
+            coarse = self._coarse_distances(probes)
+            near = np.sort(np.argpartition(coarse, self.rerank - 1, axis=1)[:, :self.rerank], axis=1)
+            results = [self._match_rows(probe, rows) for probe, rows in zip(probes, near)]
+            rows, distances, margins = (np.array(column) for column in zip(*results))
+            return rows, distances, margins
+
+        probe_norms = np.einsum('ij,ij->i', probes, probes)
+        squared = (self._norms[:self._count][None, :] + probe_norms[:, None]
+                   - 2.0 * (probes @ self._matrix[:self._count].T))
+        distances = np.sqrt(np.maximum(squared, 0.0))
+        dead = self._dead_mask()
+        if dead is not None:
+            distances[:, dead] = np.inf
+        everyone = np.arange(n)
+
+        if self._multi:
+            results = [self._match_identity(row_distances) for row_distances in distances]
+            rows, best, margins = (np.array(column) for column in zip(*results))
+            return rows, best, margins
+
+        if self._count == 1:
+            return np.zeros(n, dtype=np.int64), distances[:, 0], np.full(n, np.inf, dtype=np.float32)
+
+        best_two = np.argpartition(distances, 1, axis=1)[:, :2]
+        pair = distances[everyone[:, None], best_two]
+        swap = pair[:, 1] < pair[:, 0]
+        best_two[swap] = best_two[swap, ::-1]
+        pair[swap] = pair[swap, ::-1]
+        return best_two[:, 0], pair[:, 0], pair[:, 1] - pair[:, 0]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Octets occupés par les lignes écrites, retirées comprises (matrice
+        float32, codes quantifiés, métadonnées avec les chaînes et les
+        dictionnaires de recherche, index)
+        """
+        count = self._count
+        codes = 0
+        if self._codes is not None:
+            codes = count * self._codes.itemsize * self.dim
+        if self._scales is not None:
+            codes += count * self._scales.itemsize
+        metadata = count * (self._norms.itemsize + self._ids.itemsize + self._templates.itemsize
+                            + self._names.itemsize + self._passwords.itemsize + self._removed.itemsize)
+        # Chaînes partagées (même nom sur plusieurs modèles) comptées une fois
+        strings = {id(value): value for value in self._names[:count] if value is not None}
+        strings.update((id(value), value) for value in self._passwords[:count] if value is not None)
+        metadata += sum(sys.getsizeof(value) for value in strings.values())
+        rows, people = self._lookup()
+        metadata += sys.getsizeof(rows) + sys.getsizeof(people)
+        # Clés (tuple de deux entiers) et valeurs des dictionnaires
+        metadata += sum(sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1]) for key in rows)
+        metadata += 2 * sum(sys.getsizeof(personne_id) for personne_id in people)
+        return {
+            'float32': count * self._matrix.itemsize * self.dim,
+            'codes': codes,
+            'metadata': metadata,
+            'index': sum(array.nbytes for array in self.index.get_state().values()),
+            'dead_rows': self._dead
+        }
+
+    def credentials(self) -> List[Tuple[int, str, Optional[str]]]:
+        """Liste (personne_id, username, password) des personnes chargées (une par personne)"""
+        seen = {}
+        for row in self.live_rows().tolist():
+            seen.setdefault(int(self._ids[row]), row)
+        return [self.entry(row) for row in seen.values()]
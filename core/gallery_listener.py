@@ -0,0 +1,151 @@
+"""Rechargement à chaud de la galerie (PostgreSQL LISTEN/NOTIFY + rattrapage périodique)"""
+import select
+import threading
+import time
+from typing import Optional, Set
+from config.settings import (
+    GALLERY_NOTIFY_CHANNEL,
+    GALLERY_NOTIFY_DEBOUNCE,
+    GALLERY_POLL_INTERVAL
+)
+from database.connection import DatabaseConnection
+from services.profile_service import ProfileService
+from utils.logger import Logger
+
+logger = Logger()
+
+
+class GalleryListener:
+    """
+    Thread qui applique au moteur les changements de profils faits ailleurs
+
+    Les triggers de personne / face_profiles notifient le personne_id
+    modifié ; chaque lot de notifications est relu en une requête puis
+    appliqué (ajout, mise à jour, retrait). Toutes les poll_interval
+    secondes, et à chaque reconnexion, un rattrapage par updated_at
+    couvre les notifications perdues. Le thread a sa propre connexion.
+    """
+
+    def __init__(self, engine, channel: str = GALLERY_NOTIFY_CHANNEL,
+                 poll_interval: float = GALLERY_POLL_INTERVAL,
+                 debounce: float = GALLERY_NOTIFY_DEBOUNCE):
+        self.engine = engine
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+
+        self.db: Optional[DatabaseConnection] = None
+        self.profile_service: Optional[ProfileService] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_poll = 0.0
+        self._stats = {'notifications': 0, 'updated': 0, 'removed': 0, 'polls': 0, 'reconnects': 0}
+
+    def start(self):
+        """Démarrer l'écoute en arrière-plan"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='gallery-listener', daemon=True)
+        self._thread.start()
+        logger.log_info(f"✅ Écoute des changements de galerie ({self.channel})")
+
+    def stop(self):
+        """Arrêter l'écoute et fermer la connexion"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._disconnect()
+
+    def _connect(self) -> bool:
+        db = DatabaseConnection.dedicated()
+        if not db.connect():
+            return False
+        db.cursor.execute(f"LISTEN {self.channel}")
+        db.connection.commit()
+        self.db = db
+        self.profile_service = ProfileService(db)
+        # Ce qui a changé pendant la déconnexion
+        self._poll()
+        return True
+
+    def _disconnect(self):
+        if self.db is not None:
+            try:
+                self.db.disconnect()
+            except Exception:
+                pass
+        self.db = None
+        self.profile_service = None
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if self.db is None:
+                    if not self._connect():
+                        self._stop.wait(backoff)
+                        backoff = min(backoff * 2, 60.0)
+                        continue
+                    backoff = 1.0
+
+                # Notifications arrivées pendant la relecture précédente : psycopg2 les a déjà
+                # lues du socket, select() ne les signalerait plus
+                changed = self._drain()
+                if not changed:
+                    timeout = max(0.0, min(1.0, self._last_poll + self.poll_interval - time.monotonic()))
+                    ready, _, _ = select.select([self.db.connection], [], [], timeout)
+                    if ready:
+                        changed = self._drain()
+                if changed:
+                    # Regrouper une rafale (import, suppression en masse)
+                    if self._stop.wait(self.debounce):
+                        break
+                    changed |= self._drain()
+                    self._apply(changed)
+                if time.monotonic() - self._last_poll >= self.poll_interval:
+                    self._poll()
+
+            except Exception as e:
+                logger.log_error(f"❌ Écoute galerie interrompue: {e}")
+                self._stats['reconnects'] += 1
+                self._disconnect()
+                self._stop.wait(backoff)
+
+    def _drain(self) -> Set[int]:
+        """personne_id notifiés depuis le dernier appel"""
+        connection = self.db.connection
+        connection.poll()
+        changed = set()
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            try:
+                changed.add(int(notify.payload))
+            except ValueError:
+                logger.log_warning(f"Notification de galerie invalide: {notify.payload!r}")
+        self._stats['notifications'] += len(changed)
+        return changed
+
+    def _apply(self, changed: Set[int]):
+        if not changed:
+            return
+        updated, removed = self.engine.refresh_profiles(self.profile_service, sorted(changed))
+        self.db.connection.commit()
+        self._stats['updated'] += updated
+        self._stats['removed'] += removed
+        logger.log_info(f"🔄 Galerie: {updated} profil(s) mis à jour, {removed} retiré(s)")
+
+    def _poll(self):
+        updated, removed = self.engine.sync_gallery(self.profile_service)
+        self.db.connection.commit()
+        self._last_poll = time.monotonic()
+        self._stats['polls'] += 1
+        self._stats['updated'] += updated
+        self._stats['removed'] += removed
+        if updated or removed:
+            logger.log_info(f"🔄 Rattrapage galerie: {updated} profil(s) mis à jour, {removed} retiré(s)")
+
+    def get_stats(self) -> dict:
+        """Compteurs de notifications, mises à jour et reconnexions"""
+        return dict(self._stats, connected=self.db is not None)
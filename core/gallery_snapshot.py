@@ -0,0 +1,148 @@
+"""Instantané disque de la galerie (matrice float32 mappée en mémoire)"""
+import json
+import os
+import uuid
+import numpy as np
+from datetime import datetime
+from typing import Optional, Tuple
+from core.gallery import FaceGallery
+from core.ann_index import GalleryIndex
+from config.settings import ENCODING_MODEL
+from utils.encryption import EMBEDDING_MODELS
+from utils.logger import Logger
+
+logger = Logger()
+
+SNAPSHOT_FORMAT_VERSION = 2
+META_FILE = 'meta.json'
+
+
+def save_snapshot(gallery: FaceGallery, directory: str, watermark: datetime) -> bool:
+    """
+    Écrire la galerie sur disque
+
+    Fichiers : matrix-<id>.npy (count x dim float32), ids-<id>.npy,
+    templates-<id>.npy (profile_id de chaque ligne), index-<id>.npz
+    (état de l'index ANN) et meta.json (noms, watermark).
+    Chaque fichier est synchronisé sur disque (fsync) avant que meta.json
+    soit remplacé, en dernier et de façon atomique, puis le répertoire est
+    synchronisé : une coupure de courant laisse toujours l'instantané
+    précédent ou le nouveau, jamais un mélange.
+    Les mots de passe ne sont jamais écrits.
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        previous = _read_meta(directory)
+        token = uuid.uuid4().hex[:12]
+        files = {
+            'matrix': f"matrix-{token}.npy",
+            'ids': f"ids-{token}.npy",
+            'templates': f"templates-{token}.npy",
+            'index': f"index-{token}.npz"
+        }
+
+        index_state = gallery.index.get_state(gallery.live_rows())
+        _write_synced(os.path.join(directory, files['matrix']),
+                      lambda handle: np.save(handle, np.ascontiguousarray(gallery.matrix)))
+        _write_synced(os.path.join(directory, files['ids']), lambda handle: np.save(handle, gallery.ids))
+        _write_synced(os.path.join(directory, files['templates']), lambda handle: np.save(handle, gallery.templates))
+        _write_synced(os.path.join(directory, files['index']), lambda handle: np.savez(handle, **index_state))
+
+        meta = {
+            'format': SNAPSHOT_FORMAT_VERSION,
+            'model': EMBEDDING_MODELS[ENCODING_MODEL],
+            'dim': gallery.dim,
+            'count': len(gallery),
+            'index': gallery.index.name,
+            'watermark': watermark.isoformat() if watermark else None,
+            'files': files,
+            'names': [str(name) for name in gallery.names]
+        }
+        temp_path = os.path.join(directory, f"{META_FILE}.{token}.tmp")
+        _write_synced(temp_path, lambda handle: handle.write(json.dumps(meta).encode('utf-8')))
+        os.replace(temp_path, os.path.join(directory, META_FILE))
+        _sync_directory(directory)
+
+        # Fichiers de l'instantané précédent devenus inutiles
+        for name in (previous or {}).get('files', {}).values():
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+        logger.log_info(f"✅ Instantané de galerie écrit: {len(gallery)} profil(s)")
+        return True
+
+    except Exception as e:
+        logger.log_error(f"❌ Erreur écriture instantané de galerie: {e}")
+        return False
+
+
+def _write_synced(path: str, write):
+    """Écrire un fichier via write(handle) et attendre qu'il soit sur disque"""
+    with open(path, 'wb') as handle:
+        write(handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _sync_directory(directory: str):
+    """Rendre durables les créations et renommages du répertoire (sans objet sous Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_meta(directory: str) -> Optional[dict]:
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def load_snapshot(directory: str, dim: int, index: GalleryIndex = None, min_index_size: int = 0,
+                  **options) -> Optional[Tuple[FaceGallery, Optional[datetime]]]:
+    """
+    Mapper l'instantané en mémoire (copie sur écriture, rien n'est relu en entier)
+
+    Returns:
+        (galerie, watermark) ou None si absent, d'un autre format ou incohérent
+    """
+    try:
+        meta = _read_meta(directory)
+        if meta is None:
+            return None
+        if (meta.get('format') != SNAPSHOT_FORMAT_VERSION
+                or meta.get('model') != EMBEDDING_MODELS[ENCODING_MODEL]
+                or meta.get('dim') != dim):
+            logger.log_warning("Instantané de galerie d'un autre format, ignoré")
+            return None
+
+        files = meta['files']
+        matrix = np.load(os.path.join(directory, files['matrix']), mmap_mode='c')
+        ids = np.load(os.path.join(directory, files['ids']))
+        templates = np.load(os.path.join(directory, files['templates']))
+        count = meta['count']
+        if (matrix.shape != (count, dim) or ids.shape != (count,) or templates.shape != (count,)
+                or len(meta['names']) != count):
+            logger.log_warning("Instantané de galerie incohérent, ignoré")
+            return None
+
+        gallery = FaceGallery.restore(matrix, ids, meta['names'], templates,
+                                      index=index, min_index_size=min_index_size, **options)
+        if index is not None and meta.get('index') == index.name:
+            with np.load(os.path.join(directory, files['index'])) as state:
+                index.set_state(dict(state), count)
+        if count >= min_index_size and not gallery.index.is_ready():
+            gallery.rebuild_index()
+
+        watermark = meta.get('watermark')
+        return gallery, datetime.fromisoformat(watermark) if watermark else None
+
+    except Exception as e:
+        logger.log_error(f"❌ Erreur lecture instantané de galerie: {e}")
+        return None
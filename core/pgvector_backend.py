@@ -0,0 +1,198 @@
+"""Recherche du plus proche visage côté PostgreSQL (extension pgvector)"""
+import numpy as np
+from typing import List, Optional, Tuple
+from psycopg2.extras import execute_values
+from config.settings import (
+    PGVECTOR_INDEX,
+    PGVECTOR_EF_SEARCH,
+    PGVECTOR_PROBES,
+    MAX_TEMPLATES_PER_PERSON,
+    TEMPLATE_AGGREGATION,
+    TEMPLATE_TOP_K
+)
+from core.gallery import best_identity
+from database.connection import DatabaseConnection
+from services.profile_service import vector_literal
+from utils.encryption import EncryptionManager
+from utils.logger import Logger
+
+logger = Logger()
+
+# ((personne_id, username, password), distance agrégée, marge) ; seuils appliqués par le moteur
+Match = Tuple[Tuple[int, str, Optional[str]], float, float]
+
+# Assez de modèles pour que la 2e identité figure parmi les candidats
+CANDIDATES = MAX_TEMPLATES_PER_PERSON + 1
+
+
+class PgVectorRecognizer:
+    """
+    Recherche de la meilleure identité sans galerie en RAM
+
+    Les embeddings sont dupliqués dans face_profiles.embedding_vec
+    (vector(128)) indexé en HNSW ou IVFFlat ; une reconnaissance est une
+    seule requête top-k (meilleure identité + marge).
+    """
+
+    def __init__(self, db: DatabaseConnection, dim: int = 128):
+        self.db = db
+        self.dim = dim
+
+    def ensure_schema(self) -> bool:
+        """Créer l'extension, la colonne vector et l'index ANN, puis remplir la colonne"""
+        cursor = self.db.cursor
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            cursor.execute(f"ALTER TABLE face_profiles ADD COLUMN IF NOT EXISTS embedding_vec vector({self.dim})")
+            if PGVECTOR_INDEX == 'ivfflat':
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_face_profiles_embedding_vec ON face_profiles "
+                    "USING ivfflat (embedding_vec vector_l2_ops) WITH (lists = 100)"
+                )
+            else:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_face_profiles_embedding_vec ON face_profiles "
+                    "USING hnsw (embedding_vec vector_l2_ops)"
+                )
+            self.db.connection.commit()
+            self.backfill()
+            return True
+        except Exception as e:
+            self.db.connection.rollback()
+            logger.log_error(f"❌ Erreur initialisation pgvector: {e}")
+            return False
+
+    def backfill(self, batch_size: int = 1000) -> int:
+        """Copier les embeddings binaires sans vecteur dans embedding_vec"""
+        cursor = self.db.cursor
+        cursor.execute(
+            "SELECT profile_id, embedding FROM face_profiles "
+            "WHERE embedding IS NOT NULL AND embedding_vec IS NULL"
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        matrix = EncryptionManager.decode_embeddings([row[1] for row in rows])
+        execute_values(
+            cursor,
+            """
+            UPDATE face_profiles AS fp SET embedding_vec = data.vec::vector
+            FROM (VALUES %s) AS data (profile_id, vec)
+            WHERE fp.profile_id = data.profile_id
+            """,
+            [(row[0], vector_literal(vector)) for row, vector in zip(rows, matrix)],
+            page_size=batch_size
+        )
+        self.db.connection.commit()
+        logger.log_info(f"✅ pgvector: {len(rows)} embedding(s) indexé(s)")
+        return len(rows)
+
+    def _set_search_params(self):
+        if PGVECTOR_INDEX == 'ivfflat':
+            self.db.cursor.execute(f"SET ivfflat.probes = {int(PGVECTOR_PROBES)}")
+        else:
+            self.db.cursor.execute(f"SET hnsw.ef_search = {int(PGVECTOR_EF_SEARCH)}")
+
+    @staticmethod
+    def _best(candidates: List[Tuple]) -> Optional[Match]:
+        """
+        Meilleure identité des candidats (+ marge avec la 2e)
+
+        Les candidats sont des modèles triés par distance ; le score d'une
+        personne agrège ses modèles comme la galerie en mémoire
+        (best_identity). Les seuils sont appliqués par le moteur.
+        """
+        if not candidates:
+            return None
+        best, distance, margin = best_identity(
+            [row[0] for row in candidates], [float(row[3]) for row in candidates],
+            TEMPLATE_AGGREGATION, TEMPLATE_TOP_K
+        )
+        personne_id, username, password, _ = candidates[best]
+        return (personne_id, username, password), distance, margin
+
+    def match(self, face_encoding: np.ndarray) -> Optional[Match]:
+        """Meilleure identité pour un visage (une requête top-k sur l'index ANN)"""
+        try:
+            self._set_search_params()
+            probe = vector_literal(face_encoding)
+            self.db.cursor.execute(
+                """
+                SELECT fp.personne_id, p.username, p.password, fp.embedding_vec <-> %s::vector AS distance
+                FROM face_profiles fp
+                INNER JOIN personne p ON p.personne_id = fp.personne_id
+                WHERE p.is_active = TRUE AND fp.embedding_vec IS NOT NULL
+                ORDER BY fp.embedding_vec <-> %s::vector
+                LIMIT %s
+                """,
+                (probe, probe, CANDIDATES)
+            )
+            return self._best(self.db.cursor.fetchall())
+
+        except Exception as e:
+            self.db.connection.rollback()
+            logger.log_error(f"❌ Erreur reconnaissance pgvector: {e}")
+            return None
+
+    def match_batch(self, face_encodings: List[np.ndarray]) -> List[Optional[Match]]:
+        """Meilleure identité de plusieurs visages en une requête (LATERAL top-k par sonde)"""
+        if len(face_encodings) == 0:
+            return []
+
+        try:
+            self._set_search_params()
+            probes = [(i, vector_literal(encoding)) for i, encoding in enumerate(face_encodings)]
+            rows = execute_values(
+                self.db.cursor,
+                f"""
+                SELECT q.idx, m.personne_id, m.username, m.password, m.distance
+                FROM (VALUES %s) AS q (idx, vec)
+                CROSS JOIN LATERAL (
+                    SELECT fp.personne_id, p.username, p.password,
+                           fp.embedding_vec <-> q.vec::vector AS distance
+                    FROM face_profiles fp
+                    INNER JOIN personne p ON p.personne_id = fp.personne_id
+                    WHERE p.is_active = TRUE AND fp.embedding_vec IS NOT NULL
+                    ORDER BY fp.embedding_vec <-> q.vec::vector
+                    LIMIT {CANDIDATES}
+                ) AS m
+                ORDER BY q.idx, m.distance
+                """,
+                probes,
+                fetch=True
+            )
+
+            candidates = [[] for _ in face_encodings]
+            for idx, personne_id, username, password, distance in rows:
+                candidates[idx].append((personne_id, username, password, distance))
+            return [self._best(per_probe) for per_probe in candidates]
+
+        except Exception as e:
+            self.db.connection.rollback()
+            logger.log_error(f"❌ Erreur reconnaissance batch pgvector: {e}")
+            return [None] * len(face_encodings)
+
+    def count(self) -> int:
+        """Nombre de personnes actives indexées (comme FaceGallery.people_count)"""
+        result = self.db.execute_query(
+            """
+            SELECT COUNT(DISTINCT fp.personne_id) FROM face_profiles fp
+            INNER JOIN personne p ON p.personne_id = fp.personne_id
+            WHERE p.is_active = TRUE AND fp.embedding_vec IS NOT NULL
+            """
+        )
+        return result[0][0] if result else 0
+
+    def credentials(self) -> List[Tuple[int, str, Optional[str]]]:
+        """(personne_id, username, password) des personnes actives ayant un visage enregistré (repli PIN)"""
+        result = self.db.execute_query(
+            """
+            SELECT DISTINCT p.personne_id, p.username, p.password
+            FROM personne p
+            INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id
+            WHERE p.is_active = TRUE AND fp.embedding IS NOT NULL
+            ORDER BY p.personne_id
+            """
+        )
+        return [tuple(row) for row in result or []]
@@ -0,0 +1,303 @@
+"""Pool de processus de reconnaissance (frames et galerie en mémoire partagée)"""
+import multiprocessing as mp
+import queue
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+from config.settings import (
+    RECOGNITION_WORKERS,
+    WORKER_SLOTS_PER_WORKER,
+    FRAME_WIDTH,
+    FRAME_HEIGHT,
+    TEMPLATE_AGGREGATION,
+    TEMPLATE_TOP_K
+)
+from utils.logger import Logger
+
+logger = Logger()
+
+
+def _gallery_views(buffer, count: int, dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Disposition de la galerie partagée : ids int64 | matrice float32 | normes float32"""
+    ids = np.ndarray((count,), dtype=np.int64, buffer=buffer)
+    matrix = np.ndarray((count, dim), dtype=np.float32, buffer=buffer, offset=count * 8)
+    norms = np.ndarray((count,), dtype=np.float32, buffer=buffer, offset=count * 8 + count * dim * 4)
+    return matrix, norms, ids
+
+
+def _worker_main(worker_id: int, tasks, results, frames_name: str, frames_shape: Tuple[int, ...]):
+    """Boucle d'un processus : détection + encodage + recherche dans la galerie partagée"""
+    from core.face_recognition import FaceRecognitionEngine
+    from core.gallery import FaceGallery
+
+    engine = FaceRecognitionEngine()  # modèles chargés et préchauffés une fois par processus
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    frames = np.ndarray(frames_shape, dtype=np.uint8, buffer=frames_shm.buf)
+    gallery_shm = None
+    version = -1
+
+    try:
+        while True:
+            message = tasks.get()
+            if message is None:
+                break
+
+            if message[0] == 'gallery':
+                _, name, count, dim, version = message
+                engine.gallery = FaceGallery(dim=dim, initial_capacity=0)
+                if gallery_shm is not None:
+                    gallery_shm.close()
+                    gallery_shm = None
+                if count:
+                    try:
+                        gallery_shm = shared_memory.SharedMemory(name=name)
+                    except FileNotFoundError:
+                        # Segment déjà remplacé : le message de la galerie suivante est dans la file,
+                        # d'ici là les résultats (version -1) sont recherchés par le processus principal
+                        version = -1
+                        continue
+                    engine.gallery = FaceGallery.attach(
+                        *_gallery_views(gallery_shm.buf, count, dim),
+                        aggregation=TEMPLATE_AGGREGATION,
+                        top_k=TEMPLATE_TOP_K
+                    )
+                continue
+
+            _, task_id, slot, (height, width) = message
+            frame = frames[slot, :height, :width]
+            locations = engine.locate_faces(frame)
+            encodings = engine.encode_probes(frame, locations) if locations else []
+            matches = None
+            if len(encodings) and len(engine.gallery):
+                matches = engine.gallery.match_batch(np.asarray(encodings), exact=True)
+            results.put((task_id, worker_id, version, locations, [np.asarray(e) for e in encodings], matches))
+    finally:
+        if gallery_shm is not None:
+            gallery_shm.close()
+        frames_shm.close()
+
+
+class WorkerResult:
+    """Résultat d'une frame traitée par un processus"""
+
+    __slots__ = ('task_id', 'gallery_version', 'locations', 'encodings', 'matches')
+
+    def __init__(self, task_id: int, gallery_version: int, locations: List, encodings: List, matches):
+        self.task_id = task_id
+        self.gallery_version = gallery_version
+        self.locations = locations
+        self.encodings = encodings
+        self.matches = matches  # (lignes, distances, marges) ou None
+
+
+class RecognitionWorkerPool:
+    """
+    N processus tenant chacun les modèles de détection/encodage
+
+    Les frames sont copiées dans des tampons de mémoire partagée (slots),
+    la galerie est publiée une fois en mémoire partagée et lue par tous
+    les processus sans copie. Les résultats sont rendus dans l'ordre de
+    soumission ; un processus mort est relancé et ses frames renvoyées.
+    """
+
+    def __init__(self, n_workers: int = RECOGNITION_WORKERS,
+                 frame_shape: Tuple[int, int, int] = (FRAME_HEIGHT, FRAME_WIDTH, 3),
+                 slots_per_worker: int = WORKER_SLOTS_PER_WORKER):
+        if n_workers is None:
+            n_workers = mp.cpu_count() - 1
+        if n_workers < 1:
+            raise ValueError(f"Pool de reconnaissance sans processus (n_workers={n_workers})")
+        self.n_workers = n_workers
+        self.frame_shape = frame_shape
+        self.n_slots = self.n_workers * max(1, slots_per_worker)
+        self._ctx = mp.get_context('spawn')
+
+        self._frames_shm: Optional[shared_memory.SharedMemory] = None
+        self._frames: Optional[np.ndarray] = None
+        self._gallery_shm: Optional[shared_memory.SharedMemory] = None
+        self._gallery_message = ('gallery', '', 0, 128, -1)
+        self.gallery_version = -1
+
+        self._workers: List[Optional[mp.Process]] = []
+        self._queues: List = []
+        self._results = None
+        self._free_slots: List[int] = []
+        self._inflight: Dict[int, Tuple[int, int, Tuple[int, int]]] = {}  # task -> (worker, slot, taille)
+        self._done: Dict[int, WorkerResult] = {}
+        self._next_task = 0
+        self._next_result = 0
+
+        # Statistiques
+        self.restarts = 0
+        self.completed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._frames_shm is not None
+
+    def start(self):
+        """Créer les tampons partagés et lancer les processus"""
+        if self.is_running:
+            return
+        size = int(np.prod((self.n_slots,) + self.frame_shape))
+        self._frames_shm = shared_memory.SharedMemory(create=True, size=size)
+        self._frames = np.ndarray((self.n_slots,) + self.frame_shape, dtype=np.uint8, buffer=self._frames_shm.buf)
+        self._free_slots = list(range(self.n_slots))
+        self._results = self._ctx.Queue()
+        self._workers = [None] * self.n_workers
+        self._queues = [None] * self.n_workers
+        for worker_id in range(self.n_workers):
+            self._spawn(worker_id)
+        logger.log_info(f"✅ Pool de reconnaissance: {self.n_workers} processus, {self.n_slots} tampon(s)")
+
+    def _spawn(self, worker_id: int):
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, tasks, self._results, self._frames_shm.name, self._frames.shape),
+            name=f"recognition-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = process
+        self._queues[worker_id] = tasks
+        tasks.put(self._gallery_message)
+
+    def stop(self, timeout: float = 2.0):
+        """Arrêter les processus et libérer la mémoire partagée"""
+        if not self.is_running:
+            return
+        for tasks in self._queues:
+            tasks.put(None)
+        for process in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+        self._frames = None
+        self._frames_shm.close()
+        self._frames_shm.unlink()
+        self._frames_shm = None
+        self._release_gallery()
+        self._inflight.clear()
+        self._done.clear()
+        logger.log_info(f"Pool de reconnaissance arrêté ({self.completed} frame(s), {self.restarts} relance(s))")
+
+    def _release_gallery(self):
+        if self._gallery_shm is not None:
+            self._gallery_shm.close()
+            self._gallery_shm.unlink()
+            self._gallery_shm = None
+
+    def publish_gallery(self, gallery):
+        """Copier la galerie en mémoire partagée (une fois pour tous les processus)"""
+        count, dim = len(gallery), gallery.dim
+        old = self._gallery_shm
+        name = ''
+        if count:
+            self._gallery_shm = shared_memory.SharedMemory(create=True, size=count * (8 + dim * 4 + 4))
+            matrix, norms, ids = _gallery_views(self._gallery_shm.buf, count, dim)
+            matrix[:] = gallery.matrix
+            norms[:] = np.einsum('ij,ij->i', matrix, matrix)
+            ids[:] = gallery.ids
+            name = self._gallery_shm.name
+        else:
+            self._gallery_shm = None
+
+        self.gallery_version = gallery.version
+        self._gallery_message = ('gallery', name, count, dim, gallery.version)
+        for tasks in self._queues:
+            tasks.put(self._gallery_message)
+
+        # Les processus déjà projetés gardent leur projection jusqu'au message suivant ;
+        # ceux qui n'ont pas encore lu l'ancien message passent directement au nouveau
+        if old is not None:
+            old.close()
+            old.unlink()
+        logger.log_debug(f"Galerie publiée: {count} profil(s) (version {gallery.version})")
+
+    def submit(self, frame: np.ndarray) -> int:
+        """
+        Envoyer une frame à un processus (bloque si tous les tampons sont pris)
+
+        Returns:
+            Identifiant de la tâche (les résultats suivent cet ordre)
+        """
+        height, width = frame.shape[:2]
+        if height > self.frame_shape[0] or width > self.frame_shape[1] or frame.shape[2:] != self.frame_shape[2:]:
+            raise ValueError(f"Frame {frame.shape} plus grande que les tampons partagés {self.frame_shape}")
+
+        while not self._free_slots:
+            self._pump(0.1)
+
+        slot = self._free_slots.pop()
+        self._frames[slot, :height, :width] = frame
+        task_id = self._next_task
+        self._next_task += 1
+
+        # Processus le moins chargé
+        load = [0] * self.n_workers
+        for worker_id, _, _ in self._inflight.values():
+            load[worker_id] += 1
+        worker_id = int(np.argmin(load))
+
+        self._inflight[task_id] = (worker_id, slot, (height, width))
+        self._queues[worker_id].put(('frame', task_id, slot, (height, width)))
+        return task_id
+
+    def get(self, timeout: float = None) -> Optional[WorkerResult]:
+        """Résultat suivant dans l'ordre de soumission (None si timeout ou rien en attente)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._next_result not in self._done:
+            if self._next_result not in self._inflight:
+                return None
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if remaining <= 0:
+                return None
+            self._pump(remaining)
+
+        result = self._done.pop(self._next_result)
+        self._next_result += 1
+        return result
+
+    def pending(self) -> int:
+        """Frames soumises dont le résultat n'a pas encore été lu"""
+        return self._next_task - self._next_result
+
+    def _pump(self, timeout: float):
+        """Récupérer les résultats disponibles et surveiller les processus"""
+        try:
+            message = self._results.get(timeout=max(timeout, 0.001))
+        except queue.Empty:
+            self._check_workers()
+            return
+
+        task_id, _, version, locations, encodings, matches = message
+        entry = self._inflight.pop(task_id, None)
+        if entry is None:
+            return  # doublon d'une tâche renvoyée après relance
+        self._free_slots.append(entry[1])
+        self._done[task_id] = WorkerResult(task_id, version, locations, encodings, matches)
+        self.completed += 1
+
+    def _check_workers(self):
+        """Relancer les processus morts et leur renvoyer leurs frames"""
+        for worker_id, process in enumerate(self._workers):
+            if process.is_alive():
+                continue
+            logger.log_warning(f"⚠️ Processus {worker_id} arrêté (code {process.exitcode}), relance")
+            self.restarts += 1
+            self._spawn(worker_id)
+            for task_id, (owner, slot, size) in sorted(self._inflight.items()):
+                if owner == worker_id:
+                    self._queues[worker_id].put(('frame', task_id, slot, size))
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.n_workers,
+            'completed': self.completed,
+            'pending': self.pending(),
+            'restarts': self.restarts,
+            'gallery_version': self.gallery_version
+        }
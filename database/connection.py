@@ -29,6 +29,20 @@ class DatabaseConnection:
         self.cursor = None
         self._setup_pool()
 
+    @classmethod
+    def dedicated(cls) -> 'DatabaseConnection':
+        """
+        Connexion propre hors singleton et hors pool (threads d'arrière-plan)
+
+        Le curseur du singleton n'est pas partagé entre threads.
+        """
+        instance = object.__new__(cls)
+        instance._initialized = True
+        instance._pool = None
+        instance.connection = None
+        instance.cursor = None
+        return instance
+
     def _setup_pool(self):
         """Configurer le pool de connexions"""
         try:
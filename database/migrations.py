@@ -0,0 +1,311 @@
+"""Migrations du schéma de la base de données"""
+import sys
+import numpy as np
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from config.settings import GALLERY_NOTIFY_CHANNEL, ACCESS_NOTIFY_CHANNEL
+from database.connection import DatabaseConnection
+from utils.encryption import (
+    EncryptionManager,
+    EMBEDDING_MAGIC,
+    EMBEDDING_FORMAT_VERSION,
+    EMBEDDING_MODEL_DLIB_RESNET,
+    embedding_record_dtype
+)
+from utils.logger import Logger
+
+logger = Logger()
+
+
+def column_type(db: DatabaseConnection, table: str, column: str):
+    """Type SQL d'une colonne (None si elle n'existe pas)"""
+    result = db.execute_query(
+        """
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND column_name = %s
+        """,
+        (table, column)
+    )
+    return result[0][0] if result else None
+
+
+def encode_embeddings_bulk(matrix: np.ndarray) -> list:
+    """Encoder une matrice (n x dim) en blobs binaires versionnés, en une passe"""
+    count, dim = matrix.shape
+    records = np.zeros(count, dtype=embedding_record_dtype(dim))
+    records['magic'] = EMBEDDING_MAGIC
+    records['version'] = EMBEDDING_FORMAT_VERSION
+    records['model'] = EMBEDDING_MODEL_DLIB_RESNET
+    records['dim'] = dim
+    records['vector'] = matrix
+    raw = records.tobytes()
+    size = records.dtype.itemsize
+    return [raw[i * size:(i + 1) * size] for i in range(count)]
+
+
+def migrate_embeddings_to_binary(db: DatabaseConnection, batch_size: int = 1000) -> int:
+    """
+    Convertir face_profiles.embedding du texte (virgules) vers bytea float32
+
+    Tout est fait dans une transaction : colonne temporaire, conversion
+    vectorisée de toutes les lignes, puis remplacement de l'ancienne colonne.
+
+    Returns:
+        Nombre de profils convertis (0 si déjà migré)
+    """
+    current = column_type(db, 'face_profiles', 'embedding')
+    if current is None or current == 'bytea':
+        return 0
+
+    cursor = db.cursor
+    try:
+        cursor.execute("ALTER TABLE face_profiles ADD COLUMN IF NOT EXISTS embedding_bin BYTEA")
+        cursor.execute("SELECT profile_id, embedding FROM face_profiles WHERE embedding IS NOT NULL AND embedding <> ''")
+        rows = cursor.fetchall()
+
+        if rows:
+            profile_ids = [row[0] for row in rows]
+            texts = [row[1] for row in rows]
+            # Une seule analyse pour toutes les lignes si elles ont la même dimension
+            dims = {text.count(',') + 1 for text in texts}
+            if len(dims) == 1:
+                matrix = np.array(','.join(texts).split(','), dtype=np.float64).reshape(len(texts), dims.pop())
+            else:
+                matrix = EncryptionManager.decode_embeddings(texts)
+            blobs = encode_embeddings_bulk(matrix.astype(np.float32))
+
+            execute_values(
+                cursor,
+                """
+                UPDATE face_profiles AS fp SET embedding_bin = data.blob
+                FROM (VALUES %s) AS data (profile_id, blob)
+                WHERE fp.profile_id = data.profile_id
+                """,
+                list(zip(profile_ids, blobs)),
+                page_size=batch_size
+            )
+
+        cursor.execute("ALTER TABLE face_profiles DROP COLUMN embedding")
+        cursor.execute("ALTER TABLE face_profiles RENAME COLUMN embedding_bin TO embedding")
+        db.connection.commit()
+        logger.log_info(f"✅ Migration embeddings: {len(rows)} profil(s) convertis en binaire")
+        return len(rows)
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur migration embeddings: {e}")
+        raise
+
+
+def ensure_profile_updated_at(db: DatabaseConnection) -> int:
+    """
+    Garantir face_profiles.updated_at renseigné à chaque écriture
+
+    Sert de watermark à l'instantané de galerie : colonne par défaut NOW(),
+    lignes sans date remplies, index pour les lectures incrémentales.
+    """
+    cursor = db.cursor
+    try:
+        cursor.execute("ALTER TABLE face_profiles ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP")
+        cursor.execute("ALTER TABLE face_profiles ALTER COLUMN updated_at SET DEFAULT NOW()")
+        cursor.execute("UPDATE face_profiles SET updated_at = NOW() WHERE updated_at IS NULL")
+        filled = cursor.rowcount
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_face_profiles_updated_at ON face_profiles (updated_at)"
+        )
+        db.connection.commit()
+        if filled:
+            logger.log_info(f"✅ Migration updated_at: {filled} profil(s) datés")
+        return filled
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur migration updated_at: {e}")
+        raise
+
+
+def install_gallery_notify_triggers(db: DatabaseConnection) -> int:
+    """
+    Notifier GALLERY_NOTIFY_CHANNEL (payload: personne_id) à chaque changement de galerie
+
+    personne : changement d'état actif, de nom, de mot de passe ou suppression.
+    face_profiles : création, modification ou suppression d'un profil.
+    """
+    cursor = db.cursor
+    try:
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_gallery_change() RETURNS trigger AS $$
+            DECLARE
+                changed_id INTEGER;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    changed_id := OLD.personne_id;
+                ELSE
+                    changed_id := NEW.personne_id;
+                END IF;
+                PERFORM pg_notify(TG_ARGV[0], changed_id::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute("DROP TRIGGER IF EXISTS trg_personne_gallery ON personne")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER trg_personne_gallery
+            AFTER UPDATE OF is_active, username, password OR DELETE ON personne
+            FOR EACH ROW EXECUTE PROCEDURE notify_gallery_change('{GALLERY_NOTIFY_CHANNEL}')
+            """
+        )
+        cursor.execute("DROP TRIGGER IF EXISTS trg_face_profiles_gallery ON face_profiles")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER trg_face_profiles_gallery
+            AFTER INSERT OR UPDATE OR DELETE ON face_profiles
+            FOR EACH ROW EXECUTE PROCEDURE notify_gallery_change('{GALLERY_NOTIFY_CHANNEL}')
+            """
+        )
+        db.connection.commit()
+        return 0
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur installation des triggers de galerie: {e}")
+        raise
+
+
+def allow_multiple_templates(db: DatabaseConnection) -> int:
+    """
+    Autoriser plusieurs profils (modèles) par personne dans face_profiles
+
+    Supprime les contraintes d'unicité portant uniquement sur personne_id
+    et indexe la colonne pour les lectures par personne.
+
+    Returns:
+        Nombre de contraintes supprimées
+    """
+    cursor = db.cursor
+    try:
+        cursor.execute(
+            """
+            SELECT c.conname FROM pg_constraint c
+            INNER JOIN pg_class t ON t.oid = c.conrelid
+            INNER JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(c.conkey)
+            WHERE t.relname = 'face_profiles' AND c.contype = 'u'
+              AND array_length(c.conkey, 1) = 1 AND a.attname = 'personne_id'
+            """
+        )
+        constraints = [row[0] for row in cursor.fetchall()]
+        for name in constraints:
+            cursor.execute(sql.SQL("ALTER TABLE face_profiles DROP CONSTRAINT {}").format(sql.Identifier(name)))
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_face_profiles_personne_id ON face_profiles (personne_id)"
+        )
+        db.connection.commit()
+        if constraints:
+            logger.log_info("✅ Migration modèles multiples: unicité par personne supprimée")
+        return len(constraints)
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur migration modèles multiples: {e}")
+        raise
+
+
+def index_access_log_keyset(db: DatabaseConnection) -> int:
+    """
+    Index de la pagination keyset des logs d'accès
+
+    (horaire, access_id) sert l'ordre du plus récent au plus ancien et la
+    condition (horaire, access_id) < curseur sans tri ni parcours.
+
+    Returns:
+        0 (index créé s'il manquait)
+    """
+    cursor = db.cursor
+    try:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_acces_log_horaire_access_id ON acces_log (horaire, access_id)"
+        )
+        db.connection.commit()
+        return 0
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur index logs d'accès: {e}")
+        raise
+
+
+def install_access_notify_trigger(db: DatabaseConnection) -> int:
+    """
+    Notifier ACCESS_NOTIFY_CHANNEL (payload: access_id) à chaque décision enregistrée
+
+    NOTIFY n'est délivré qu'à la validation : toutes les applications
+    (web, Tkinter) réveillent le flux d'événements, dans l'ordre des commits.
+    """
+    cursor = db.cursor
+    try:
+        cursor.execute(
+            """
+            CREATE OR REPLACE FUNCTION notify_access_event() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(TG_ARGV[0], NEW.access_id::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        cursor.execute("DROP TRIGGER IF EXISTS trg_acces_log_events ON acces_log")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER trg_acces_log_events
+            AFTER INSERT ON acces_log
+            FOR EACH ROW EXECUTE PROCEDURE notify_access_event('{ACCESS_NOTIFY_CHANNEL}')
+            """
+        )
+        db.connection.commit()
+        return 0
+
+    except Exception as e:
+        db.connection.rollback()
+        logger.log_error(f"❌ Erreur installation du trigger des événements d'accès: {e}")
+        raise
+
+
+MIGRATIONS = [
+    ('embeddings_binaires', migrate_embeddings_to_binary),
+    ('profils_updated_at', ensure_profile_updated_at),
+    ('triggers_galerie', install_gallery_notify_triggers),
+    ('modeles_multiples', allow_multiple_templates),
+    ('index_logs_keyset', index_access_log_keyset),
+    ('trigger_evenements_acces', install_access_notify_trigger),
+]
+
+
+def run_migrations(db: DatabaseConnection) -> bool:
+    """
+    Appliquer les migrations en attente (idempotentes), dans l'ordre
+
+    S'arrête à la première migration en échec (chacune est annulée par
+    rollback, les suivantes peuvent dépendre d'elle) : l'appelant ne doit
+    pas démarrer sur un schéma à moitié migré.
+
+    Returns:
+        True si toutes les migrations sont appliquées
+    """
+    for name, migration in MIGRATIONS:
+        try:
+            migration(db)
+        except Exception as e:
+            logger.log_critical(f"❌ Migration {name} échouée, démarrage interrompu: {e}")
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    database = DatabaseConnection()
+    if database.connect():
+        ok = run_migrations(database)
+        database.disconnect()
+        sys.exit(0 if ok else 1)
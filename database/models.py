@@ -52,7 +52,7 @@ class FaceProfile:
     """Modèle pour la table face_profiles"""
 
     def __init__(self, profile_id: int = None, personne_id: int = None,
-                 embedding: str = None, image_url: str = None):
+                 embedding: bytes = None, image_url: str = None):
         self.profile_id = profile_id
         self.personne_id = personne_id
         self.embedding = embedding
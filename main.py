@@ -4,6 +4,7 @@
 import sys
 import os
 from database.connection import DatabaseConnection
+from database.migrations import run_migrations
 from core.face_recognition import FaceRecognitionEngine
 from core.authentication import AuthenticationManager
 from core.antispoofing import AntiSpoofingDetector
@@ -12,6 +13,7 @@ from services.user_service import UserService
 from services.profile_service import ProfileService
 from ui.main_window import MainWindow
 from utils.logger import Logger
+from config.settings import RECOGNITION_BACKEND, GALLERY_SNAPSHOT_ENABLED, GALLERY_LISTENER_ENABLED
 import tkinter as tk
 from tkinter import messagebox
 
@@ -35,6 +37,9 @@ class FaceRecognitionApp:
         if not self.db.connect():
             logger.log_critical("ERREUR: Impossible de se connecter à la base de données")
             sys.exit(1)
+        if not run_migrations(self.db):
+            logger.log_critical("ERREUR: Migration du schéma impossible - démarrage annulé")
+            sys.exit(1)
 
         # Initialiser les services
         logger.log_info("Initialisation des services...")
@@ -48,8 +53,11 @@ class FaceRecognitionApp:
         self.auth_manager = AuthenticationManager()
         self.antispoof_detector = AntiSpoofingDetector()
 
-        # Charger les profils
-        self.load_profiles()
+        # Charger les profils (inutile si la recherche se fait dans PostgreSQL)
+        if not (RECOGNITION_BACKEND == 'pgvector' and self.face_engine.use_pgvector(self.db)):
+            self.load_profiles()
+            if GALLERY_LISTENER_ENABLED:
+                self.face_engine.start_gallery_listener()
 
         # Fenêtre principale de sélection de mode
         self.root = None
@@ -67,21 +75,15 @@ class FaceRecognitionApp:
         """Charger tous les profils actifs depuis la base de données"""
         logger.log_info("Chargement des profils faciaux...")
         try:
-            query = """
-                SELECT p.personne_id, p.username, p.password, fp.embedding 
-                FROM personne p 
-                INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id 
-                WHERE p.is_active = TRUE
-            """
-            results = self.db.execute_query(query)
-            if not results:
+            if GALLERY_SNAPSHOT_ENABLED:
+                loaded = self.face_engine.warm_start(self.profile_service)
+            else:
+                loaded = self.face_engine.load_gallery(
+                    self.profile_service.iter_gallery(),
+                    self.profile_service.count_gallery()
+                )
+            if loaded == 0:
                 logger.log_warning("Aucun profil trouvé dans la base de données")
-                return
-            for row in results:
-                personne_id, username, password, embedding = row
-                if embedding:
-                    self.face_engine.load_profile(personne_id, username, embedding, password)
-            logger.log_info(f"✓ {len(results)} profil(s) chargé(s) avec succès")
         except Exception as e:
             logger.log_error(f"Erreur lors du chargement des profils: {e}")
 
@@ -265,6 +267,7 @@ class FaceRecognitionApp:
     def cleanup(self):
         """Nettoyer les ressources"""
         logger.log_info("Nettoyage des ressources...")
+        self.face_engine.stop_gallery_listener()
         if self.db:
             self.db.disconnect()
         logger.log_info("=" * 60)
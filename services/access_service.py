@@ -1,5 +1,5 @@
 """Service de gestion des accès et logs"""
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Optional, List, Tuple
 from database.connection import DatabaseConnection
 from database.models import AccesLog, AttemptsCounter, AntiSpoofing
@@ -15,6 +15,20 @@ class AccessService:
         self.db = db
         logger.log_info("Service d'accès initialisé")
 
+    @staticmethod
+    def _event(access_id: int, personne_id: Optional[int], username: Optional[str], access_result: str,
+               access_method: str, similarity_score, horaire) -> dict:
+        """Décision d'accès au format des API (mêmes clés que /api/logs)"""
+        return {
+            'id': access_id,
+            'personne_id': personne_id,
+            'username': username or 'Inconnu',
+            'access_result': access_result or '-',
+            'access_method': access_method or '-',
+            'similarity_score': float(similarity_score) if similarity_score is not None else None,
+            'access_time': str(horaire) if horaire else None
+        }
+
     def log_access_attempt(self, personne_id: Optional[int], access_result: str,
                            access_method: str, image_url: str = None,
                            similarity_score: float = None) -> bool:
@@ -276,4 +290,128 @@ class AccessService:
 
         except Exception as e:
             logger.log_error(f"Erreur récupération logs: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_access_events(self, after_id: int, limit: int = 500) -> List[dict]:
+        """
+        Décisions d'accès postérieures à un curseur (pagination keyset sur access_id)
+
+        Args:
+            after_id: access_id du dernier événement reçu
+            limit: Taille de page
+
+        Returns:
+            Événements triés par access_id croissant (username joint)
+        """
+        try:
+            query = """
+            SELECT a.access_id, a.personne_id, p.username, a.access_result, a.access_method,
+                   a.similarity_score, a.horaire
+            FROM acces_log a
+            LEFT JOIN personne p ON p.personne_id = a.personne_id
+            WHERE a.access_id > %s
+            ORDER BY a.access_id
+            LIMIT %s
+            """
+            results = self.db.execute_query(query, (after_id, limit))
+            return [self._event(*row) for row in results or []]
+
+        except Exception as e:
+            logger.log_error(f"Erreur récupération événements d'accès: {e}")
+            return []
+
+    def get_last_access_id(self) -> int:
+        """Plus grand access_id enregistré (0 si aucun)"""
+        try:
+            result = self.db.execute_query("SELECT COALESCE(MAX(access_id), 0) FROM acces_log")
+            return result[0][0] if result else 0
+        except Exception as e:
+            logger.log_error(f"Erreur récupération dernier accès: {e}")
+            return 0
+
+    def get_access_logs_page(self, limit: int = 100, cursor: Optional[Tuple[datetime, int]] = None,
+                             access_result: str = None, access_method: str = None,
+                             date_from: date = None, date_to: date = None,
+                             username: str = None) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+        """
+        Page de logs d'accès, du plus récent au plus ancien (username joint)
+
+        Pagination keyset sur (horaire, access_id) : chaque page est une
+        lecture d'index, quelle que soit sa profondeur.
+
+        Args:
+            limit: Taille de page
+            cursor: (horaire, access_id) de la dernière ligne de la page précédente
+            access_result: 'GRANTED' / 'DENIED'
+            access_method: 'FACE_ONLY', 'PIN_ONLY', 'FACE_PIN'
+            date_from: Premier jour inclus
+            date_to: Dernier jour inclus
+            username: Partie du nom d'utilisateur (insensible à la casse)
+
+        Returns:
+            Tuple (logs, curseur de la page suivante ou None)
+        """
+        try:
+            conditions, params = [], []
+            if cursor is not None:
+                conditions.append("(a.horaire, a.access_id) < (%s, %s)")
+                params.extend(cursor)
+            if access_result:
+                conditions.append("a.access_result = %s")
+                params.append(access_result)
+            if access_method:
+                conditions.append("a.access_method = %s")
+                params.append(access_method)
+            if date_from:
+                conditions.append("a.horaire >= %s")
+                params.append(date_from)
+            if date_to:
+                conditions.append("a.horaire < %s")
+                params.append(date_to + timedelta(days=1))
+            if username:
+                conditions.append("p.username ILIKE %s")
+                params.append(f"%{username}%")
+
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            query = f"""
+            SELECT a.access_id, a.personne_id, p.username, a.access_result, a.access_method,
+                   a.similarity_score, a.horaire
+            FROM acces_log a
+            LEFT JOIN personne p ON p.personne_id = a.personne_id
+            {where}
+            ORDER BY a.horaire DESC, a.access_id DESC
+            LIMIT %s
+            """
+            # Une ligne de plus pour savoir s'il reste une page
+            results = self.db.execute_query(query, tuple(params) + (limit + 1,)) or []
+
+            rows = results[:limit]
+            next_cursor = (rows[-1][6], rows[-1][0]) if len(results) > limit else None
+            return [self._event(*row) for row in rows], next_cursor
+
+        except Exception as e:
+            logger.log_error(f"Erreur récupération page de logs: {e}")
+            return [], None
+
+    def get_access_stats(self) -> dict:
+        """Totaux des accès par résultat et par méthode (une seule requête)"""
+        try:
+            query = """
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE access_result = 'GRANTED'),
+                   COUNT(*) FILTER (WHERE access_result = 'DENIED'),
+                   COUNT(*) FILTER (WHERE access_method = 'FACE_ONLY'),
+                   COUNT(*) FILTER (WHERE access_method = 'PIN_ONLY')
+            FROM acces_log
+            """
+            total, granted, denied, face_only, pin_only = self.db.execute_query(query)[0]
+        except Exception as e:
+            logger.log_error(f"Erreur statistiques d'accès: {e}")
+            total = granted = denied = face_only = pin_only = 0
+        return {
+            'total_access': total,
+            'granted': granted,
+            'denied': denied,
+            'face_only': face_only,
+            'pin_only': pin_only
+        }
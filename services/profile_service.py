@@ -1,14 +1,31 @@
 """Service de gestion des profils faciaux"""
-from typing import Optional, List
+import uuid
+from datetime import datetime
+from typing import Iterator, Optional, List, Tuple
 from database.connection import DatabaseConnection
 from database.models import FaceProfile
 from utils.logger import Logger
-from utils.encryption import EncryptionManager
+from utils.encryption import EncryptionManager, EMBEDDING_MODELS
+from config.settings import (
+    RECOGNITION_BACKEND,
+    GALLERY_CHUNK_SIZE,
+    MAX_TEMPLATES_PER_PERSON,
+    TEMPLATE_PRUNING,
+    ENCODING_MODEL
+)
 import numpy as np
 
 logger = Logger()
 
 
+def vector_literal(embedding: np.ndarray) -> str:
+    """Littéral pgvector '[x1,x2,...]'"""
+    return '[' + ','.join(f'{x:.7g}' for x in np.asarray(embedding, dtype=np.float32).reshape(-1)) + ']'
+
+# Colonnes lues par FaceProfile.from_db_row (ordre indépendant du schéma physique)
+PROFILE_COLUMNS = "profile_id, personne_id, embedding, image_url"
+
+
 class ProfileService:
     """Service pour gérer les profils faciaux"""
 
@@ -20,7 +37,10 @@ class ProfileService:
     def create_profile(self, personne_id: int, embedding: np.ndarray,
                        image_url: str = None) -> Optional[int]:
         """
-        Créer un profil facial
+        Créer un profil facial (un modèle de plus pour la personne)
+
+        Au-delà de MAX_TEMPLATES_PER_PERSON modèles, un ancien modèle est
+        supprimé selon TEMPLATE_PRUNING ; le nouveau est toujours conservé.
 
         Args:
             personne_id: ID de la personne
@@ -31,24 +51,30 @@ class ProfileService:
             ID du profil créé ou None
         """
         try:
-            # Vérifier si un profil existe déjà
-            existing_profile = self.get_profile_by_user(personne_id)
-            if existing_profile:
-                logger.log_warning(f"Un profil existe déjà pour personne {personne_id}")
-                return None
-
-            # Encoder l'embedding
-            embedding_str = self.encryption.encode_embedding(embedding)
+            # Encoder l'embedding (binaire float32 versionné, repères d'ENCODING_MODEL dans l'en-tête)
+            embedding_blob = self.encryption.encode_embedding(embedding, EMBEDDING_MODELS[ENCODING_MODEL])
 
             # PostgreSQL utilise RETURNING
-            query = """
-            INSERT INTO face_profiles (personne_id, embedding, image_url)
-            VALUES (%s, %s, %s)
-            RETURNING profile_id
-            """
-
-            profile_id = self.db.execute_update(query, (personne_id, embedding_str, image_url))
+            if RECOGNITION_BACKEND == 'pgvector':
+                # Copie vector(128) pour la recherche côté serveur
+                query = """
+                INSERT INTO face_profiles (personne_id, embedding, image_url, embedding_vec)
+                VALUES (%s, %s, %s, %s::vector)
+                RETURNING profile_id
+                """
+                params = (personne_id, embedding_blob, image_url, vector_literal(embedding))
+            else:
+                query = """
+                INSERT INTO face_profiles (personne_id, embedding, image_url)
+                VALUES (%s, %s, %s)
+                RETURNING profile_id
+                """
+                params = (personne_id, embedding_blob, image_url)
+
+            profile_id = self.db.execute_update(query, params)
             logger.log_info(f"Profil créé pour personne {personne_id} (Profile ID: {profile_id})")
+            if profile_id:
+                self.prune_profiles(personne_id, keep=profile_id)
             return profile_id
 
         except Exception as e:
@@ -66,7 +92,7 @@ class ProfileService:
             Objet FaceProfile ou None
         """
         try:
-            query = "SELECT * FROM face_profiles WHERE profile_id = %s"
+            query = f"SELECT {PROFILE_COLUMNS} FROM face_profiles WHERE profile_id = %s"
             result = self.db.execute_query(query, (profile_id,))
 
             if result:
@@ -79,7 +105,7 @@ class ProfileService:
 
     def get_profile_by_user(self, personne_id: int) -> Optional[FaceProfile]:
         """
-        Récupérer le profil d'un utilisateur
+        Récupérer le profil le plus récent d'un utilisateur (voir get_profiles_by_user pour tous ses modèles)
 
         Args:
             personne_id: ID de la personne
@@ -88,7 +114,12 @@ class ProfileService:
             Objet FaceProfile ou None
         """
         try:
-            query = "SELECT * FROM face_profiles WHERE personne_id = %s"
+            query = f"""
+            SELECT {PROFILE_COLUMNS} FROM face_profiles
+            WHERE personne_id = %s
+            ORDER BY updated_at DESC NULLS LAST, profile_id DESC
+            LIMIT 1
+            """
             result = self.db.execute_query(query, (personne_id,))
 
             if result:
@@ -99,6 +130,53 @@ class ProfileService:
             logger.log_error(f"Erreur récupération profil: {e}")
             return None
 
+    def get_profiles_by_user(self, personne_id: int) -> List[FaceProfile]:
+        """Tous les profils (modèles) d'un utilisateur, du plus ancien au plus récent"""
+        try:
+            query = f"SELECT {PROFILE_COLUMNS} FROM face_profiles WHERE personne_id = %s ORDER BY profile_id"
+            results = self.db.execute_query(query, (personne_id,))
+            return [FaceProfile.from_db_row(row) for row in results or []]
+
+        except Exception as e:
+            logger.log_error(f"Erreur récupération profils: {e}")
+            return []
+
+    def prune_profiles(self, personne_id: int, keep: int = None,
+                       max_templates: int = MAX_TEMPLATES_PER_PERSON) -> int:
+        """
+        Ramener les modèles d'une personne à max_templates
+
+        'oldest' supprime les plus anciens ; 'redundant' supprime à chaque
+        fois le modèle le plus proche des autres (celui qui apporte le moins
+        de diversité). Le profil `keep` n'est jamais supprimé.
+
+        Returns:
+            Nombre de profils supprimés
+        """
+        profiles = [profile for profile in self.get_profiles_by_user(personne_id) if profile.embedding]
+        excess = len(profiles) - max_templates
+        if excess <= 0:
+            return 0
+
+        if TEMPLATE_PRUNING == 'redundant':
+            matrix = self.encryption.decode_embeddings([profile.embedding for profile in profiles])
+            distances = np.linalg.norm(matrix[:, None, :] - matrix[None, :, :], axis=2)
+            alive = list(range(len(profiles)))
+            doomed = []
+            for _ in range(excess):
+                candidates = [i for i in alive if profiles[i].profile_id != keep]
+                closeness = {i: distances[i, [j for j in alive if j != i]].mean() for i in candidates}
+                victim = min(closeness, key=closeness.get)
+                alive.remove(victim)
+                doomed.append(profiles[victim])
+        else:
+            doomed = [profile for profile in profiles if profile.profile_id != keep][:excess]
+
+        for profile in doomed:
+            self.delete_profile(profile.profile_id)
+        logger.log_info(f"{len(doomed)} ancien(s) modèle(s) supprimé(s) pour personne {personne_id}")
+        return len(doomed)
+
     def update_profile(self, profile_id: int, embedding: np.ndarray = None,
                        image_url: str = None) -> bool:
         """
@@ -117,9 +195,11 @@ class ProfileService:
             values = []
 
             if embedding is not None:
-                embedding_str = self.encryption.encode_embedding(embedding)
                 fields.append("embedding = %s")
-                values.append(embedding_str)
+                values.append(self.encryption.encode_embedding(embedding, EMBEDDING_MODELS[ENCODING_MODEL]))
+                if RECOGNITION_BACKEND == 'pgvector':
+                    fields.append("embedding_vec = %s::vector")
+                    values.append(vector_literal(embedding))
 
             if image_url is not None:
                 fields.append("image_url = %s")
@@ -178,7 +258,7 @@ class ProfileService:
     def get_all_profiles(self) -> List[FaceProfile]:
         """Récupérer tous les profils"""
         try:
-            query = "SELECT * FROM face_profiles ORDER BY created_at DESC"
+            query = f"SELECT {PROFILE_COLUMNS} FROM face_profiles ORDER BY created_at DESC"
             results = self.db.execute_query(query)
 
             profiles = []
@@ -192,8 +272,100 @@ class ProfileService:
             return []
 
     def profile_exists(self, personne_id: int) -> bool:
-        """Vérifier si un profil existe pour un utilisateur"""
-        return self.get_profile_by_user(personne_id) is not None
+        """Vérifier si un profil existe pour un utilisateur (sans lire les embeddings)"""
+        try:
+            result = self.db.execute_query(
+                "SELECT EXISTS (SELECT 1 FROM face_profiles WHERE personne_id = %s)", (personne_id,)
+            )
+            return bool(result and result[0][0])
+
+        except Exception as e:
+            logger.log_error(f"Erreur vérification profil: {e}")
+            return False
+
+    def count_gallery(self) -> int:
+        """Nombre de profils actifs à charger (pour préallouer la galerie)"""
+        result = self.db.execute_query(
+            """
+            SELECT COUNT(*) FROM personne p
+            INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id
+            WHERE p.is_active = TRUE AND fp.embedding IS NOT NULL
+            """
+        )
+        return result[0][0] if result else 0
+
+    def iter_gallery(self, chunk_size: int = GALLERY_CHUNK_SIZE, since: datetime = None,
+                     personne_ids: List[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Parcourir les profils actifs par blocs via un curseur nommé (côté serveur)
+
+        Sur la connexion partagée, le parcours se fait sur une connexion
+        dédiée ; sinon (thread d'écoute) la transaction reste à l'appelant.
+
+        Args:
+            chunk_size: Lignes par bloc
+            since: Ne lire que les profils modifiés depuis ce watermark
+            personne_ids: Personnes à lire (en plus de celles modifiées si since)
+
+        Yields:
+            Listes de tuples (personne_id, username, password, embedding, profile_id)
+        """
+        query = """
+            SELECT p.personne_id, p.username, p.password, fp.embedding, fp.profile_id
+            FROM personne p
+            INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id
+            WHERE p.is_active = TRUE AND fp.embedding IS NOT NULL
+        """
+        params = ()
+        if since is not None:
+            query += " AND (fp.updated_at > %s OR p.personne_id = ANY(%s))"
+            params = (since, list(personne_ids or []))
+        elif personne_ids is not None:
+            query += " AND p.personne_id = ANY(%s)"
+            params = (list(personne_ids),)
+
+        # Le curseur nommé garde une transaction ouverte jusqu'à la fin du parcours : sur la
+        # connexion partagée, elle bloquerait (ou validerait) les écritures des autres services
+        shared = self.db is DatabaseConnection._instance
+        stream_db = DatabaseConnection.dedicated() if shared else self.db
+        if shared and not stream_db.connect():
+            logger.log_error("Erreur lecture de la galerie: connexion dédiée impossible")
+            return
+
+        cursor = stream_db.connection.cursor(name=f"gallery_stream_{uuid.uuid4().hex}")
+        cursor.itersize = chunk_size
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        except Exception as e:
+            logger.log_error(f"Erreur lecture de la galerie: {e}")
+            stream_db.connection.rollback()
+        finally:
+            if not stream_db.connection.closed:
+                cursor.close()
+            if shared:
+                stream_db.disconnect()
+
+    def gallery_watermark(self) -> Optional[datetime]:
+        """Dernière modification de face_profiles (watermark de l'instantané)"""
+        result = self.db.execute_query("SELECT MAX(updated_at) FROM face_profiles")
+        return result[0][0] if result else None
+
+    def gallery_credentials(self) -> List[Tuple[int, str, Optional[str], int]]:
+        """(personne_id, username, password, profile_id) des profils actifs, sans les embeddings"""
+        result = self.db.execute_query(
+            """
+            SELECT p.personne_id, p.username, p.password, fp.profile_id
+            FROM personne p
+            INNER JOIN face_profiles fp ON p.personne_id = fp.personne_id
+            WHERE p.is_active = TRUE AND fp.embedding IS NOT NULL
+            """
+        )
+        return [tuple(row) for row in result or []]
 
     def get_profiles_with_users(self) -> List[dict]:
         """
@@ -1,6 +1,6 @@
 """Service de gestion des utilisateurs"""
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from database.connection import DatabaseConnection
 from database.models import Personne
 from utils.logger import Logger
@@ -243,6 +243,84 @@ class UserService:
             logger.log_error(traceback.format_exc())
             return []
 
+    def get_users_page(self, limit: int = 100, cursor: int = None,
+                       search: str = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Page d'utilisateurs, du plus récent au plus ancien, sans mot de passe ni embeddings
+
+        Pagination keyset sur personne_id ; has_profile est calculé par
+        EXISTS sur face_profiles (index personne_id) au lieu de charger les profils.
+
+        Args:
+            limit: Taille de page
+            cursor: personne_id de la dernière ligne de la page précédente
+            search: Partie du nom ou de l'email (insensible à la casse)
+
+        Returns:
+            Tuple (utilisateurs, curseur de la page suivante ou None)
+        """
+        try:
+            conditions, params = [], []
+            if cursor is not None:
+                conditions.append("p.personne_id < %s")
+                params.append(cursor)
+            if search:
+                conditions.append("(p.username ILIKE %s OR p.email ILIKE %s)")
+                params.extend([f"%{search}%"] * 2)
+
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            query = f"""
+            SELECT p.personne_id, p.username, p.email, p.role, p.is_active, p.created_at,
+                   EXISTS (SELECT 1 FROM face_profiles fp WHERE fp.personne_id = p.personne_id)
+            FROM personne p
+            {where}
+            ORDER BY p.personne_id DESC
+            LIMIT %s
+            """
+            # Une ligne de plus pour savoir s'il reste une page
+            results = self.db.execute_query(query, tuple(params) + (limit + 1,)) or []
+
+            users = [
+                {
+                    'id': personne_id,
+                    'username': username,
+                    'email': email,
+                    'role': role,
+                    'is_active': is_active,
+                    'created_at': str(created_at) if created_at else None,
+                    'has_profile': has_profile
+                }
+                for personne_id, username, email, role, is_active, created_at, has_profile in results[:limit]
+            ]
+            next_cursor = users[-1]['id'] if len(results) > limit else None
+            return users, next_cursor
+
+        except Exception as e:
+            logger.log_error(f"Erreur récupération page d'utilisateurs: {e}")
+            return [], None
+
+    def get_user_stats(self) -> dict:
+        """Utilisateurs (total, actifs, avec profil) et modèles faciaux en une requête"""
+        try:
+            query = """
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE p.is_active),
+                   COUNT(*) FILTER (WHERE EXISTS (SELECT 1 FROM face_profiles fp
+                                                  WHERE fp.personne_id = p.personne_id)),
+                   (SELECT COUNT(*) FROM face_profiles)
+            FROM personne p
+            """
+            total, active, with_profile, profiles = self.db.execute_query(query)[0]
+        except Exception as e:
+            logger.log_error(f"Erreur statistiques utilisateurs: {e}")
+            total = active = with_profile = profiles = 0
+        return {
+            'total_users': total,
+            'active_users': active,
+            'users_with_profile': with_profile,
+            'total_profiles': profiles
+        }
+
     def get_all_active_users(self) -> List[Personne]:
         """Récupérer tous les utilisateurs actifs"""
         try:
@@ -0,0 +1,35 @@
+"""Fixtures partagées : embeddings synthétiques et moteur sans galerie"""
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_embeddings(n: int, seed: int = 0) -> np.ndarray:
+    """Embeddings dlib simulés : deux personnes différentes sont à ~1.4, bien au-delà du seuil 0.6"""
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0, 0.09, size=(n, 128)).astype(np.float32)
+
+
+def jitter(vectors: np.ndarray, scale: float = 0.01, seed: int = 1) -> np.ndarray:
+    """Même visage, autre capture (distance ~0.1)"""
+    rng = np.random.default_rng(seed)
+    return (vectors + rng.normal(0.0, scale, size=vectors.shape)).astype(np.float32)
+
+
+@pytest.fixture(scope='session')
+def shared_engine():
+    from core.face_recognition import FaceRecognitionEngine
+    return FaceRecognitionEngine()
+
+
+@pytest.fixture
+def engine(shared_engine):
+    """Moteur réel (détecteurs chargés une fois) avec une galerie vide à chaque test"""
+    shared_engine.clear_profiles()
+    shared_engine.remote = None
+    shared_engine.gallery_watermark = None
+    yield shared_engine
+    shared_engine.clear_profiles()
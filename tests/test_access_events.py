@@ -0,0 +1,120 @@
+"""Décisions d'accès : séquenceur sur acces_log et reprise des clients SSE"""
+import itertools
+import json
+import threading
+import pytest
+import web.app as web_app
+import database.migrations as migrations
+from core.access_listener import AccessEventListener
+
+
+def event(access_id):
+    return {'id': access_id, 'personne_id': 1, 'result': 'GRANTED'}
+
+
+class FakeAccessService:
+    """acces_log en mémoire : get_access_events relit après un curseur, comme la requête keyset"""
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+
+    def get_access_events(self, after_id, limit=100):
+        return [event(i) for i in self.ids if i > after_id][:limit]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('core.access_listener.time.monotonic', lambda: now[0])
+    return now
+
+
+def make_listener(ids, after_id=0, page_size=100):
+    published = []
+    listener = AccessEventListener(published.append, after_id=after_id, gap_timeout=2.0, page_size=page_size)
+    listener.access_service = FakeAccessService(ids)
+    return listener, published
+
+
+def poll(listener):
+    # _poll sans connexion : seule la relecture compte ici
+    page = listener.access_service.get_access_events(listener.cursor, listener.page_size)
+    return listener._publish_page(page)
+
+
+def test_listener_publishes_in_access_id_order_across_pages(clock):
+    listener, published = make_listener([3, 1, 2, 5, 4], page_size=2)
+    while poll(listener) and listener.cursor < 5:
+        pass
+    assert [e['id'] for e in published] == [1, 2, 3, 4, 5]
+    assert listener.cursor == 5
+
+
+def test_listener_holds_back_a_gap_until_it_is_committed(clock):
+    listener, published = make_listener([1, 3, 4])
+    assert poll(listener) is False
+    assert [e['id'] for e in published] == [1]
+
+    # La transaction de l'access_id 2 valide avant l'expiration du trou
+    clock[0] += 1.0
+    listener.access_service.ids = [1, 2, 3, 4]
+    assert poll(listener) is True
+    assert [e['id'] for e in published] == [1, 2, 3, 4]
+    assert listener.get_stats()['skipped'] == 0
+
+
+def test_listener_skips_a_gap_after_the_timeout(clock):
+    listener, published = make_listener([1, 4], after_id=0)
+    poll(listener)
+    clock[0] += 1.0
+    poll(listener)
+    assert [e['id'] for e in published] == [1]
+
+    clock[0] += 1.5
+    poll(listener)
+    assert [e['id'] for e in published] == [1, 4]
+    assert listener.get_stats()['skipped'] == 2
+
+
+def take_ids(stream, count):
+    ids = []
+    for message in itertools.islice(stream, count):
+        assert message.startswith('id: ')
+        ids.append(json.loads(message.split('data: ', 1)[1])['id'])
+    return ids
+
+
+def test_resume_inside_the_buffer_backfills_late_commits(monkeypatch):
+    channel = web_app.EventChannel(capacity=10, floor=0)
+    for access_id in (1, 2, 4, 5):
+        channel.publish('access', event(access_id), event_id=access_id)
+    # L'access_id 3 a été validé après l'expiration de son trou : absent du tampon
+    monkeypatch.setattr(web_app, 'access_events', channel)
+    monkeypatch.setattr(web_app, 'access_service', FakeAccessService([1, 2, 3, 4, 5, 6]))
+    monkeypatch.setattr(web_app, 'EVENT_BACKFILL_PAGE', 2)
+
+    stream = web_app.access_event_stream(2)
+    assert take_ids(stream, 3) == [3, 4, 5]
+
+    # 6 est en base mais pas encore publié : il viendra du direct
+    channel.publish('access', event(6), event_id=6)
+    assert take_ids(stream, 1) == [6]
+
+
+def test_resume_at_the_head_goes_live_without_backfill(monkeypatch):
+    channel = web_app.EventChannel(capacity=10, floor=5)
+
+    class NoBackfill:
+        def get_access_events(self, after_id, limit=100):
+            raise AssertionError("rattrapage inutile")
+
+    monkeypatch.setattr(web_app, 'access_events', channel)
+    monkeypatch.setattr(web_app, 'access_service', NoBackfill())
+
+    # Publié pendant que le client attend déjà le direct
+    threading.Timer(0.1, channel.publish, ('access', event(6)), {'event_id': 6}).start()
+    assert take_ids(web_app.access_event_stream(5), 1) == [6]
+
+
+def test_migrations_install_the_access_notify_trigger():
+    assert ('trigger_evenements_acces', migrations.install_access_notify_trigger) in migrations.MIGRATIONS
@@ -0,0 +1,76 @@
+"""Index IVF : rappel, ajouts incrémentaux, copies figées et état sauvegardé"""
+import numpy as np
+from core.ann_index import GalleryIndex, IVFIndex, create_index
+from core.gallery import FaceGallery
+from tests.conftest import make_embeddings, jitter
+
+
+def clustered(n_centers=20, per_center=50, seed=4):
+    """Visages regroupés comme les captures d'une même personne"""
+    rng = np.random.default_rng(seed)
+    centers = make_embeddings(n_centers, seed=seed)
+    vectors = np.repeat(centers, per_center, axis=0)
+    return (vectors + rng.normal(0.0, 0.02, vectors.shape)).astype(np.float32)
+
+
+def test_recall_against_exact_search():
+    vectors = clustered()
+    gallery = FaceGallery(index=IVFIndex(n_probe=4), min_index_size=100)
+    gallery.add_many(range(len(vectors)), [str(i) for i in range(len(vectors))], vectors)
+    assert gallery.uses_index()
+
+    probes = jitter(vectors[::17])
+    approx = gallery.match_batch(probes)[0]
+    exact = gallery.match_batch(probes, exact=True)[0]
+    assert np.mean(approx == exact) >= 0.95
+
+
+def test_candidates_cover_only_the_probed_lists():
+    vectors = clustered()
+    index = IVFIndex(n_lists=20, n_probe=2)
+    index.rebuild(vectors)
+    candidates = index.candidates(vectors[0])
+    assert 0 in candidates and len(candidates) < len(vectors) // 2
+
+
+def test_added_rows_are_searchable_before_the_next_sort():
+    vectors = clustered()
+    index = IVFIndex(n_lists=20, n_probe=1)
+    index.rebuild(vectors[:-1])
+    index.add(len(vectors) - 1, vectors[-1])
+    assert len(vectors) - 1 in index.candidates(vectors[-1])
+    assert not index.needs_rebuild(len(vectors))
+    assert index.needs_rebuild(5 * len(vectors))
+
+
+def test_frozen_copy_ignores_later_additions():
+    vectors = clustered()
+    index = IVFIndex(n_lists=20, n_probe=20)
+    index.rebuild(vectors[:500])
+    frozen = index.frozen(500)
+    index.add(500, vectors[500])
+    assert 500 in index.candidates(vectors[500])
+    assert 500 not in frozen.candidates(vectors[500])
+
+
+def test_state_round_trip_restores_without_training():
+    vectors = clustered()
+    index = IVFIndex(n_lists=20, n_probe=3)
+    index.rebuild(vectors)
+
+    restored = IVFIndex(n_probe=3)
+    restored.set_state(index.get_state(), len(vectors))
+    assert restored.is_ready()
+    assert np.array_equal(np.sort(restored.candidates(vectors[42])), np.sort(index.candidates(vectors[42])))
+
+    # État d'une autre taille de galerie : ignoré
+    other = IVFIndex()
+    other.set_state(index.get_state(), len(vectors) + 1)
+    assert not other.is_ready()
+
+
+def test_exact_backend_and_unknown_names():
+    assert isinstance(create_index('ivf', n_probe=2), IVFIndex)
+    index = create_index('faiss')
+    assert type(index) is GalleryIndex
+    assert index.candidates(np.zeros(128, dtype=np.float32)) is None
@@ -0,0 +1,136 @@
+"""Détection : pyramide réduite, boîtes ramenées aux coordonnées natives"""
+import numpy as np
+import pytest
+import core.detection as detection
+from core.detection import HOGDetector, detection_pyramid, scale_location, expand_box, roi_scale
+
+
+def test_pyramid_finest_level_sees_min_face_size():
+    # HOG voit 80 px : un visage de 50 px demande x1.6 -> réduction 0.8 + upsample x2
+    assert detection_pyramid((50, 50), scales=(0.5,), window=80) == [(0.5, 0), (0.8, 1)]
+    # Visages d'au moins 160 px : une réduction de moitié suffit, sans upsample
+    assert detection_pyramid((160, 160), scales=(0.5,), window=80) == [(0.5, 0)]
+
+
+def test_scale_location_maps_back_and_clamps():
+    assert scale_location((10, 60, 50, 20), 0.5, 480, 640) == (20, 120, 100, 40)
+    assert scale_location((200, 330, 260, -5), 0.5, 480, 640) == (400, 640, 480, 0)
+
+
+def test_hog_keeps_small_faces_behind_a_large_one(monkeypatch):
+    calls = []
+    # Grand visage proche vu dès le niveau réduit, petit visage au fond seulement au niveau fin
+    found = {(240, 320): [(50, 150, 150, 50)], (480, 640): [(101, 301, 299, 99), (20, 600, 80, 540)]}
+
+    def fake_face_locations(image, model, number_of_times_to_upsample):
+        calls.append((image.shape, number_of_times_to_upsample))
+        return found[image.shape]
+
+    monkeypatch.setattr(detection.face_recognition, 'face_locations', fake_face_locations)
+    gray = np.zeros((480, 640), dtype=np.uint8)
+
+    boxes = HOGDetector(pyramid=[(0.5, 0), (1.0, 1)]).detect(None, gray)
+
+    assert calls == [((240, 320), 0), ((480, 640), 1)]
+    assert boxes == [(100, 300, 300, 100), (20, 600, 80, 540)]
+
+
+def test_expand_box_and_roi_scale():
+    assert expand_box((100, 300, 200, 200), 0.5, 480, 640) == (50, 350, 250, 150)
+    assert expand_box((10, 630, 100, 540), 0.5, 480, 640) == (0, 640, 145, 495)
+    assert roi_scale(50) == pytest.approx(2.0)
+    assert roi_scale(1000) == pytest.approx(0.25)
+
+
+class FakeDetector(detection.FaceDetector):
+    boxes = []
+    loads = True
+
+    def load(self):
+        return self.loads
+
+    def detect(self, frame, gray):
+        self.calls = getattr(self, 'calls', 0) + 1
+        return list(self.boxes)
+
+
+def register(monkeypatch, name, boxes=(), loads=True):
+    detector_class = type(f"Fake_{name}", (FakeDetector,), {'name': name, 'boxes': list(boxes), 'loads': loads})
+    monkeypatch.setitem(detection.DETECTORS, name, detector_class)
+    return detector_class
+
+
+def test_face_detector_requires_detect():
+    with pytest.raises(TypeError):
+        detection.FaceDetector()
+
+
+def test_chain_skips_unknown_and_unloadable_detectors(monkeypatch):
+    register(monkeypatch, 'absent', loads=False)
+    register(monkeypatch, 'first')
+
+    chain = detection.DetectorChain([('nope', 10), ('absent', 10), ('first', float('inf'))])
+
+    assert chain.names == ['first']
+
+
+def test_chain_falls_back_to_hog_when_nothing_loads(monkeypatch):
+    register(monkeypatch, 'absent', loads=False)
+    assert detection.DetectorChain([('absent', 10)]).names == ['hog']
+
+
+def test_chain_returns_first_detector_with_faces(monkeypatch):
+    register(monkeypatch, 'empty')
+    register(monkeypatch, 'found', boxes=[(1, 2, 3, 0)])
+    register(monkeypatch, 'never', boxes=[(9, 9, 9, 9)])
+    chain = detection.DetectorChain([('empty', float('inf')), ('found', float('inf')), ('never', float('inf'))])
+
+    assert chain.detect(np.zeros((48, 64, 3), dtype=np.uint8)) == [(1, 2, 3, 0)]
+    assert not hasattr(chain.detectors[2][0], 'calls')
+
+
+def test_chain_skips_fallback_over_budget(monkeypatch):
+    register(monkeypatch, 'empty')
+    register(monkeypatch, 'slow', boxes=[(1, 2, 3, 0)])
+    chain = detection.DetectorChain([('empty', float('inf')), ('slow', 5)])
+    chain.latency_ms['slow'] = 50.0
+
+    assert chain.detect(np.zeros((48, 64, 3), dtype=np.uint8)) == []
+    assert chain.get_stats()['slow']['skipped'] == 1
+
+
+def test_from_settings_accepts_single_detector_name(monkeypatch):
+    register(monkeypatch, 'solo')
+    monkeypatch.delitem(detection.DETECTOR_CHAINS, 'solo', raising=False)
+    assert detection.DetectorChain.from_settings('solo').names == ['solo']
+
+
+def test_detect_around_maps_window_boxes_to_the_frame(monkeypatch):
+    shapes = []
+
+    def fake_face_locations(image, model, number_of_times_to_upsample):
+        shapes.append(image.shape)
+        return [(50, 150, 150, 50)]
+
+    register(monkeypatch, 'empty')
+    monkeypatch.setattr(detection.face_recognition, 'face_locations', fake_face_locations)
+    chain = detection.DetectorChain([('empty', float('inf'))])
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    # Deux fenêtres qui se chevauchent sur le même visage : une seule boîte
+    found = chain.detect_around(frame, [(100, 300, 200, 200), (102, 302, 202, 202)], margin=0.5)
+
+    assert shapes[0] == (200, 200)  # visage de 100 px déjà à ROI_TARGET_FACE_SIZE : pas de mise à l'échelle
+    assert found == [(100, 300, 200, 200)]
+    assert chain.get_stats()['roi']['hits'] == 1
+
+
+def test_locate_faces_falls_back_to_the_full_frame(engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine.detectors, 'detect_around', lambda frame, boxes: calls.append('roi') or [])
+    monkeypatch.setattr(engine.detectors, 'detect', lambda frame: calls.append('full') or [(1, 2, 3, 0)])
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    assert engine.locate_faces(frame, around=[(10, 30, 30, 10)]) == [(1, 2, 3, 0)]
+    assert engine.locate_faces(frame) == [(1, 2, 3, 0)]
+    assert calls == ['roi', 'full', 'full']
@@ -0,0 +1,68 @@
+"""Cache des encodings par piste : réutilisation, invalidation et éviction"""
+import numpy as np
+from core.embedding_cache import EmbeddingCache
+from core.face_tracker import FaceTrack
+
+BOX = (80, 200, 200, 80)
+
+
+def vector(value):
+    return np.full(128, value, dtype=np.float32)
+
+
+def test_hit_while_box_sharpness_and_age_stay_close():
+    cache = EmbeddingCache(ttl=1.0, min_iou=0.7, max_sharpness_change=0.5)
+    cache.put(1, BOX, 100.0, vector(1), now=10.0)
+
+    assert cache.get(1, (82, 202, 202, 82), 120.0, now=10.5) is not None
+    assert cache.get(2, BOX, 100.0, now=10.5) is None
+    assert cache.get_stats()['hits'] == 1 and cache.get_stats()['misses'] == 1
+
+
+def test_moved_box_blurred_face_or_expired_entry_is_a_miss():
+    cache = EmbeddingCache(ttl=1.0, min_iou=0.7, max_sharpness_change=0.5)
+    cache.put(1, BOX, 100.0, vector(1), now=10.0)
+
+    assert cache.get(1, (80, 260, 200, 140), 100.0, now=10.1) is None
+    assert cache.get(1, BOX, 30.0, now=10.1) is None
+    assert cache.get(1, BOX, 100.0, now=11.5) is None
+    assert cache.get_stats()['hit_rate'] == 0.0
+
+
+def test_oldest_tracks_are_evicted_and_retain_forgets_lost_tracks():
+    cache = EmbeddingCache(max_entries=2)
+    for track_id in (1, 2, 3):
+        cache.put(track_id, BOX, 100.0, vector(track_id), now=0.0)
+    assert cache.get(1, BOX, 100.0, now=0.0) is None
+    assert cache.evictions == 1
+
+    cache.retain([3])
+    assert cache.get_stats()['entries'] == 1 and cache.get(3, BOX, 100.0, now=0.0) is not None
+
+
+def test_refine_replaces_the_encoding_with_the_same_validity():
+    cache = EmbeddingCache(ttl=1.0)
+    cache.put(1, BOX, 100.0, vector(1), now=10.0)
+    cache.refine(1, vector(2))
+    assert cache.is_refined(1) and not cache.is_refined(2)
+    assert cache.get(1, BOX, 100.0, now=10.5)[0] == 2.0
+    assert cache.get(1, BOX, 100.0, now=11.5) is None
+
+
+def test_engine_encodes_only_cache_misses(engine, monkeypatch):
+    encoded = []
+
+    def fake_probes(frame, locations):
+        encoded.append(list(locations))
+        return [vector(len(encoded))] * len(locations)
+
+    monkeypatch.setattr(engine, 'encode_probes', fake_probes)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    tracks = [FaceTrack(1, BOX), FaceTrack(2, (10, 60, 60, 10))]
+    cache = EmbeddingCache()
+
+    first = engine.encode_tracked_faces(frame, tracks, cache)
+    second = engine.encode_tracked_faces(frame, tracks + [FaceTrack(3, (150, 300, 230, 220))], cache)
+
+    assert encoded == [[BOX, (10, 60, 60, 10)], [(150, 300, 230, 220)]]
+    assert [e[0] for e in first] == [1.0, 1.0] and [e[0] for e in second] == [1.0, 1.0, 2.0]
@@ -0,0 +1,58 @@
+"""Embeddings binaires versionnés (bytea) et ancien format texte"""
+import numpy as np
+import pytest
+from utils.encryption import (EncryptionManager, EMBEDDING_HEADER, EMBEDDING_MODEL_DLIB_RESNET,
+                              EMBEDDING_MODEL_DLIB_RESNET_5POINT, EMBEDDING_MODELS)
+from tests.conftest import make_embeddings
+
+
+def test_binary_round_trip_is_exact():
+    vector = make_embeddings(1)[0]
+    data = EncryptionManager.encode_embedding(vector)
+
+    assert len(data) == EMBEDDING_HEADER.size + 128 * 4
+    decoded = EncryptionManager.decode_embedding(memoryview(data))
+    assert decoded.dtype == np.float32 and np.array_equal(decoded, vector)
+
+
+def test_legacy_text_format_still_decodes():
+    vector = make_embeddings(1)[0].astype(np.float64)
+    decoded = EncryptionManager.decode_embedding(EncryptionManager.encode_embedding_text(vector))
+    assert np.allclose(decoded, vector, atol=1e-7)
+
+
+def test_corrupt_binary_is_rejected():
+    data = EncryptionManager.encode_embedding(make_embeddings(1)[0])
+    with pytest.raises(ValueError):
+        EncryptionManager.decode_embedding(b'XX' + data[2:])
+    with pytest.raises(ValueError):
+        EncryptionManager.decode_embedding(data[:-4])
+
+
+def test_batch_decode_matches_row_by_row():
+    vectors = make_embeddings(5)
+    blobs = [EncryptionManager.encode_embedding(v) for v in vectors]
+
+    assert np.array_equal(EncryptionManager.decode_embeddings(blobs), vectors)
+    # Lot mixte (migration en cours) : décodage ligne à ligne
+    mixed = blobs[:2] + [EncryptionManager.encode_embedding_text(v) for v in vectors[2:]]
+    assert np.allclose(EncryptionManager.decode_embeddings(mixed), vectors, atol=1e-7)
+    assert EncryptionManager.decode_embeddings([]).shape == (0, 0)
+
+
+def test_batch_decode_rejects_foreign_records():
+    blobs = [EncryptionManager.encode_embedding(v) for v in make_embeddings(3)]
+    blobs[1] = b'XX' + blobs[1][2:]
+    with pytest.raises(ValueError):
+        EncryptionManager.decode_embeddings(blobs)
+
+
+def test_header_records_the_landmark_model():
+    vector = make_embeddings(1)[0]
+    large = EncryptionManager.encode_embedding(vector)
+    small = EncryptionManager.encode_embedding(vector, EMBEDDING_MODELS['small'])
+
+    assert EncryptionManager.embedding_model(large) == EMBEDDING_MODEL_DLIB_RESNET
+    assert EncryptionManager.embedding_model(memoryview(small)) == EMBEDDING_MODEL_DLIB_RESNET_5POINT
+    assert EncryptionManager.embedding_model(EncryptionManager.encode_embedding_text(vector)) is None
+    assert np.array_equal(EncryptionManager.decode_embedding(small), vector)
@@ -0,0 +1,69 @@
+"""Contrôle qualité avant encodage : taille, exposition, netteté et lacet"""
+import cv2
+import numpy as np
+import pytest
+import core.face_quality as face_quality
+from core.face_quality import FaceQualityGate
+from core.face_tracker import FaceTrack
+
+SHARP = (20, 120, 120, 20)
+BLURRED = (20, 300, 120, 200)
+DARK = (150, 120, 250, 20)
+SMALL = (150, 230, 180, 200)
+
+
+def scene():
+    """Frame de test : visage net, visage flou, visage sombre"""
+    rng = np.random.default_rng(0)
+    gray = np.full((280, 320), 128, dtype=np.uint8)
+    gray[20:120, 20:120] = rng.integers(60, 200, (100, 100))
+    gray[20:120, 200:300] = cv2.GaussianBlur(rng.integers(60, 200, (100, 100)).astype(np.uint8), (31, 31), 10)
+    gray[150:250, 20:120] = rng.integers(0, 20, (100, 100))
+    gray[150:180, 200:230] = rng.integers(60, 200, (30, 30))
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def landmarks(nose_x):
+    """Repères 5 points : yeux à 40 px d'écart, nez décalé de nose_x"""
+    return {'left_eye': [(50, 50), (60, 50)], 'right_eye': [(90, 50), (100, 50)], 'nose_tip': [(75 + nose_x, 80)]}
+
+
+@pytest.fixture
+def frontal(monkeypatch):
+    monkeypatch.setattr(face_quality.face_recognition, 'face_landmarks',
+                        lambda image, locations, model='small': [landmarks(0)] * len(locations))
+
+
+def test_each_reason_is_detected_in_one_pass(frontal):
+    gate = FaceQualityGate(min_size=(50, 50))
+    reports = gate.assess(scene(), [SHARP, BLURRED, DARK, SMALL])
+
+    assert [report.reason for report in reports] == [None, 'sharpness', 'exposure', 'size']
+    assert reports[0].yaw == pytest.approx(0.0) and reports[1].yaw is None
+    assert gate.get_stats()['by_reason'] == {'size': 1, 'exposure': 1, 'sharpness': 1, 'yaw': 0}
+
+
+def test_sharpness_matches_the_laplacian_variance(frontal):
+    frame = scene()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    report = FaceQualityGate().assess(frame, [SHARP])[0]
+    # Le laplacien est calculé sur la zone couvrant les boîtes : seuls les bords diffèrent
+    expected = cv2.Laplacian(gray, cv2.CV_64F)[21:119, 21:119].var()
+    assert report.sharpness == pytest.approx(expected, rel=0.1)
+    assert report.brightness == pytest.approx(gray[20:120, 20:120].mean())
+
+
+def test_turned_head_is_rejected_on_yaw(monkeypatch):
+    monkeypatch.setattr(face_quality.face_recognition, 'face_landmarks',
+                        lambda image, locations, model='small': [landmarks(30)] * len(locations))
+    report = FaceQualityGate(max_yaw=35).assess(scene(), [SHARP])[0]
+    assert report.reason == 'yaw' and report.yaw > 35
+
+
+def test_filter_splits_tracks_and_can_be_disabled(frontal):
+    tracks = [FaceTrack(1, SHARP), FaceTrack(2, BLURRED)]
+    kept, rejected = FaceQualityGate().filter(scene(), tracks)
+    assert kept == [tracks[0]]
+    assert [(track.track_id, report.reason) for track, report in rejected] == [(2, 'sharpness')]
+
+    assert FaceQualityGate(enabled=False).filter(scene(), tracks) == (tracks, [])
@@ -0,0 +1,83 @@
+"""Moteur de reconnaissance : identification par lot et décision de groupe"""
+import numpy as np
+import core.face_recognition as engine_module
+from core.face_recognition import FaceRecognitionEngine
+from tests.conftest import make_embeddings, jitter
+
+
+def load_people(engine, vectors):
+    for i, vector in enumerate(vectors):
+        engine.load_profile(i + 1, f"user{i + 1}", vector, f"pw{i + 1}", template_id=i + 1)
+
+
+def test_batch_matches_single_recognition(engine):
+    gallery = make_embeddings(20)
+    load_people(engine, gallery)
+    probes = list(jitter(gallery[[3, 7, 11]])) + list(make_embeddings(2, seed=9))
+
+    batch = engine.recognize_faces_batch(probes)
+    single = [engine.recognize_face(probe) for probe in probes]
+
+    assert [result[:3] for result in batch] == [result[:3] for result in single]
+    assert np.allclose([result[3] for result in batch], [result[3] for result in single], atol=1e-5)
+    assert [result[0] for result in batch] == [4, 8, 12, None, None]
+
+
+def test_recognize_face_reads_the_loaded_gallery(engine):
+    from utils.encryption import EncryptionManager
+    vectors = make_embeddings(3)
+    load_people(engine, vectors[:2])
+    # Embedding encodé comme en base ; recharger un profil remplace son modèle
+    engine.load_profile(3, 'user3', EncryptionManager.encode_embedding(vectors[2]), 'pw3', template_id=3)
+    engine.load_profile(3, 'user3', vectors[2], 'pw3', template_id=3)
+
+    personne_id, username, password, similarity = engine.recognize_face(jitter(vectors[2:3])[0])
+    assert (personne_id, username, password) == (3, 'user3', 'pw3') and similarity > 0.8
+    assert engine.recognize_face(make_embeddings(1, seed=9)[0]) == (None, None, None, 0.0)
+    assert engine.get_loaded_profiles_count() == 3 and engine.is_profile_loaded(2)
+    assert sorted(engine.get_loaded_credentials()) == [(1, 'user1', 'pw1'), (2, 'user2', 'pw2'), (3, 'user3', 'pw3')]
+
+
+def test_batch_on_empty_gallery_returns_unknowns(engine):
+    assert engine.recognize_faces_batch(list(make_embeddings(2))) == [(None, None, None, 0.0)] * 2
+    assert engine.recognize_faces_batch([]) == []
+
+
+def test_group_with_unknown_face_is_denied_by_default():
+    known = (1, 'alice', None, 0.9)
+    unknown = (None, None, None, 0.0)
+
+    assert FaceRecognitionEngine.admits_group([known, (2, 'bob', None, 0.8)])
+    assert not FaceRecognitionEngine.admits_group([known, unknown])
+    assert not FaceRecognitionEngine.admits_group([unknown])
+    assert not FaceRecognitionEngine.admits_group([])
+
+
+def test_group_policy_any_admits_partial_group():
+    results = [(1, 'alice', None, 0.9), (None, None, None, 0.0)]
+    assert FaceRecognitionEngine.admits_group(results, policy='any')
+    assert not FaceRecognitionEngine.admits_group([(None, None, None, 0.0)], policy='any')
+
+
+def test_batch_update_publishes_once(engine):
+    published = engine.gallery_view
+    with engine.batch_update():
+        load_people(engine, make_embeddings(3))
+        engine.remove_profile(2)
+        assert engine.gallery_view is published
+    assert engine.get_loaded_profiles_count() == 2
+    assert not engine.is_profile_loaded(2)
+
+
+def test_frames_use_fast_landmarks_but_templates_keep_68_points(engine, monkeypatch):
+    models = []
+
+    def fake_encodings(image, locations, num_jitters=1, model='small'):
+        models.append(model)
+        return [np.zeros(128)] * len(locations)
+
+    monkeypatch.setattr(engine_module.face_recognition, 'face_encodings', fake_encodings)
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    engine.encode_faces(frame, [(0, 10, 10, 0)])
+    engine.encode_probes(frame, [(0, 10, 10, 0)])
+    assert models == ['large', 'small']
@@ -0,0 +1,139 @@
+"""Suivi des visages : propagation par flux optique, dérive et redétection"""
+import cv2
+import numpy as np
+import pytest
+from core.face_tracker import FaceTracker, box_iou
+
+BOX = (80, 200, 200, 80)
+
+
+def textured_frame(seed=0, shape=(240, 320)):
+    """Frame texturée : assez de coins pour goodFeaturesToTrack"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, shape, dtype=np.uint8)
+    gray = cv2.GaussianBlur(noise, (5, 5), 0)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def shifted(frame, dx, dy):
+    return np.roll(np.roll(frame, dy, axis=0), dx, axis=1)
+
+
+class FakeEngine:
+    """locate_faces scripté : renvoie la boîte courante et note chaque appel"""
+
+    def __init__(self, box=BOX):
+        self.box = box
+        self.calls = []
+
+    def locate_faces(self, frame, around=None):
+        self.calls.append(around)
+        return [self.box] if self.box else []
+
+
+def test_box_iou():
+    assert box_iou(BOX, BOX) == pytest.approx(1.0)
+    assert box_iou(BOX, (0, 10, 10, 0)) == 0.0
+    assert box_iou((0, 20, 10, 0), (0, 30, 10, 10)) == pytest.approx(1 / 3)
+
+
+def test_tracked_box_follows_the_motion_between_detections():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=10)
+    frame = textured_frame()
+
+    tracker.update(frame)
+    tracks = tracker.update(shifted(frame, 4, 3))
+
+    assert len(engine.calls) == 1 and not tracker.last_update_detected
+    top, right, bottom, left = tracks[0].location
+    assert abs(left - (BOX[3] + 4)) <= 1 and abs(top - (BOX[0] + 3)) <= 1
+    assert (bottom - top, right - left) == pytest.approx((120, 120), abs=2)
+
+
+def test_detection_runs_every_redetect_interval_and_keeps_the_track_id():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=3)
+    frame = textured_frame()
+
+    track_id = tracker.update(frame)[0].track_id
+    for _ in range(3):
+        tracker.update(frame)
+    assert len(engine.calls) == 1
+
+    tracks = tracker.update(frame)
+    assert len(engine.calls) == 2 and tracker.last_update_detected
+    assert tracks[0].track_id == track_id
+    assert tracker.get_stats()['tracked_frames'] == 3
+
+
+def test_lost_points_trigger_a_new_detection():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=10)
+    tracker.update(textured_frame())
+
+    # Visage masqué : plus aucun point ne se retrouve, le suivi est perdu
+    tracker.update(np.full((240, 320, 3), 128, dtype=np.uint8))
+    assert len(engine.calls) == 2 and tracker.last_update_detected
+
+
+def zoomed(frame, factor):
+    """Même scène rapprochée (zoom centré)"""
+    large = cv2.resize(frame, None, fx=factor, fy=factor)
+    top, left = (large.shape[0] - frame.shape[0]) // 2, (large.shape[1] - frame.shape[1]) // 2
+    return large[top:top + frame.shape[0], left:left + frame.shape[1]].copy()
+
+
+def test_moderate_zoom_scales_the_box():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=10)
+    frame = textured_frame()
+    tracker.update(frame)
+
+    top, right, bottom, left = tracker.update(zoomed(frame, 1.15))[0].location
+    assert len(engine.calls) == 1
+    assert right - left > 130
+
+
+def test_scale_drift_beyond_the_limit_triggers_a_new_detection():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=10)
+    frame = textured_frame()
+    track_id = tracker.update(frame)[0].track_id
+
+    tracks = tracker.update(zoomed(frame, 1.4))
+    assert len(engine.calls) == 2
+    assert tracks[0].location == BOX and tracks[0].track_id != track_id
+
+
+def test_disabled_tracking_detects_every_frame():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=0)
+    frame = textured_frame()
+    for _ in range(3):
+        tracker.update(frame)
+    assert len(engine.calls) == 3
+
+
+def test_detection_searches_around_known_faces_then_scans_the_full_frame(monkeypatch):
+    monkeypatch.setattr('core.face_tracker.ROI_FULL_SCAN_INTERVAL', 2)
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=0)
+    frame = textured_frame()
+
+    tracker.update(frame, hint=(10, 60, 60, 10))
+    for _ in range(3):
+        tracker.update(frame)
+
+    # Indice au départ, puis les pistes ; une pleine frame toutes les 2 détections ROI
+    assert engine.calls == [[(10, 60, 60, 10)], [BOX], None, [BOX]]
+
+
+def test_lost_face_is_searched_at_its_last_position():
+    engine = FakeEngine()
+    tracker = FaceTracker(engine, redetect_interval=10)
+    tracker.update(textured_frame())
+    engine.box = None
+
+    tracker.update(np.full((240, 320, 3), 128, dtype=np.uint8))
+    assert engine.calls == [None, [BOX]]
@@ -0,0 +1,119 @@
+"""Pipeline capture / traitement : la frame la plus récente gagne"""
+import threading
+import time
+import numpy as np
+from core.frame_pipeline import FramePipeline
+
+
+class FakeCamera:
+    """Source numérotée : chaque frame porte son numéro de capture"""
+
+    def __init__(self, interval: float = 0.002):
+        self.count = 0
+        self.interval = interval
+
+    def read(self):
+        time.sleep(self.interval)
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, dtype=np.uint8)
+
+
+def run(pipeline, seconds):
+    pipeline.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        pipeline.stop()
+
+
+def test_slow_processing_drops_stale_frames():
+    seen = []
+
+    def slow(frame):
+        seen.append(int(frame[0, 0, 0]))
+        time.sleep(0.03)
+        return frame
+
+    pipeline = FramePipeline(FakeCamera(), process=slow)
+    run(pipeline, 0.3)
+    stats = pipeline.get_stats()
+
+    assert stats['captured'] > stats['processed'] > 0
+    assert stats['dropped'] > 0
+    # Le worker saute les frames périmées au lieu de prendre du retard
+    assert all(later - earlier > 1 for earlier, later in zip(seen, seen[1:]))
+
+
+def test_wait_result_returns_newer_results_only():
+    pipeline = FramePipeline(FakeCamera(), process=lambda frame: frame + 1)
+    pipeline.start()
+    try:
+        first = pipeline.wait_result(timeout=1.0)
+        second = pipeline.wait_result(after_seq=first.seq, timeout=1.0)
+    finally:
+        pipeline.stop()
+
+    assert second.seq > first.seq
+    assert int(second.frame[0, 0, 0]) == (int(second.source[0, 0, 0]) + 1) % 256
+    assert pipeline.wait_result(after_seq=second.seq + 10_000, timeout=0.05) is None
+
+
+def test_processing_error_publishes_raw_frame():
+    def broken(frame):
+        raise ValueError("boom")
+
+    pipeline = FramePipeline(FakeCamera(), process=broken)
+    pipeline.start()
+    try:
+        result = pipeline.wait_result(timeout=1.0)
+    finally:
+        pipeline.stop()
+
+    assert result is not None and result.frame is result.source
+
+
+def test_stop_wakes_waiting_consumers():
+    pipeline = FramePipeline(FakeCamera(interval=10.0))
+    pipeline.start()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(pipeline.wait_result(timeout=5.0)))
+    waiter.start()
+    time.sleep(0.05)
+    pipeline.stop(timeout=0.1)
+    waiter.join(1.0)
+
+    assert not waiter.is_alive() and results == [None]
+
+
+def test_max_fps_skips_are_not_counted_as_drops():
+    pipeline = FramePipeline(FakeCamera(), process=lambda frame: frame, max_fps=20)
+    run(pipeline, 0.5)
+    stats = pipeline.get_stats()
+
+    assert stats['throttled'] > 0
+    assert stats['dropped'] <= 2
+    # FPS courant (intervalles lissés) proche de la cadence imposée
+    assert 10 < stats['fps'] <= 22
+    assert stats['capture_fps'] > stats['fps']
+
+
+def test_fps_follows_the_current_rate():
+    delay = [0.002]
+
+    def variable(frame):
+        time.sleep(delay[0])
+        return frame
+
+    pipeline = FramePipeline(FakeCamera(), process=variable)
+    pipeline.start()
+    try:
+        time.sleep(0.3)
+        fast = pipeline.get_stats()['fps']
+        delay[0] = 0.05
+        time.sleep(1.5)
+        slow = pipeline.get_stats()['fps']
+    finally:
+        pipeline.stop()
+
+    # Une moyenne depuis le démarrage resterait au-dessus de 30 ici
+    assert fast > 60 and slow < 25
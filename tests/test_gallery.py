@@ -0,0 +1,188 @@
+"""Galerie contiguë : recherche, modèles multiples, copies figées et compactage"""
+import numpy as np
+import pytest
+from core.ann_index import IVFIndex
+from core.gallery import FaceGallery
+from tests.conftest import make_embeddings, jitter
+
+
+def build_gallery(n=20, **options):
+    gallery = FaceGallery(initial_capacity=64, **options)
+    gallery.add_many(range(1, n + 1), [f"user{i}" for i in range(1, n + 1)], make_embeddings(n),
+                     [f"pw{i}" for i in range(1, n + 1)])
+    return gallery
+
+
+def identity(gallery, probe):
+    row, distance, _ = gallery.match(probe)
+    return gallery.entry(row)[0], distance
+
+
+def test_match_and_batch_agree_with_brute_force():
+    gallery = build_gallery()
+    probes = jitter(make_embeddings(20)[[2, 9, 17]])
+
+    rows, distances, margins = gallery.match_batch(probes)
+    brute = np.linalg.norm(make_embeddings(20)[None, :, :] - probes[:, None, :], axis=2)
+
+    assert rows.tolist() == [2, 9, 17]
+    assert np.allclose(distances, brute.min(axis=1), atol=1e-5)
+    assert all(gallery.match(probe)[0] == row for probe, row in zip(probes, rows))
+    assert (margins > 0).all()
+
+
+def test_empty_gallery_and_wrong_dimension():
+    gallery = FaceGallery()
+    assert gallery.match(make_embeddings(1)[0]) == (-1, float('inf'), 0.0)
+    with pytest.raises(ValueError):
+        gallery.add(1, 'alice', np.zeros(64, dtype=np.float32))
+
+
+def test_templates_are_aggregated_per_identity():
+    vectors = make_embeddings(3)
+    gallery = FaceGallery()
+    gallery.add(1, 'alice', vectors[0], template_id=10)
+    gallery.add(1, 'alice', vectors[1], template_id=11)
+    gallery.add(2, 'bob', vectors[2], template_id=20)
+
+    assert gallery.people_count == 2 and len(gallery) == 3
+    assert sorted(gallery.templates_of(1)) == [10, 11]
+    assert identity(gallery, jitter(vectors[1:2])[0])[0] == 1
+    # La marge est mesurée entre identités : l'autre modèle d'alice ne compte pas
+    _, _, margin = gallery.match(vectors[0])
+    assert margin == pytest.approx(np.linalg.norm(vectors[0] - vectors[2]), abs=1e-5)
+
+    assert gallery.remove_template(1, 10)
+    assert gallery.templates_of(1) == [11] and 1 in gallery
+
+
+def test_frozen_view_ignores_later_replace_and_remove():
+    gallery = build_gallery()
+    view = gallery.freeze()
+    original = make_embeddings(20)
+
+    gallery.add(3, 'user3', make_embeddings(1, seed=5)[0])
+    gallery.remove(7)
+
+    assert identity(view, original[2])[0] == 3 and identity(view, original[2])[1] < 1e-3
+    assert identity(view, original[6])[0] == 7
+    assert len(view) == 20 and 7 in view
+
+    assert identity(gallery, original[6])[0] != 7 or identity(gallery, original[6])[1] > 0.6
+    assert identity(gallery, make_embeddings(1, seed=5)[0])[0] == 3
+    assert len(gallery) == 19 and 7 not in gallery
+
+
+def test_freeze_and_remove_do_not_copy_rows():
+    gallery = build_gallery(quantization='int8', rerank=4)
+    view = gallery.freeze()
+    assert np.shares_memory(view.matrix, gallery.matrix)
+    assert np.shares_memory(view._codes, gallery._codes)
+
+    matrix = gallery._matrix
+    gallery.remove(5)
+    gallery.add(6, 'user6', make_embeddings(1, seed=7)[0])
+    assert gallery._matrix is matrix
+
+
+def test_removed_rows_are_skipped_by_every_search_path():
+    original = make_embeddings(20)
+    for options in ({}, {'quantization': 'float16', 'rerank': 4}, {'quantization': 'int8', 'rerank': 4}):
+        gallery = build_gallery(**options)
+        gallery.remove(4)
+        rows, distances, _ = gallery.match_batch(original[[3, 8]])
+        assert gallery.entry(rows[0])[0] != 4 and distances[0] > 0.6
+        assert gallery.entry(rows[1])[0] == 9
+        assert identity(gallery, original[3])[0] != 4
+        assert 4 not in gallery.ids and gallery.matrix.shape == (19, 128)
+
+
+def test_compaction_renumbers_rows_and_keeps_views():
+    original = make_embeddings(20)
+    gallery = build_gallery(compact_ratio=0.25, compact_min=4)
+    view = gallery.freeze()
+
+    for personne_id in range(1, 5):
+        gallery.remove(personne_id)
+    assert gallery._dead == 4 and gallery._count == 20
+    gallery.remove(5)  # 5 lignes retirées sur 20 : compactage
+    assert gallery._dead == 0 and gallery._count == 15
+    assert gallery.row_of(6) == 0
+    assert [identity(gallery, original[i])[0] for i in (5, 19)] == [6, 20]
+    assert identity(view, original[0])[0] == 1
+
+
+def test_ivf_index_matches_exact_search_after_removals():
+    rng = np.random.default_rng(3)
+    centers = make_embeddings(10, seed=4)
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(0.0, 0.02, (500, 128)).astype(np.float32)
+    gallery = FaceGallery(index=IVFIndex(n_lists=10, n_probe=10), compact_ratio=0.1, compact_min=8)
+    gallery.add_many(range(500), [str(i) for i in range(500)], vectors)
+    assert gallery.uses_index()
+
+    view = gallery.freeze()
+    for personne_id in range(0, 500, 7):
+        gallery.remove(personne_id)
+    probes = jitter(vectors[[1, 8, 250, 499]])
+
+    for searched in (gallery, view):
+        approx = searched.match_batch(probes)
+        exact = searched.match_batch(probes, exact=True)
+        assert approx[0].tolist() == exact[0].tolist()
+        assert np.allclose(approx[1], exact[1], atol=1e-5)
+
+
+def test_sync_credentials_removes_inactive_templates():
+    gallery = build_gallery(3)
+    removed = gallery.sync_credentials([(1, 'alice', 'new', 0), (3, 'carol', None, 0)])
+    assert removed == 1
+    assert sorted(gallery.credentials()) == [(1, 'alice', 'new'), (3, 'carol', None)]
+
+
+def test_memory_usage_counts_strings_and_dead_rows():
+    small = build_gallery(2)
+    large = FaceGallery()
+    large.add_many([1, 2], ['x' * 5000, 'y' * 5000], make_embeddings(2), ['p' * 5000, 'q' * 5000])
+    assert large.memory_usage()['metadata'] - small.memory_usage()['metadata'] > 4 * 4900
+
+    small.add(1, 'user1', make_embeddings(1, seed=3)[0])
+    assert small.memory_usage()['dead_rows'] == 1
+
+
+def test_clear_leaves_published_view_intact():
+    gallery = build_gallery(5)
+    view = gallery.freeze()
+    gallery.clear()
+    gallery.add(9, 'zed', make_embeddings(1, seed=8)[0])
+
+    assert len(gallery) == 1 and len(view) == 5
+    assert identity(view, make_embeddings(5)[0])[0] == 1
+
+
+@pytest.mark.parametrize('quantization', ['float16', 'int8'])
+def test_quantized_scan_with_rerank_matches_exact_search(quantization):
+    vectors = make_embeddings(3000, seed=11)
+    gallery = FaceGallery(quantization=quantization, rerank=8)
+    gallery.add_many(range(3000), [str(i) for i in range(3000)], vectors)
+    probes = np.concatenate([jitter(vectors[::150]), make_embeddings(5, seed=12)])
+
+    def assert_exact(searched):
+        rows, distances, margins = searched.match_batch(probes)
+        exact = searched.match_batch(probes, exact=True)
+        assert rows.tolist() == exact[0].tolist()
+        assert np.allclose(distances, exact[1], atol=1e-5)
+        assert np.allclose(margins, exact[2], atol=1e-5)
+        for probe, row, distance in zip(probes, rows, distances):
+            single = searched.match(probe)
+            assert single[0] == row and single[1] == pytest.approx(distance, abs=1e-5)
+
+    assert gallery._codes is not None
+    assert_exact(gallery)
+
+    view = gallery.freeze()
+    for personne_id in range(0, 3000, 150):
+        gallery.remove(personne_id)
+    assert_exact(gallery)
+    assert_exact(view)
+    assert gallery.entry(gallery.match(vectors[0])[0])[0] != 0
+    assert view.entry(view.match(vectors[0])[0])[0] == 0
@@ -0,0 +1,98 @@
+"""Rechargement à chaud : notifications reçues pendant une relecture, fenêtre du watermark"""
+import threading
+import time
+from datetime import datetime, timedelta
+import core.gallery_listener as gallery_listener
+from core.gallery_listener import GalleryListener
+from config.settings import GALLERY_WATERMARK_OVERLAP
+
+
+class Notify:
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class FakeListenConnection:
+    def __init__(self):
+        self.notifies = []
+
+    def poll(self):
+        pass
+
+    def commit(self):
+        pass
+
+
+class FakeListenDb:
+    def __init__(self):
+        self.connection = FakeListenConnection()
+
+    def disconnect(self):
+        pass
+
+
+class FakeEngine:
+    """Une nouvelle notification arrive pendant la première relecture"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.refreshed = []
+        self.done = threading.Event()
+
+    def refresh_profiles(self, profile_service, personne_ids):
+        self.refreshed.append(personne_ids)
+        if len(self.refreshed) == 1:
+            self.connection.notifies.append(Notify('7'))
+        else:
+            self.done.set()
+        return len(personne_ids), 0
+
+    def sync_gallery(self, profile_service):
+        return 0, 0
+
+
+def test_notification_buffered_during_refresh_is_applied(monkeypatch):
+    db = FakeListenDb()
+    engine = FakeEngine(db.connection)
+    # Le socket ne signale plus rien : tout est déjà dans connection.notifies
+    monkeypatch.setattr(gallery_listener.select, 'select', lambda r, w, x, timeout: ([], [], []))
+    listener = GalleryListener(engine, poll_interval=3600, debounce=0.0)
+    listener.db = db
+    listener._last_poll = time.monotonic()
+    db.connection.notifies.append(Notify('3'))
+
+    listener.start()
+    try:
+        assert engine.done.wait(2.0)
+    finally:
+        listener.stop()
+
+    assert engine.refreshed[:2] == [[3], [7]]
+
+
+class WatermarkProfileService:
+    def __init__(self, watermark):
+        self.watermark = watermark
+        self.since = []
+
+    def gallery_watermark(self):
+        return self.watermark
+
+    def gallery_credentials(self):
+        return []
+
+    def iter_gallery(self, since=None, personne_ids=None, **kwargs):
+        self.since.append(since)
+        return iter(())
+
+
+def test_sync_rereads_the_watermark_overlap(engine):
+    applied = datetime(2026, 10, 1, 12, 0)
+    engine.gallery_watermark = applied
+    service = WatermarkProfileService(applied + timedelta(minutes=5))
+
+    engine.sync_gallery(service)
+
+    # Une transaction commencée avant le watermark mais validée après reste visible
+    assert service.since == [applied - timedelta(seconds=GALLERY_WATERMARK_OVERLAP)]
+    assert engine.gallery_watermark == service.watermark
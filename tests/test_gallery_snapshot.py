@@ -0,0 +1,141 @@
+"""Instantané disque de la galerie : aller-retour, remplacement atomique, démarrage à chaud"""
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pytest
+from core.ann_index import IVFIndex
+from core.gallery import FaceGallery
+from core.gallery_snapshot import save_snapshot, load_snapshot, META_FILE
+from utils.encryption import EncryptionManager, EMBEDDING_MODELS
+from tests.conftest import make_embeddings, jitter
+
+WATERMARK = datetime(2026, 10, 1, 12, 30)
+
+
+def build_gallery(n: int = 6) -> FaceGallery:
+    gallery = FaceGallery()
+    for i, vector in enumerate(make_embeddings(n)):
+        gallery.add(i + 1, f"user{i + 1}", vector, f"pw{i + 1}", template_id=100 + i)
+    return gallery
+
+
+def test_round_trip_matches_like_the_original(tmp_path):
+    gallery = build_gallery()
+    assert save_snapshot(gallery, str(tmp_path), WATERMARK)
+
+    restored, watermark = load_snapshot(str(tmp_path), gallery.dim)
+
+    assert watermark == WATERMARK
+    assert np.array_equal(restored.matrix, gallery.matrix)
+    assert list(restored.templates) == list(gallery.templates)
+    probes = jitter(make_embeddings(6)[[1, 4]])
+    assert [restored.match(p)[0] for p in probes] == [gallery.match(p)[0] for p in probes]
+    # Les mots de passe ne sont jamais écrits sur disque
+    assert all(entry[2] is None for entry in restored.credentials())
+
+
+def test_removed_rows_are_left_out_with_their_index_state(tmp_path):
+    vectors = make_embeddings(40)
+    gallery = FaceGallery(index=IVFIndex(n_lists=4, n_probe=4))
+    gallery.add_many(range(1, 41), [f"user{i}" for i in range(1, 41)], vectors)
+    gallery.remove(3)
+    save_snapshot(gallery, str(tmp_path), WATERMARK)
+
+    index = IVFIndex(n_lists=4, n_probe=4)
+    restored, _ = load_snapshot(str(tmp_path), 128, index)
+    assert len(restored) == 39 and 3 not in restored
+    assert index.is_ready() and index._count == 39
+    assert restored.entry(restored.match(vectors[10])[0])[0] == 11
+
+
+def test_rewrite_replaces_previous_files(tmp_path):
+    save_snapshot(build_gallery(3), str(tmp_path), WATERMARK)
+    first = set(os.listdir(tmp_path))
+    save_snapshot(build_gallery(4), str(tmp_path), WATERMARK)
+    second = set(os.listdir(tmp_path))
+
+    assert first & second == {META_FILE}
+    assert len(load_snapshot(str(tmp_path), 128)[0]) == 4
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="nom des fichiers synchronisés lu dans /proc")
+def test_data_files_reach_the_disk_before_meta_is_replaced(tmp_path, monkeypatch):
+    events = []
+    fsync, replace = os.fsync, os.replace
+
+    def recording_fsync(fd):
+        events.append(('fsync', os.path.basename(os.readlink(f"/proc/self/fd/{fd}"))))
+        fsync(fd)
+
+    def recording_replace(source, target):
+        events.append(('replace', os.path.basename(target)))
+        replace(source, target)
+
+    monkeypatch.setattr(os, 'fsync', recording_fsync)
+    monkeypatch.setattr(os, 'replace', recording_replace)
+    assert save_snapshot(build_gallery(3), str(tmp_path), WATERMARK)
+
+    synced = [name.split('-')[0].split('.')[0] for _, name in events[:5]]
+    assert [kind for kind, _ in events] == ['fsync'] * 5 + ['replace', 'fsync']
+    assert synced == ['matrix', 'ids', 'templates', 'index', 'meta']
+    assert events[5] == ('replace', META_FILE) and events[6] == ('fsync', tmp_path.name)
+
+
+def test_foreign_or_inconsistent_snapshot_is_ignored(tmp_path):
+    assert load_snapshot(str(tmp_path), 128) is None
+    save_snapshot(build_gallery(), str(tmp_path), WATERMARK)
+    assert load_snapshot(str(tmp_path), 64) is None
+
+    meta_path = tmp_path / META_FILE
+    meta = json.loads(meta_path.read_text())
+    meta['model'] = EMBEDDING_MODELS['small']  # modèles encodés avec un autre alignement
+    meta_path.write_text(json.dumps(meta))
+    assert load_snapshot(str(tmp_path), 128) is None
+
+    meta['model'] = EMBEDDING_MODELS['large']
+    meta['count'] += 1
+    meta_path.write_text(json.dumps(meta))
+    assert load_snapshot(str(tmp_path), 128) is None
+
+
+class FakeProfileService:
+    """Base simulée : une personne ajoutée depuis l'instantané"""
+
+    def __init__(self, rows, watermark):
+        self.rows = rows
+        self.watermark = watermark
+        self.full_loads = 0
+
+    def gallery_watermark(self):
+        return self.watermark
+
+    def gallery_credentials(self):
+        return [(row[0], row[1], row[2], row[4]) for row in self.rows]
+
+    def count_gallery(self):
+        return len(self.rows)
+
+    def iter_gallery(self, since=None, personne_ids=None, **kwargs):
+        if since is None and personne_ids is None:
+            self.full_loads += 1
+            yield list(self.rows)
+            return
+        wanted = [row for row in self.rows if row[0] in (personne_ids or [])]
+        if wanted:
+            yield wanted
+
+
+def test_warm_start_applies_only_the_delta(engine, tmp_path):
+    vectors = make_embeddings(5)
+    rows = [(i + 1, f"user{i + 1}", f"pw{i + 1}", EncryptionManager.encode_embedding(v), 100 + i)
+            for i, v in enumerate(vectors)]
+    save_snapshot(build_gallery(4), str(tmp_path), WATERMARK)
+
+    service = FakeProfileService(rows, WATERMARK)
+    assert engine.warm_start(service, str(tmp_path)) == 5
+
+    assert service.full_loads == 0
+    assert engine.recognize_face(jitter(vectors[4:5])[0])[0] == 5
+    # Mots de passe relus depuis la base (absents de l'instantané)
+    assert (1, 'user1', 'pw1') in engine.get_loaded_credentials()
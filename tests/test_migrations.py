@@ -0,0 +1,30 @@
+"""Migrations : arrêt à la première erreur"""
+import database.migrations as migrations
+
+
+def test_run_migrations_stops_at_first_failure(monkeypatch):
+    applied = []
+
+    def ok(name):
+        return lambda db: applied.append(name)
+
+    def broken(db):
+        raise RuntimeError("contrainte")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [('a', ok('a')), ('b', broken), ('c', ok('c'))])
+
+    assert migrations.run_migrations(db=None) is False
+    assert applied == ['a']
+
+
+def test_run_migrations_reports_success(monkeypatch):
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [('a', lambda db: 0), ('b', lambda db: 3)])
+    assert migrations.run_migrations(db=None) is True
+
+
+def test_bulk_encoding_matches_single_encoding():
+    from utils.encryption import EncryptionManager
+    from tests.conftest import make_embeddings
+
+    matrix = make_embeddings(4)
+    assert migrations.encode_embeddings_bulk(matrix) == [EncryptionManager.encode_embedding(v) for v in matrix]
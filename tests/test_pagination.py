@@ -0,0 +1,95 @@
+"""Pagination keyset de /api/logs et /api/users"""
+from datetime import date, datetime, timedelta
+import pytest
+import web.app as web_app
+from services.access_service import AccessService
+from services.user_service import UserService
+
+START = datetime(2026, 1, 1, 8, 0, 0)
+
+
+class QueryDb:
+    """Renvoie les lignes scriptées et note chaque requête"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        return self.rows[:params[-1]]
+
+
+def log_rows(n):
+    """Lignes acces_log jointes, de la plus récente à la plus ancienne"""
+    return [(n - i, 1, 'alice', 'GRANTED', 'FACE_ONLY', 0.9, START + timedelta(minutes=n - i)) for i in range(n)]
+
+
+def user_rows(n):
+    return [(n - i, f"user{n - i}", None, 'USER', True, START, i % 2 == 0) for i in range(n)]
+
+
+def test_logs_page_reads_one_extra_row_for_the_next_cursor():
+    db = QueryDb(log_rows(5))
+    logs, cursor = AccessService(db).get_access_logs_page(limit=3)
+
+    assert [log['id'] for log in logs] == [5, 4, 3]
+    assert cursor == (START + timedelta(minutes=3), 3)
+    assert db.queries[0][1] == (4,)
+    assert 'LEFT JOIN personne' in db.queries[0][0]
+
+    _, last = AccessService(QueryDb(log_rows(3))).get_access_logs_page(limit=3)
+    assert last is None
+
+
+def test_logs_filters_and_cursor_become_query_parameters():
+    db = QueryDb([])
+    AccessService(db).get_access_logs_page(limit=10, cursor=(START, 42), access_result='DENIED',
+                                           date_from=date(2026, 1, 1), date_to=date(2026, 1, 31),
+                                           username='ali')
+    query, params = db.queries[0]
+    assert '(a.horaire, a.access_id) < (%s, %s)' in query
+    assert params == (START, 42, 'DENIED', date(2026, 1, 1), date(2026, 2, 1), '%ali%', 11)
+
+
+def test_users_page_uses_personne_id_as_cursor():
+    db = QueryDb(user_rows(4))
+    users, cursor = UserService(db).get_users_page(limit=2, cursor=9, search='bob')
+
+    assert [user['id'] for user in users] == [4, 3] and cursor == 3
+    assert [user['has_profile'] for user in users] == [True, False]
+    assert db.queries[0][1] == (9, '%bob%', '%bob%', 3)
+    assert 'embedding' not in db.queries[0][0]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web_app, 'access_service', AccessService(QueryDb(log_rows(5))))
+    monkeypatch.setattr(web_app, 'user_service', UserService(QueryDb(user_rows(5))))
+    return web_app.app.test_client()
+
+
+def test_api_logs_returns_the_next_cursor_header(client):
+    response = client.get('/api/logs?limit=2')
+    assert [log['id'] for log in response.get_json()] == [5, 4]
+
+    cursor = response.headers['X-Next-Cursor']
+    assert web_app.decode_log_cursor(cursor) == (START + timedelta(minutes=4), 4)
+
+    client.get(f'/api/logs?limit=2&cursor={cursor}&result=GRANTED')
+    assert web_app.access_service.db.queries[1][1] == (START + timedelta(minutes=4), 4, 'GRANTED', 3)
+
+
+def test_api_users_bounds_the_page_size(client):
+    response = client.get('/api/users?limit=100000')
+    assert response.headers.get('X-Next-Cursor') is None
+    assert web_app.user_service.db.queries[0][1] == (web_app.PAGE_SIZE_MAX + 1,)
+
+    response = client.get('/api/users?limit=2')
+    assert response.headers['X-Next-Cursor'] == '4'
+
+
+def test_invalid_cursor_and_dates_are_ignored():
+    assert web_app.decode_log_cursor('garbage') is None
+    assert web_app.decode_log_cursor(None) is None
+    assert web_app.parse_date('2026-13-01') is None
@@ -0,0 +1,116 @@
+"""Parité pgvector / galerie en mémoire (curseur simulé, pas de base requise)"""
+import numpy as np
+import pytest
+import core.pgvector_backend as pgvector_backend
+from core.pgvector_backend import PgVectorRecognizer
+from tests.conftest import make_embeddings, jitter
+
+
+def parse_vector(literal: str) -> np.ndarray:
+    return np.array(literal.strip('[]').split(','), dtype=np.float32)
+
+
+class FakeVectorCursor:
+    """Exécute la requête top-k de PgVectorRecognizer sur des lignes en mémoire (distance L2 <->)"""
+
+    def __init__(self, rows):
+        self.rows = rows  # (personne_id, username, password, vecteur)
+        self.result = []
+
+    def top_k(self, probe: np.ndarray, limit: int):
+        scored = [(pid, name, pw, float(np.linalg.norm(vector - probe))) for pid, name, pw, vector in self.rows]
+        return sorted(scored, key=lambda row: row[3])[:limit]
+
+    def execute(self, query, params=None):
+        if params is None:  # SET hnsw.ef_search / ivfflat.probes
+            return
+        probe, _, limit = params
+        self.result = self.top_k(parse_vector(probe), limit)
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeVectorDb:
+    def __init__(self, rows):
+        self.cursor = FakeVectorCursor(rows)
+        self.connection = FakeConnection()
+
+
+def fake_execute_values(cursor, query, probes, fetch=False, **kwargs):
+    limit = int(query.split('LIMIT')[1].split()[0])
+    return [
+        (idx,) + candidate
+        for idx, probe in probes
+        for candidate in cursor.top_k(parse_vector(probe), limit)
+    ]
+
+
+@pytest.fixture
+def enrolled(engine, monkeypatch):
+    """Même galerie (plusieurs modèles par personne) en mémoire et derrière le curseur simulé"""
+    monkeypatch.setattr(pgvector_backend, 'execute_values', fake_execute_values)
+    people = make_embeddings(12)
+    rows = []
+    for i, base in enumerate(people):
+        for template in range(1 + i % 3):
+            vector = jitter(base[None, :], scale=0.02, seed=10 * i + template)[0]
+            profile_id = 100 * (i + 1) + template
+            engine.load_profile(i + 1, f"user{i + 1}", vector, f"pw{i + 1}", template_id=profile_id)
+            rows.append((i + 1, f"user{i + 1}", f"pw{i + 1}", vector))
+    return engine, people, PgVectorRecognizer(FakeVectorDb(rows))
+
+
+def probes_across_threshold(people):
+    """Sondes nettes, dans la zone grise du seuil (0.4) et inconnues"""
+    probes = [jitter(people[i:i + 1], scale=scale, seed=i)[0]
+              for i, scale in enumerate((0.01, 0.02, 0.03, 0.033, 0.036, 0.04, 0.05))]
+    return probes + list(make_embeddings(3, seed=42))
+
+
+def test_single_probe_parity(enrolled):
+    engine, people, remote = enrolled
+    probes = probes_across_threshold(people)
+    local = [engine.recognize_face(probe) for probe in probes]
+    engine.remote = remote
+    server = [engine.recognize_face(probe) for probe in probes]
+
+    assert [result[:3] for result in server] == [result[:3] for result in local]
+    assert np.allclose([r[3] for r in server], [r[3] for r in local], atol=1e-5)
+    # Le jeu de sondes couvre bien acceptations et refus
+    accepted = [result[0] is not None for result in local]
+    assert any(accepted) and not all(accepted)
+
+
+def test_batch_parity(enrolled):
+    engine, people, remote = enrolled
+    probes = probes_across_threshold(people)
+    local = engine.recognize_faces_batch(probes)
+    engine.remote = remote
+
+    assert [r[:3] for r in engine.recognize_faces_batch(probes)] == [r[:3] for r in local]
+
+
+def test_no_candidates_is_unknown(engine):
+    engine.remote = PgVectorRecognizer(FakeVectorDb([]))
+    assert engine.recognize_face(make_embeddings(1)[0]) == (None, None, None, 0.0)
+
+
+def test_best_identity_aggregates_templates(monkeypatch):
+    # Deux modèles médiocres de la personne 1 contre un bon modèle de la personne 2
+    candidates = [(1, 'a', None, 0.30), (2, 'b', None, 0.32), (1, 'a', None, 0.50)]
+    identity, distance, margin = PgVectorRecognizer._best(candidates)
+    assert identity == (1, 'a', None) and distance == pytest.approx(0.30) and margin == pytest.approx(0.02)
+
+    monkeypatch.setattr(pgvector_backend, 'TEMPLATE_AGGREGATION', 'mean_topk')
+    monkeypatch.setattr(pgvector_backend, 'TEMPLATE_TOP_K', 2)
+    identity, distance, _ = PgVectorRecognizer._best(candidates)
+    assert identity == (2, 'b', None) and distance == pytest.approx(0.32)
@@ -0,0 +1,139 @@
+"""Services : lecture de la galerie en flux (curseur nommé), enregistrement des modèles"""
+import numpy as np
+import pytest
+from database.connection import DatabaseConnection
+from services.profile_service import ProfileService
+from utils.encryption import EncryptionManager, EMBEDDING_MODEL_DLIB_RESNET
+
+
+class FakeNamedCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.closed = False
+        self.itersize = 0
+
+    def execute(self, query, params=None):
+        self.query, self.params = query, params
+
+    def close(self):
+        self.closed = True
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.names = []
+        self.commits = 0
+        self.closed = False
+
+    def cursor(self, name=None):
+        self.names.append(name)
+        return FakeNamedCursor(self.rows)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class FakeDb:
+    def __init__(self, rows=()):
+        self.connection = FakeConnection(rows)
+        self.disconnected = False
+
+    def connect(self):
+        return True
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+ROWS = [(i, f"user{i}", None, b'', 100 + i) for i in range(5)]
+
+
+@pytest.fixture
+def shared_db(monkeypatch):
+    """Connexion partagée simulée + connexions dédiées créées par iter_gallery"""
+    shared = FakeDb()
+    dedicated = []
+
+    def make_dedicated():
+        db = FakeDb(ROWS)
+        dedicated.append(db)
+        return db
+
+    monkeypatch.setattr(DatabaseConnection, '_instance', shared)
+    monkeypatch.setattr(DatabaseConnection, 'dedicated', staticmethod(make_dedicated))
+    return shared, dedicated
+
+
+def test_stream_uses_a_dedicated_connection(shared_db):
+    shared, dedicated = shared_db
+    chunks = list(ProfileService(shared).iter_gallery(chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert shared.connection.names == [] and shared.connection.commits == 0
+    assert len(dedicated) == 1 and dedicated[0].disconnected
+
+
+def test_concurrent_streams_get_distinct_cursor_names(shared_db):
+    shared, dedicated = shared_db
+    service = ProfileService(shared)
+    first, second = service.iter_gallery(chunk_size=2), service.iter_gallery(chunk_size=2)
+    next(first), next(second)
+    first.close(), second.close()
+
+    names = [db.connection.names[0] for db in dedicated]
+    assert len(set(names)) == 2
+    assert all(db.disconnected for db in dedicated)
+
+
+def test_own_connection_keeps_its_transaction(shared_db):
+    # Connexion du thread d'écoute : ni commit ni fermeture par le parcours
+    listener_db = FakeDb(ROWS)
+    list(ProfileService(listener_db).iter_gallery(personne_ids=[1, 2]))
+
+    assert listener_db.connection.commits == 0 and not listener_db.disconnected
+    assert len(listener_db.connection.names) == 1
+
+
+class RecordingDb:
+    def __init__(self, rows=None):
+        self.updates = []
+        self.queries = []
+        self.rows = rows or []
+
+    def execute_query(self, query, params=None):
+        self.queries.append((' '.join(query.split()), params))
+        return self.rows
+
+    def execute_update(self, query, params=None):
+        self.updates.append((query, params))
+        return 7
+
+
+def test_stored_templates_are_tagged_with_the_68_point_model(monkeypatch):
+    db = RecordingDb()
+    service = ProfileService(db)
+    monkeypatch.setattr(service, 'prune_profiles', lambda personne_id, keep: 0)
+
+    assert service.create_profile(1, np.zeros(128, dtype=np.float32)) == 7
+    blob = db.updates[0][1][1]
+    assert EncryptionManager.embedding_model(blob) == EMBEDDING_MODEL_DLIB_RESNET
+
+
+def test_latest_template_is_the_profile_and_existence_reads_no_embedding():
+    db = RecordingDb(rows=[(True,)])
+    service = ProfileService(db)
+
+    assert service.profile_exists(3)
+    assert db.queries[-1] == ("SELECT EXISTS (SELECT 1 FROM face_profiles WHERE personne_id = %s)", (3,))
+
+    db.rows = []
+    assert service.get_profile_by_user(3) is None
+    assert db.queries[-1][0].endswith("ORDER BY updated_at DESC NULLS LAST, profile_id DESC LIMIT 1")
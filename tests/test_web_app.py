@@ -0,0 +1,183 @@
+"""Application web : passages de reconnaissance, flux et endpoints"""
+import itertools
+import cv2
+import numpy as np
+import pytest
+import web.app as web_app
+
+
+class FakePool:
+    n_workers = 2
+
+    def __init__(self):
+        self.inflight = []
+
+    def pending(self):
+        return len(self.inflight)
+
+
+class FakePooledEngine:
+    """submit_frame / collect_frame du moteur, résultats rendus dans l'ordre de soumission"""
+
+    def __init__(self, faces):
+        self.worker_pool = FakePool()
+        self.faces = faces
+        self.next_task = 0
+
+    def submit_frame(self, frame):
+        self.worker_pool.inflight.append(self.next_task)
+        self.next_task += 1
+        return self.next_task - 1
+
+    def collect_frame(self, timeout=None):
+        pool = self.worker_pool
+        if not pool.inflight or (timeout is not None and pool.pending() <= pool.n_workers):
+            return None
+        task_id = pool.inflight.pop(0)
+        return task_id, [self.faces[0]], [np.zeros(128)], [self.faces[1]]
+
+
+class PassAll:
+    enabled = False
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    engine = FakePooledEngine(((10, 60, 60, 10), (1, 'alice', None, 0.9)))
+    monkeypatch.setattr(web_app, 'face_engine', engine)
+    monkeypatch.setattr(web_app, 'quality_gate', PassAll())
+    monkeypatch.setattr(web_app, 'pooled_frames', {})
+    return engine
+
+
+def test_pooled_analysis_keeps_one_pass_in_flight_per_worker(pooled):
+    frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(4)]
+
+    assert web_app.analyze_frame_pooled(frames[0]) is None
+    assert web_app.analyze_frame_pooled(frames[1]) is None
+    # Tous les processus occupés : le plus ancien passage est attendu
+    locations, results, rejected = web_app.analyze_frame_pooled(frames[2])
+
+    assert locations == [(10, 60, 60, 10)] and results == [(1, 'alice', None, 0.9)] and rejected == []
+    assert sorted(web_app.pooled_frames) == [1, 2]
+
+
+def test_discard_pooled_frames_drains_stale_passes(pooled, monkeypatch):
+    for i in range(2):
+        web_app.analyze_frame_pooled(np.zeros((4, 4, 3), dtype=np.uint8))
+    monkeypatch.setattr(pooled, 'collect_frame', lambda timeout=None: pooled.worker_pool.inflight.pop(0))
+
+    web_app.discard_pooled_frames()
+
+    assert pooled.worker_pool.pending() == 0 and web_app.pooled_frames == {}
+
+
+class NoPoolEngine:
+    worker_pool = None
+
+
+def test_processing_publishes_overlay_without_drawing_on_the_frame(monkeypatch):
+    monkeypatch.setattr(web_app, 'face_engine', NoPoolEngine())
+    monkeypatch.setattr(web_app, 'analyze_frame_tracked', lambda frame: ([(10, 60, 60, 10)], None, []))
+    monkeypatch.setitem(web_app.recognition_state, 'active', True)
+    monkeypatch.setitem(web_app.recognition_state, 'face_seen', True)
+    monkeypatch.setattr(web_app, 'recognition_overlay', [])
+    frame = np.zeros((80, 80, 3), dtype=np.uint8)
+
+    assert web_app.process_web_frame(frame) is frame
+    assert not frame.any()
+    assert [entry[2] for entry in web_app.recognition_overlay] == ["Analyse..."]
+
+
+def test_stream_draws_overlay_on_its_own_copy(monkeypatch):
+    monkeypatch.setattr(web_app, 'recognition_overlay', [((10, 60, 60, 10), (0, 255, 0), "RECONNU: alice", 3, 0.7)])
+    hub = web_app.StreamHub(pipeline=None)
+    frame = np.zeros((80, 80, 3), dtype=np.uint8)
+
+    data = hub._encode(1, frame)
+    assert not frame.any()
+    assert cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR).any()
+    assert hub._encode(1, frame) is data and hub.encoded == 1
+
+
+class ScriptedPipeline:
+    """Frames caméra numérotées, puis arrêt"""
+
+    def __init__(self, count):
+        self.frames = [(seq, np.full((32, 32, 3), seq, dtype=np.uint8)) for seq in range(1, count + 1)]
+
+    @property
+    def is_running(self):
+        return bool(self.frames)
+
+    def wait_frame(self, after_seq=0, timeout=None):
+        return self.frames.pop(0)
+
+
+def test_stream_encodes_each_frame_once_for_every_client(monkeypatch):
+    monkeypatch.setattr(web_app, 'recognition_overlay', [])
+    hub = web_app.StreamHub(ScriptedPipeline(3), queue_size=2)
+    fast, slow = hub.subscribe(), hub.subscribe()
+    received = []
+
+    # Le client rapide lit chaque frame dès qu'elle est déposée ; le lent ne lit jamais
+    monkeypatch.setattr(fast, 'put_nowait', received.append)
+    hub._broadcast_loop()
+
+    assert hub.encoded == 3 and hub.streamed == 3
+    assert len(set(received)) == 3
+    # File bornée du client lent : les plus anciennes frames sont abandonnées
+    assert slow.qsize() == 2 and hub.dropped == 1
+    assert [slow.get_nowait() for _ in range(2)] == received[1:]
+
+
+def test_stream_skips_encoding_without_clients():
+    hub = web_app.StreamHub(ScriptedPipeline(2))
+    hub._broadcast_loop()
+    assert hub.encoded == 0 and hub.get_stats()['clients'] == 0
+
+    client = hub.subscribe()
+    hub.unsubscribe(client)
+    assert hub.get_stats()['clients'] == 0
+
+
+def first_messages(response, count):
+    return list(itertools.islice(response.response, count))
+
+
+def test_event_channel_buffer_and_cursor():
+    channel = web_app.EventChannel(capacity=3)
+    for kind in ('started', 'face_seen', 'attempt', 'granted'):
+        channel.publish(kind, {'type': kind})
+
+    assert channel.last_id == 4 and channel.floor == 1
+    assert not channel.covers(0) and channel.covers(1)
+    assert [event[:2] for event in channel.wait(2, timeout=0)] == [(3, 'attempt'), (4, 'granted')]
+    assert channel.wait(4, timeout=0) == []
+
+
+def test_recognition_events_start_with_the_current_state(monkeypatch):
+    channel = web_app.EventChannel()
+    channel.publish('started', {'type': 'started'})
+    monkeypatch.setattr(web_app, 'recognition_events', channel)
+
+    with web_app.app.test_request_context('/api/recognition/events'):
+        response = web_app.recognition_events_stream()
+    channel.publish('granted', {'type': 'granted'})
+    assert response.mimetype == 'text/event-stream'
+    assert [message.split('\n')[:2] for message in first_messages(response, 2)] == [
+        ['id: 1', 'event: state'], ['id: 2', 'event: granted']
+    ]
+
+
+def test_recognition_events_resume_after_last_event_id(monkeypatch):
+    channel = web_app.EventChannel()
+    for kind in ('started', 'face_seen', 'attempt'):
+        channel.publish(kind, {'type': kind})
+    monkeypatch.setattr(web_app, 'recognition_events', channel)
+
+    with web_app.app.test_request_context('/api/recognition/events', headers={'Last-Event-ID': '1'}):
+        response = web_app.recognition_events_stream()
+    assert [message.split('\n')[:2] for message in first_messages(response, 2)] == [
+        ['id: 2', 'event: face_seen'], ['id: 3', 'event: attempt']
+    ]
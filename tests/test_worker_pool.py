@@ -0,0 +1,78 @@
+"""Pool de processus : RECOGNITION_WORKERS = 0, galerie partagée remplacée"""
+import queue
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+from core.gallery import FaceGallery
+from core.worker_pool import RecognitionWorkerPool, WorkerResult, _worker_main
+from tests.conftest import make_embeddings
+
+
+def test_zero_workers_means_no_pool(engine):
+    with pytest.raises(ValueError):
+        RecognitionWorkerPool(0)
+    assert engine.start_worker_pool(0) is None
+    assert engine.worker_pool is None
+
+
+def test_submit_without_pool_is_an_error(engine, monkeypatch):
+    monkeypatch.setattr(engine, 'start_worker_pool', lambda n_workers=0: None)
+    with pytest.raises(RuntimeError):
+        engine.submit_frame(np.zeros((48, 64, 3), dtype=np.uint8))
+
+
+def test_worker_survives_gallery_segment_already_unlinked():
+    frames_shm = shared_memory.SharedMemory(create=True, size=2 * 48 * 64 * 3)
+    tasks, results = queue.Queue(), queue.Queue()
+    # Galerie publiée puis remplacée avant que le processus n'ait lu le message
+    tasks.put(('gallery', 'psm_deja_supprime', 3, 128, 7))
+    tasks.put(('frame', 0, 1, (48, 64)))
+    tasks.put(None)
+    try:
+        _worker_main(0, tasks, results, frames_shm.name, (2, 48, 64, 3))
+    finally:
+        frames_shm.close()
+        frames_shm.unlink()
+
+    task_id, _, version, locations, encodings, matches = results.get_nowait()
+    assert (task_id, version, locations, encodings, matches) == (0, -1, [], [], None)
+
+
+def test_pool_round_trip_across_gallery_replacements():
+    gallery = FaceGallery()
+    for i, vector in enumerate(make_embeddings(4)):
+        gallery.add(i + 1, f"user{i + 1}", vector)
+    pool = RecognitionWorkerPool(1, frame_shape=(48, 64, 3), slots_per_worker=1)
+    pool.start()
+    try:
+        # Deux publications d'affilée : le premier segment disparaît avant d'être lu
+        pool.publish_gallery(gallery.freeze())
+        gallery.add(5, 'user5', make_embeddings(1, seed=3)[0])
+        pool.publish_gallery(gallery.freeze())
+        task_id = pool.submit(np.zeros((48, 64, 3), dtype=np.uint8))
+        result = pool.get(timeout=60)
+    finally:
+        pool.stop()
+
+    assert result is not None and result.task_id == task_id
+    assert pool.restarts == 0
+
+
+def test_collected_rows_map_to_live_gallery_rows(engine, monkeypatch):
+    vectors = make_embeddings(4)
+    for i, vector in enumerate(vectors):
+        engine.load_profile(i + 1, f"user{i + 1}", vector)
+    engine.remove_profile(2)
+    view = engine.gallery_view
+
+    # Le processus ne voit que les lignes non retirées : user3 est sa ligne 1
+    worker_gallery = FaceGallery.attach(view.matrix, np.einsum('ij,ij->i', view.matrix, view.matrix), view.ids)
+    matches = worker_gallery.match_batch(vectors[[2]], exact=True)
+    done = WorkerResult(0, view.version, [(0, 1, 1, 0)], [vectors[2]], matches)
+
+    class DonePool:
+        def get(self, timeout=None):
+            return done
+
+    monkeypatch.setattr(engine, 'worker_pool', DonePool())
+    assert engine.collect_frame()[3][0][:2] == (3, 'user3')
@@ -657,6 +657,7 @@ class AdminWindow:
 
         if messagebox.askyesno("Confirmation", f"Supprimer '{username}'?"):
             if self.user_service.delete_user(user_id):
+                self.face_engine.remove_profile(user_id)
                 self.refresh_users()
                 messagebox.showinfo("Succès", "Utilisateur supprimé")
             else:
@@ -1455,30 +1456,30 @@ class FaceCaptureDialog:
         self.face_engine = face_engine
         self.parent = parent
 
-        # Vérifier si un profil existe déjà
-        existing_profile = self.profile_service.get_profile_by_user(user_id)
+        # Vérifier si des profils (modèles) existent déjà
+        existing_profiles = self.profile_service.get_profiles_by_user(user_id)
         
-        if existing_profile:
+        if existing_profiles:
             action = messagebox.askyesnocancel(
                 "Profil existant",
-                f"L'utilisateur '{username}' a déjà un profil facial.\n\n"
-                "Voulez-vous le remplacer par une nouvelle photo ?\n\n"
-                "• Oui = Remplacer le profil\n"
-                "• Non = Supprimer le profil\n"
+                f"L'utilisateur '{username}' a déjà {len(existing_profiles)} photo(s) de référence.\n\n"
+                "Voulez-vous ajouter une nouvelle photo (autre éclairage, lunettes, angle) ?\n\n"
+                "• Oui = Ajouter une photo\n"
+                "• Non = Supprimer le profil facial\n"
                 "• Annuler = Ne rien faire"
             )
             
             if action is None:  # Annuler
                 return
             elif action is False:  # Non = Supprimer
-                if self.profile_service.delete_profile(existing_profile.profile_id):
+                if self.profile_service.delete_profile_by_user(user_id):
                     messagebox.showinfo("Succès", "Profil facial supprimé!")
                     self.success = True
                 return
-            # Si Oui, continuer pour remplacer
+            # Si Oui, continuer pour ajouter un modèle
         
         # Sélectionner une photo
-        self.selectionner_photo(existing_profile)
+        self.selectionner_photo()
 
     def selectionner_photo(self, existing_profile=None):
         """Ouvrir le dialogue de sélection de photo"""
@@ -3,7 +3,9 @@
 import tkinter as tk
 from PIL import Image, ImageTk
 import cv2
+from collections import deque
 from typing import Callable, Optional
+from core.frame_pipeline import FramePipeline
 from utils.logger import Logger
 from config.settings import CAMERA_INDEX, CAMERA_FLIP
 
@@ -26,9 +28,14 @@ class CameraWidget:
         self.video_label = self.label
 
         self.cap = None
+        self.pipeline = None
         self.is_running = False
         self.current_frame = None
         self._photo = None
+        self._shown_seq = 0
+
+        # Appels Tkinter demandés depuis le thread de traitement
+        self._ui_calls = deque()
 
         logger.log_info("CameraWidget initialisé")
 
@@ -57,6 +64,10 @@ class CameraWidget:
 
             self.is_running = True
 
+            # Capture et traitement hors du thread Tkinter
+            self.pipeline = FramePipeline(self.cap, self._process, flip=CAMERA_FLIP)
+            self.pipeline.start()
+
             # 🔥 ATTENDRE QUE LE WIDGET SOIT RÉALISÉ
             self.label.update_idletasks()  # Force Tkinter à créer le widget
 
@@ -76,8 +87,18 @@ class CameraWidget:
     def stop(self):
         """Arrêter"""
         self.is_running = False
+        if self.pipeline:
+            stats = self.pipeline.get_stats()
+            logger.log_info(
+                f"Pipeline: {stats['processed']}/{stats['captured']} frame(s) traitée(s), "
+                f"{stats['dropped']} abandonnée(s), {stats['throttled']} écartée(s) par max_fps, "
+                f"traitement {stats['process_ms']:.0f} ms, "
+                f"latence {stats['latency_ms']:.0f} ms"
+            )
+            self.pipeline.stop()
         if self.cap:
             self.cap.release()
+        self._ui_calls.clear()
         self._photo = None
         try:
             self.label.config(text='📹 Caméra arrêtée', fg='white')
@@ -85,8 +106,24 @@ class CameraWidget:
             pass
         logger.log_info("Caméra arrêtée")
 
+    def call_soon(self, callback: Callable, *args):
+        """Exécuter callback sur le thread Tkinter (appelable depuis le traitement)"""
+        self._ui_calls.append((callback, args))
+
+    def _process(self, frame):
+        """Traitement d'une frame (thread du pipeline)"""
+        if not self.process_callback:
+            return frame
+        try:
+            return self.process_callback(frame)
+        except Exception as e:
+            logger.log_error(f"Callback erreur: {e}")
+            cv2.putText(frame, "Erreur callback", (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            return frame
+
     def _loop(self):
-        """Boucle d'affichage"""
+        """Boucle d'affichage (thread Tkinter) : dernier résultat du pipeline"""
         if not self.is_running:
             logger.log_debug("Boucle arrêtée")
             return
@@ -102,48 +139,37 @@ class CameraWidget:
             return
 
         try:
-            # Lire frame
-            ret, frame = self.cap.read()
-
-            if not ret or frame is None:
-                logger.log_warning("Frame non lue")
-                self.label.after(100, self._loop)
-                return
-
-            # Flip
-            if CAMERA_FLIP:
-                frame = cv2.flip(frame, 1)
-
-            # Sauvegarder
-            self.current_frame = frame.copy()
-
-            # Callback
-            if self.process_callback:
+            # Appels Tkinter en attente
+            while self._ui_calls:
+                callback, args = self._ui_calls.popleft()
                 try:
-                    frame = self.process_callback(frame)
+                    callback(*args)
                 except Exception as e:
-                    logger.log_error(f"Callback erreur: {e}")
-                    cv2.putText(frame, "Erreur callback", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                    logger.log_error(f"Erreur appel UI: {e}")
+                if not self.is_running:
+                    return
+
+            result = self.pipeline.latest_result
+            if result is not None and result.seq != self._shown_seq:
+                self._shown_seq = result.seq
+                self.current_frame = result.source
 
-            # Convertir
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            resized = cv2.resize(rgb, (640, 480))
+                # Convertir
+                rgb = cv2.cvtColor(result.frame, cv2.COLOR_BGR2RGB)
+                resized = cv2.resize(rgb, (640, 480))
 
-            # PIL
-            pil_img = Image.fromarray(resized)
+                # PIL
+                pil_img = Image.fromarray(resized)
 
-            # 🔥 CRÉER PhotoImage AVEC master=self.label
-            self._photo = ImageTk.PhotoImage(image=pil_img, master=self.label)
+                # 🔥 CRÉER PhotoImage AVEC master=self.label
+                self._photo = ImageTk.PhotoImage(image=pil_img, master=self.label)
 
-            # Afficher
-            self.label.config(image=self._photo, text='')
+                # Afficher
+                self.label.config(image=self._photo, text='')
 
             # Continuer
             if self.is_running:
-                self.label.after(33, self._loop)
-
-            logger.log_debug("Frame affichée OK")
+                self.label.after(15, self._loop)
 
         except tk.TclError as e:
             logger.log_error(f"TclError: {e}")
@@ -166,6 +192,8 @@ class CameraWidget:
 
     def get_current_frame(self):
         """Frame actuel"""
+        if self.pipeline:
+            return self.pipeline.latest_frame()
         return self.current_frame.copy() if self.current_frame is not None else None
 
     def capture_image(self):
@@ -9,6 +9,9 @@ import os
 import threading
 from utils.logger import Logger
 from config.settings import WINDOW_TITLE, WINDOW_SIZE, COLOR_SUCCESS, COLOR_ERROR
+from core.face_tracker import FaceTracker
+from core.embedding_cache import EmbeddingCache
+from core.face_quality import FaceQualityGate, QUALITY_HINTS
 from .camera_widget import CameraWidget
 from .auth_dialog import AuthDialog
 from .components.status_panel import StatusPanel
@@ -34,6 +37,13 @@ class MainWindow:
         self.db = db
         self.return_callback = return_callback  # Callback pour retour au menu principal
 
+        # Suivi des visages entre deux détections complètes + cache d'encodings par piste
+        self.face_tracker = FaceTracker(face_engine)
+        self.embedding_cache = EmbeddingCache()
+        # Visages inexploitables écartés avant l'encodage (ne comptent pas comme tentatives)
+        self.quality_gate = FaceQualityGate()
+        self.last_known_face_location = None  # point de départ de la recherche ROI
+
         self.root = tk.Tk()
         self.root.title("Mode Utilisateur - " + WINDOW_TITLE)
         self.root.geometry(f"{WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}")
@@ -245,6 +255,7 @@ class MainWindow:
         self.is_paused = False
         self.face_not_recognized_count = 0
         self.reset_antispoofing()
+        self.reset_tracking()
 
         # Frame principal
         main_frame = tk.Frame(self.root)
@@ -349,7 +360,7 @@ class MainWindow:
                 cv2.putText(frame, "⏳ Pas de visage", (20, 80),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
                 if hasattr(self, 'status_panel'):
-                    self.status_panel.update_status("⏳ En attente d'un visage...", "info")
+                    self.run_on_ui(self.status_panel.update_status, "⏳ En attente d'un visage...", "info")
                 return frame
 
             # Premier visage
@@ -390,8 +401,22 @@ class MainWindow:
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 165, 0), 2)
                 return frame
 
-            # Détection visages
-            face_locations, face_encodings = self.face_engine.detect_faces(frame)
+            # Détection visages (suivi, recherche d'abord autour de la dernière position connue)
+            tracks = self.face_tracker.update(frame, hint=self.last_known_face_location)
+
+            # Contrôle qualité avant l'encodage : un visage rejeté n'est pas une tentative
+            tracks, rejected = self.quality_gate.filter(frame, tracks)
+            if rejected:
+                self.draw_quality_rejections(frame, rejected)
+                if not tracks:
+                    self.face_lost_frames = 0
+                    if hasattr(self, 'status_panel') and self.status_panel:
+                        hint = QUALITY_HINTS[rejected[0][1].reason]
+                        self.run_on_ui(self.status_panel.update_status, f"📷 {hint}", "info")
+                    return frame
+
+            face_locations = [track.location for track in tracks]
+            face_encodings = self.face_engine.encode_tracked_faces(frame, tracks, self.embedding_cache)
 
             # === PAS DE VISAGE DÉTECTÉ ===
             if len(face_locations) == 0:
@@ -473,7 +498,7 @@ class MainWindow:
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
 
                 if hasattr(self, 'status_panel') and self.status_panel:
-                    self.status_panel.update_status("⏳ En attente...", "info")
+                    self.run_on_ui(self.status_panel.update_status, "⏳ En attente...", "info")
 
                 return frame
 
@@ -481,52 +506,61 @@ class MainWindow:
             self.face_lost_frames = 0
             self.last_known_face_location = face_locations[0]
 
-            # Un visage détecté
-            face_location = face_locations[0]
-            face_encoding = face_encodings[0] if len(face_encodings) > 0 else None
-            top, right, bottom, left = face_location
-
-            if face_encoding is None:
+            if len(face_encodings) != len(face_locations):
                 cv2.putText(frame, "Erreur encodage", (20, 50),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
                 return frame
 
             # === PHASE 1: ANTI-SPOOFING (DÉSACTIVÉ) ===
             # if not self.antispoofing_passed:
-            #     return self.process_antispoofing(frame, face_location, face_encoding)
-
-            # === PHASE 2: RECONNAISSANCE (directe) ===
-            personne_id, username, password, similarity = self.face_engine.recognize_face(face_encoding)
+            #     return self.process_antispoofing(frame, face_locations[0], face_encodings[0])
 
-            if personne_id:
+            # === PHASE 2: RECONNAISSANCE (tous les visages de la frame en un passage) ===
+            # (ré-encodage précis des seuls visages proches du seuil)
+            face_encodings, results = self.face_engine.recognize_faces_two_stage(
+                frame, face_locations, face_encodings, tracks, self.embedding_cache
+            )
+            recognized = []
+
+            for (top, right, bottom, left), (personne_id, username, _, similarity) in zip(face_locations, results):
+                if personne_id:
+                    recognized.append((personne_id, username, similarity))
+                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 3)
+                    cv2.putText(frame, f"RECONNU: {username}", (left, bottom + 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                    cv2.putText(frame, f"Score: {similarity * 100:.1f}%", (left, bottom + 60),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                else:
+                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 165, 255), 3)
+                    cv2.putText(frame, f"INCONNU", (left, bottom + 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+
+            if self.face_engine.admits_group(results):
                 self.face_not_recognized_count = 0
-                cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 3)
-                cv2.putText(frame, f"RECONNU: {username}", (left, bottom + 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                cv2.putText(frame, f"Score: {similarity * 100:.1f}%", (left, bottom + 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
                 if hasattr(self, 'status_panel') and self.status_panel:
-                    self.status_panel.update_status(f"✅ Reconnu: {username}", "success")
-                    self.status_panel.update_similarity(similarity)
+                    names = ', '.join(username for _, username, _ in recognized)
+                    self.run_on_ui(self.status_panel.update_status, f"✅ Reconnu: {names}", "success")
+                    self.run_on_ui(self.status_panel.update_similarity, recognized[0][2])
 
                 self.is_paused = True
-                self.root.after(500, lambda: self.grant_access_direct(personne_id, username, similarity))
+                self.run_on_ui(self.root.after, 500, lambda: self.grant_access_direct(recognized))
 
             else:
+                # Personne de reconnu, ou un inconnu accompagne le groupe (talonnage) : tentative échouée
                 self.face_not_recognized_count += 1
                 # Stocker la frame pour capture potentielle
                 self.last_frame = frame.copy()
-                
-                cv2.rectangle(frame, (left, top), (right, bottom), (0, 165, 255), 3)
-                cv2.putText(frame, f"INCONNU", (left, bottom + 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+
+                top, right, bottom, left = face_locations[0]
                 cv2.putText(frame, f"Tentative {self.face_not_recognized_count}/3", (left, bottom + 60),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2)
 
                 if hasattr(self, 'status_panel') and self.status_panel:
-                    self.status_panel.update_status(
-                        f"❌ Non reconnu ({self.face_not_recognized_count}/3)",
+                    message = "Visage inconnu dans le groupe" if recognized else "Non reconnu"
+                    self.run_on_ui(
+                        self.status_panel.update_status,
+                        f"❌ {message} ({self.face_not_recognized_count}/3)",
                         "warning"
                     )
 
@@ -540,7 +574,7 @@ class MainWindow:
                     logger.log_warning(f"Accès refusé - Visage non reconnu 3x - Image: {image_path}")
                     # Envoyer email d'alerte (dans un thread pour ne pas bloquer)
                     threading.Thread(target=send_security_alert, args=(image_path, "Visage non reconnu (3 tentatives)"), daemon=True).start()
-                    self.root.after(500, lambda: self.request_pin_after_failures())
+                    self.run_on_ui(self.root.after, 500, lambda: self.request_pin_after_failures())
 
             return frame
 
@@ -558,6 +592,10 @@ class MainWindow:
         """Anti-spoofing RAPIDE - Instructions claires gauche/droite"""
         top, right, bottom, left = face_location
         height, width = frame.shape[:2]
+        # Fenêtre autour du dernier visage connu (même ROI que la détection) pour le contrôle de mouvement
+        search_roi = None
+        if self.last_known_face_location is not None:
+            search_roi = self.face_engine.roi_around(self.last_known_face_location, frame.shape)
 
         # Initialiser
         if not self.antispoofing_active:
@@ -624,7 +662,7 @@ class MainWindow:
 
         # === DÉTECTION ===
         if not self.head_turn_detected:
-            head_turn = self.antispoof_detector.detect_head_turn(frame, face_location)
+            head_turn = self.antispoof_detector.detect_head_turn(frame, face_location, roi=search_roi)
 
             if head_turn:
                 self.head_turn_detected = True
@@ -636,19 +674,20 @@ class MainWindow:
                             cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
 
                 # Passer à la reconnaissance après 500ms
-                self.root.after(500, self.complete_antispoofing)
+                self.run_on_ui(self.root.after, 500, self.complete_antispoofing)
 
         # Mise à jour du status panel
         if hasattr(self, 'status_panel') and self.status_panel:
             if self.head_turn_detected:
-                self.status_panel.update_status("✅ Vérifié !", "success")
+                self.run_on_ui(self.status_panel.update_status, "✅ Vérifié !", "success")
             else:
                 progress = f"{'✅' if left_ok else '⬜'} Gauche | {'✅' if right_ok else '⬜'} Droite"
-                self.status_panel.update_status(f"🛡️ {progress}", "info")
+                self.run_on_ui(self.status_panel.update_status, f"🛡️ {progress}", "info")
 
         # Timeout (15 secondes au lieu de 30)
         if elapsed > 15:
-            self.fail_antispoofing()
+            self.is_paused = True
+            self.run_on_ui(self.fail_antispoofing)
 
         return frame
 
@@ -697,38 +736,95 @@ class MainWindow:
         if hasattr(self, 'antispoof_detector'):
             self.antispoof_detector.reset_counters()
 
-    def grant_access_direct(self, personne_id, username, similarity):
-        """Accorder l'accès directement"""
-        self.status_panel.update_status(f"✅ ACCÈS AUTORISÉ: {username}", "success")
+    def draw_quality_rejections(self, frame, rejected):
+        """Encadrer en gris les visages écartés par le contrôle qualité, avec la consigne"""
+        for track, report in rejected:
+            top, right, bottom, left = track.location
+            cv2.rectangle(frame, (left, top), (right, bottom), (160, 160, 160), 2)
+            cv2.putText(frame, QUALITY_HINTS[report.reason], (left, bottom + 25),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (160, 160, 160), 2)
+
+    def run_on_ui(self, callback, *args):
+        """Exécuter un appel Tkinter depuis le thread de traitement du pipeline"""
+        if self.camera_widget:
+            self.camera_widget.call_soon(callback, *args)
+        else:
+            callback(*args)
+
+    def reset_tracking(self):
+        """Oublier les visages suivis et leurs encodings mémorisés"""
+        stats = self.embedding_cache.get_stats()
+        if stats['hits'] + stats['misses'] > 0:
+            logger.log_info(
+                f"Cache d'encodings: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+                f"({stats['hit_rate']:.0%})"
+            )
+        quality = self.quality_gate.get_stats()
+        if quality['rejected']:
+            logger.log_info(
+                f"Contrôle qualité: {quality['rejected']}/{quality['assessed']} visage(s) écarté(s) "
+                f"{quality['by_reason']}"
+            )
+        two_stage = self.face_engine.get_two_stage_stats()
+        if two_stage['stage2']:
+            logger.log_info(
+                f"Ré-encodage précis: {two_stage['stage2']}/{two_stage['faces']} visage(s) "
+                f"({two_stage['stage2_rate']:.0%}), {two_stage['changed']} décision(s) changée(s), "
+                f"{two_stage['stage2_avg_ms']:.0f} ms en moyenne"
+            )
+        roi = self.face_engine.detectors.get_stats()['roi']
+        if roi['hits'] + roi['misses']:
+            logger.log_info(
+                f"Détection ROI: {roi['hits']} réussite(s), {roi['misses']} repli(s) pleine frame, "
+                f"{roi['latency_ms']:.0f} ms en moyenne"
+            )
+        self.face_tracker.reset()
+        self.embedding_cache.clear()
+        self.last_known_face_location = None
+
+    def grant_access_direct(self, recognized):
+        """
+        Accorder l'accès directement à toutes les personnes reconnues
+
+        Args:
+            recognized: Liste de tuples (personne_id, username, similarity)
+        """
+        names = ', '.join(username for _, username, _ in recognized)
+        self.status_panel.update_status(f"✅ ACCÈS AUTORISÉ: {names}", "success")
 
-        # Signal Arduino - LED verte + buzzer
+        # Signal Arduino - LED verte + buzzer (une seule ouverture pour le groupe)
         signal_access_granted()
 
-        self.access_service.log_access_attempt(
-            personne_id, 'GRANTED', 'FACE_ONLY',
-            similarity_score=similarity
-        )
+        for personne_id, username, similarity in recognized:
+            self.access_service.log_access_attempt(
+                personne_id, 'GRANTED', 'FACE_ONLY',
+                similarity_score=similarity
+            )
 
-        self.access_service.log_antispoofing(
-            personne_id,
-            blink_detected=False,
-            headturn_detected=self.head_turn_detected if hasattr(self, 'head_turn_detected') else False,
-            antispoof_score=1.0
-        )
+            self.access_service.log_antispoofing(
+                personne_id,
+                blink_detected=False,
+                headturn_detected=self.head_turn_detected if hasattr(self, 'head_turn_detected') else False,
+                antispoof_score=1.0
+            )
 
-        self.access_service.reset_failed_attempts(personne_id)
+            self.access_service.reset_failed_attempts(personne_id)
 
-        logger.log_info(f"✅ Accès autorisé pour {username}")
+            logger.log_info(f"✅ Accès autorisé pour {username}")
 
+        scores = '\n'.join(
+            f"✓ {username}: {similarity*100:.1f}%" for _, username, similarity in recognized
+        )
         messagebox.showinfo(
             "✅ ACCÈS AUTORISÉ",
-            f"Bienvenue {username}!\n\n"
+            f"Bienvenue {names}!\n\n"
             f"✓ Vérification anti-spoofing: RÉUSSIE\n"
-            f"✓ Score de reconnaissance: {similarity*100:.1f}%\n\n"
+            f"Scores de reconnaissance:\n{scores}\n\n"
             f"Accès accordé par reconnaissance faciale."
         )
 
         self.reset_antispoofing()
+        self.reset_tracking()
         self.is_paused = False
         self.face_not_recognized_count = 0
 
@@ -742,10 +838,8 @@ class MainWindow:
 
         if password:
             found = False
-            for i, pwd in enumerate(self.face_engine.known_passwords):
+            for personne_id, username, pwd in self.face_engine.get_loaded_credentials():
                 if self.auth_manager.verify_password(password, pwd):
-                    personne_id = self.face_engine.known_ids[i]
-                    username = self.face_engine.known_names[i]
 
                     self.status_panel.update_status(f"✅ Accès autorisé: {username} (PIN)", "success")
 
@@ -780,6 +874,7 @@ class MainWindow:
                 messagebox.showerror("❌ ACCÈS REFUSÉ", "Mot de passe incorrect!\n\nL'accès est refusé.")
 
         self.reset_antispoofing()
+        self.reset_tracking()
         self.is_paused = False
         self.face_not_recognized_count = 0
 
@@ -2,9 +2,26 @@
 import hashlib
 import secrets
 import base64
-from typing import Tuple, Optional
+import struct
+from typing import Iterable, Tuple, Optional
 import numpy as np
 
+# Format binaire des embeddings : en-tête de 8 octets puis dim float32 little-endian
+EMBEDDING_MAGIC = b'FE'
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_MODEL_DLIB_RESNET = 1  # face_recognition / dlib ResNet 128D, alignement 68 repères ('large')
+EMBEDDING_MODEL_DLIB_RESNET_5POINT = 2  # même réseau, alignement 5 repères ('small')
+EMBEDDING_MODELS = {'large': EMBEDDING_MODEL_DLIB_RESNET, 'small': EMBEDDING_MODEL_DLIB_RESNET_5POINT}
+EMBEDDING_HEADER = struct.Struct('<2sBBHH')  # magic, version, modèle, dimension, réservé
+
+
+def embedding_record_dtype(dim: int) -> np.dtype:
+    """Dtype structuré d'un embedding binaire (en-tête + vecteur)"""
+    return np.dtype([
+        ('magic', 'S2'), ('version', 'u1'), ('model', 'u1'),
+        ('dim', '<u2'), ('reserved', '<u2'), ('vector', '<f4', (dim,))
+    ])
+
 
 class EncryptionManager:
     """Classe pour gérer le chiffrement et le hashing"""
@@ -93,31 +110,83 @@ class EncryptionManager:
         return secrets.token_hex(length)
 
     @staticmethod
-    def encode_embedding(embedding: np.ndarray) -> str:
+    def encode_embedding(embedding: np.ndarray, model: int = EMBEDDING_MODEL_DLIB_RESNET) -> bytes:
         """
-        Encoder un embedding numpy en string
+        Encoder un embedding numpy en binaire (bytea)
 
         Args:
             embedding: Array numpy de l'embedding facial
+            model: Identifiant du modèle qui a produit l'embedding
 
         Returns:
-            String représentant l'embedding
+            En-tête versionné (dimension, modèle) suivi des float32
         """
-        return ','.join(map(str, embedding.tolist()))
+        vector = np.asarray(embedding, dtype='<f4').reshape(-1)
+        header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_FORMAT_VERSION, model, vector.shape[0], 0)
+        return header + vector.tobytes()
+
+    @staticmethod
+    def embedding_model(data) -> Optional[int]:
+        """Identifiant du modèle lu dans l'en-tête (None pour l'ancien format texte)"""
+        if isinstance(data, str):
+            return None
+        magic, version, model, _, _ = EMBEDDING_HEADER.unpack_from(bytes(data))
+        if magic != EMBEDDING_MAGIC or version != EMBEDDING_FORMAT_VERSION:
+            raise ValueError(f"Format d'embedding inconnu (magic={magic!r}, version={version})")
+        return model
+
+    @staticmethod
+    def encode_embedding_text(embedding: np.ndarray) -> str:
+        """Ancien format texte (valeurs séparées par des virgules)"""
+        return ','.join(map(str, np.asarray(embedding).tolist()))
 
     @staticmethod
-    def decode_embedding(embedding_str: str) -> np.ndarray:
+    def decode_embedding(data) -> np.ndarray:
         """
-        Décoder un embedding string en numpy array
+        Décoder un embedding (binaire versionné ou ancien format texte)
 
         Args:
-            embedding_str: String de l'embedding
+            data: bytes / memoryview (bytea) ou string
 
         Returns:
-            Array numpy
+            Array numpy float32
+        """
+        if isinstance(data, str):
+            return np.array(data.split(','), dtype=np.float64).astype(np.float32)
+
+        data = bytes(data)
+        magic, version, _, dim, _ = EMBEDDING_HEADER.unpack_from(data)
+        if magic != EMBEDDING_MAGIC or version != EMBEDDING_FORMAT_VERSION:
+            raise ValueError(f"Format d'embedding inconnu (magic={magic!r}, version={version})")
+        if len(data) != EMBEDDING_HEADER.size + 4 * dim:
+            raise ValueError(f"Embedding tronqué: {len(data)} octets pour dimension {dim}")
+        return np.frombuffer(data, dtype='<f4', offset=EMBEDDING_HEADER.size).astype(np.float32)
+
+    @staticmethod
+    def decode_embeddings(blobs: Iterable) -> np.ndarray:
+        """
+        Décoder un lot d'embeddings en une matrice (n x dim)
+
+        Les blobs binaires de même taille sont décodés en un seul
+        np.frombuffer ; un lot mixte (ancien format texte) est décodé ligne à ligne.
         """
-        values = [float(x) for x in embedding_str.split(',')]
-        return np.array(values)
+        blobs = [data if isinstance(data, str) else bytes(data) for data in blobs]
+        if not blobs:
+            return np.empty((0, 0), dtype=np.float32)
+
+        first = blobs[0]
+        if not isinstance(first, str) and len(first) >= EMBEDDING_HEADER.size:
+            dim = EMBEDDING_HEADER.unpack_from(first)[3]
+            size = EMBEDDING_HEADER.size + 4 * dim
+            if all(not isinstance(data, str) and len(data) == size for data in blobs):
+                records = np.frombuffer(b''.join(blobs), dtype=embedding_record_dtype(dim))
+                valid = (records['magic'] == EMBEDDING_MAGIC) & \
+                        (records['version'] == EMBEDDING_FORMAT_VERSION) & (records['dim'] == dim)
+                if not valid.all():
+                    raise ValueError(f"{int((~valid).sum())} embedding(s) au format inconnu")
+                return records['vector'].astype(np.float32)
+
+        return np.stack([EncryptionManager.decode_embedding(data) for data in blobs])
 
     @staticmethod
     def encode_base64(data: bytes) -> str:
@@ -2,23 +2,46 @@
 from flask import Flask, render_template, Response, jsonify, request, session, redirect, url_for
 from flask_cors import CORS
 import cv2
+import json
+import queue
 import threading
 import time
 import sys
 import os
+from collections import deque
+from datetime import date, datetime
 
 # Ajouter le dossier parent au path pour importer les modules existants
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import DatabaseConnection
+from database.migrations import run_migrations
 from services.user_service import UserService
 from services.profile_service import ProfileService
 from services.access_service import AccessService
 from services.arduino_service import signal_access_granted, signal_access_denied, init_arduino
 from services.email_service import send_security_alert
 from core.face_recognition import FaceRecognitionEngine
+from core.face_tracker import FaceTracker
+from core.embedding_cache import EmbeddingCache
+from core.face_quality import FaceQualityGate, QUALITY_HINTS
+from core.frame_pipeline import FramePipeline
+from core.access_listener import AccessEventListener
 from core.authentication import AuthenticationManager
 from utils.logger import Logger
+from config.settings import (
+    RECOGNITION_BACKEND,
+    GALLERY_SNAPSHOT_ENABLED,
+    GALLERY_LISTENER_ENABLED,
+    STREAM_JPEG_QUALITY,
+    STREAM_CLIENT_QUEUE,
+    WEB_RECOGNITION_FPS,
+    EVENT_BUFFER_SIZE,
+    EVENT_BACKFILL_PAGE,
+    SSE_KEEPALIVE,
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX
+)
 
 logger = Logger()
 
@@ -30,6 +53,7 @@ CORS(app)
 
 # Variables globales
 db = None
+access_listener = None
 user_service = None
 profile_service = None
 access_service = None
@@ -37,44 +61,66 @@ face_engine = None
 auth_manager = None
 camera = None
 camera_lock = threading.Lock()
+frame_pipeline = None
+stream_hub = None
+tracker = None
+embedding_cache = None
+quality_gate = None
+
+# Annotations du dernier passage de reconnaissance (superposées au flux)
+recognition_overlay = []
+# Frames confiées au pool de processus, par tâche (contrôle qualité au retour)
+pooled_frames = {}
 
 # État de la reconnaissance
 recognition_state = {
     'active': False,
     'last_result': None,
     'last_user': None,
+    'recognized_users': [],
     'attempts': 0,
-    'last_attempt_time': 0  # Pour éviter les tentatives trop rapides
+    'last_attempt_time': 0,  # Pour éviter les tentatives trop rapides
+    'face_seen': False  # un visage a été vu depuis le démarrage
 }
 
 
 def init_services():
     """Initialiser tous les services"""
-    global db, user_service, profile_service, access_service, face_engine, auth_manager
+    global db, user_service, profile_service, access_service, face_engine, auth_manager, access_listener
     
     try:
         logger.log_info("Initialisation des services web...")
         
         db = DatabaseConnection()
-        db.connect()
+        if not db.connect():
+            return False
+        # Pas de service sur un schéma à moitié migré
+        if not run_migrations(db):
+            return False
         
         auth_manager = AuthenticationManager()
         user_service = UserService(db)
         profile_service = ProfileService(db)
         access_service = AccessService(db)
+        # Décisions de toutes les applications (web, Tkinter), relues en base dans l'ordre des access_id
+        last_access_id = access_service.get_last_access_id()
+        access_events.reset_floor(last_access_id)
+        access_listener = AccessEventListener(
+            lambda event: access_events.publish('access', event, event_id=event['id']), after_id=last_access_id
+        )
+        access_listener.start()
         face_engine = FaceRecognitionEngine()
+        # Détection + encodage sur plusieurs cœurs (RECOGNITION_WORKERS = 0 : thread de traitement)
+        face_engine.start_worker_pool()
         
-        # Charger les profils faciaux
-        profiles = profile_service.get_all_profiles()
-        for profile in profiles:
-            user = user_service.get_user_by_id(profile.personne_id)
-            if user and profile.embedding:
-                face_engine.load_profile(
-                    profile.personne_id,
-                    user.username,
-                    profile.embedding,
-                    user.password
-                )
+        # Charger les profils faciaux (inutile si la recherche se fait dans PostgreSQL)
+        if not (RECOGNITION_BACKEND == 'pgvector' and face_engine.use_pgvector(db)):
+            if GALLERY_SNAPSHOT_ENABLED:
+                face_engine.warm_start(profile_service)
+            else:
+                face_engine.load_gallery(profile_service.iter_gallery(), profile_service.count_gallery())
+            if GALLERY_LISTENER_ENABLED:
+                face_engine.start_gallery_listener()
         
         # Initialiser Arduino
         arduino_ok = init_arduino()
@@ -102,92 +148,412 @@ def get_camera():
     return camera
 
 
-def generate_frames():
-    """Générateur de frames pour le streaming vidéo - Utilise le même moteur que Tkinter"""
-    global recognition_state
+def draw_overlay(frame, overlay):
+    """Dessiner les annotations de reconnaissance (boîte + libellé) sur une frame"""
+    for location, color, label, thickness, font_scale in overlay:
+        if location is None:
+            cv2.putText(frame, label, (20, 30), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, 2)
+            continue
+        top, right, bottom, left = location
+        cv2.rectangle(frame, (left, top), (right, bottom), color, thickness)
+        cv2.putText(frame, label, (left, bottom + 25), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, 2)
+    return frame
+
+
+def process_web_frame(frame):
+    """Reconnaissance sur une frame (thread de traitement du pipeline) - même moteur que Tkinter"""
+    global recognition_state, recognition_overlay
     
-    while True:
-        with camera_lock:
-            cam = get_camera()
-            success, frame = cam.read()
-            
-        if not success:
-            break
-        
-        current_time = time.time()
+    current_time = time.time()
+    # Annotations (location ou None, couleur, libellé, épaisseur, taille du texte)
+    overlay = []
+    
+    # Traitement de reconnaissance si actif
+    if recognition_state['active']:
+        if face_engine.worker_pool is not None:
+            analysis = analyze_frame_pooled(frame)
+            if analysis is None:
+                return frame  # aucun passage terminé : les annotations précédentes restent affichées
+        else:
+            analysis = analyze_frame_tracked(frame)
+        face_locations, results, rejected = analysis
+        if (face_locations or rejected) and not recognition_state['face_seen']:
+            recognition_state['face_seen'] = True
+            publish_recognition('face_seen')
+        # Visages flous, mal exposés, trop petits ou de profil : ni encodés ni comptés comme tentatives
+        for location, report in rejected:
+            overlay.append((location, (160, 160, 160), QUALITY_HINTS[report.reason], 2, 0.6))
         
-        # Traitement de reconnaissance si actif
-        if recognition_state['active']:
-            # Utiliser le même moteur de détection que Tkinter (optimisé avec CLAHE, multi-tentatives)
-            face_locations, face_encodings = face_engine.detect_faces(frame)
-            
-            if face_locations and len(face_locations) > 0:
-                top, right, bottom, left = face_locations[0]
+        if face_locations and len(face_locations) > 0:
+            if results is not None:
+                recognized = []
                 
-                if face_encodings and len(face_encodings) > 0:
-                    # Reconnaissance avec le même moteur que Tkinter
-                    personne_id, username, password, similarity = face_engine.recognize_face(face_encodings[0])
-                    
+                for (top, right, bottom, left), (personne_id, username, password, similarity) in zip(face_locations, results):
                     if personne_id:
-                        # RECONNU - Accorder l'accès automatiquement (comme Tkinter)
-                        cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 3)
-                        cv2.putText(frame, f"RECONNU: {username}", (left, bottom + 25),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        
-                        # Accorder l'accès UNE SEULE FOIS
-                        if recognition_state['last_result'] != 'granted':
-                            recognition_state['last_result'] = 'granted'
-                            recognition_state['last_user'] = {'id': personne_id, 'username': username, 'similarity': similarity}
-                            recognition_state['attempts'] = 0
-                            recognition_state['active'] = False  # Arrêter la reconnaissance
-                            
-                            # Logger l'accès et signal Arduino
-                            logger.log_info(f"[WEB] Envoi signal Arduino GRANTED pour {username}")
-                            print(f"🟢 [WEB] Envoi signal Arduino GRANTED pour {username}")
-                            signal_access_granted()
-                            access_service.log_access_attempt(personne_id, 'GRANTED', 'FACE_ONLY', similarity_score=similarity)
-                            logger.log_info(f"Accès accordé automatiquement à {username}")
+                        recognized.append({'id': personne_id, 'username': username, 'similarity': similarity})
+                        overlay.append(((top, right, bottom, left), (0, 255, 0), f"RECONNU: {username}", 3, 0.7))
                     else:
                         # NON RECONNU - Afficher le cadre rouge
-                        cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 3)
-                        cv2.putText(frame, f"INCONNU ({recognition_state['attempts']}/3)", (left, bottom + 25),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                        overlay.append(((top, right, bottom, left), (0, 0, 255),
+                                        f"INCONNU ({recognition_state['attempts']}/3)", 3, 0.7))
+                
+                # Un inconnu dans le groupe = pas d'ouverture (GROUP_ACCESS_POLICY), comme Tkinter
+                if face_engine.admits_group(results):
+                    # RECONNU(S) - Accorder l'accès automatiquement (comme Tkinter)
+                    # Accorder l'accès UNE SEULE FOIS pour tout le groupe
+                    if recognition_state['last_result'] != 'granted':
+                        recognition_state['last_result'] = 'granted'
+                        recognition_state['last_user'] = recognized[0]
+                        recognition_state['recognized_users'] = recognized
+                        recognition_state['attempts'] = 0
+                        recognition_state['active'] = False  # Arrêter la reconnaissance
+                        publish_recognition('granted')
                         
-                        # Incrémenter les tentatives avec un délai de 1.5 secondes entre chaque
-                        if recognition_state['last_result'] != 'failed':
-                            if current_time - recognition_state['last_attempt_time'] >= 1.5:
-                                recognition_state['attempts'] += 1
-                                recognition_state['last_attempt_time'] = current_time
-                                logger.log_info(f"Tentative {recognition_state['attempts']}/3 - Visage non reconnu")
-                                
-                                # Après 3 tentatives, refuser l'accès automatiquement
-                                if recognition_state['attempts'] >= 3:
-                                    recognition_state['last_result'] = 'failed'
-                                    recognition_state['active'] = False
-                                    
-                                    logger.log_info("[WEB] Envoi signal Arduino DENIED - 3 tentatives échouées")
-                                    print("🔴 [WEB] Envoi signal Arduino DENIED - 3 tentatives échouées")
-                                    signal_access_denied()
-                                    access_service.log_access_attempt(None, 'DENIED', 'FACE_ONLY')
-                                    threading.Thread(target=send_security_alert, args=(None, "Visage non reconnu (3 tentatives) - Web"), daemon=True).start()
-                                    logger.log_warning("Accès refusé automatiquement - 3 tentatives échouées")
+                        # Logger les accès et signal Arduino
+                        names = ', '.join(user['username'] for user in recognized)
+                        logger.log_info(f"[WEB] Envoi signal Arduino GRANTED pour {names}")
+                        print(f"🟢 [WEB] Envoi signal Arduino GRANTED pour {names}")
+                        signal_access_granted()
+                        for user in recognized:
+                            access_service.log_access_attempt(user['id'], 'GRANTED', 'FACE_ONLY', similarity_score=user['similarity'])
+                            logger.log_info(f"Accès accordé automatiquement à {user['username']}")
                 else:
-                    # Visage détecté mais pas d'encodage
-                    cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 255), 2)
-                    cv2.putText(frame, "Analyse...", (left, bottom + 25),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                    # Incrémenter les tentatives avec un délai de 1.5 secondes entre chaque
+                    if recognition_state['last_result'] != 'failed':
+                        if current_time - recognition_state['last_attempt_time'] >= 1.5:
+                            recognition_state['attempts'] += 1
+                            recognition_state['last_attempt_time'] = current_time
+                            logger.log_info(f"Tentative {recognition_state['attempts']}/3 - Visage non reconnu")
+                            publish_recognition('attempt')
+                            
+                            # Après 3 tentatives, refuser l'accès automatiquement
+                            if recognition_state['attempts'] >= 3:
+                                recognition_state['last_result'] = 'failed'
+                                recognition_state['active'] = False
+                                publish_recognition('denied')
+                                
+                                logger.log_info("[WEB] Envoi signal Arduino DENIED - 3 tentatives échouées")
+                                print("🔴 [WEB] Envoi signal Arduino DENIED - 3 tentatives échouées")
+                                signal_access_denied()
+                                access_service.log_access_attempt(None, 'DENIED', 'FACE_ONLY')
+                                threading.Thread(target=send_security_alert, args=(None, "Visage non reconnu (3 tentatives) - Web"), daemon=True).start()
+                                logger.log_warning("Accès refusé automatiquement - 3 tentatives échouées")
             else:
-                cv2.putText(frame, "Positionnez votre visage", (20, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        
-        # Encoder en JPEG
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        time.sleep(0.03)  # ~30 FPS
+                # Visages détectés mais pas d'encodage
+                for location in face_locations:
+                    overlay.append((location, (0, 255, 255), "Analyse...", 2, 0.7))
+        else:
+            overlay.append((None, (0, 255, 255), "Positionnez votre visage", 2, 0.7))
+    else:
+        tracker.reset()
+        embedding_cache.clear()
+        discard_pooled_frames()
+
+    # Publier les annotations : le flux les superpose à chaque frame caméra jusqu'au prochain passage
+    # (StreamHub dessine sur sa copie, rien à dessiner ici)
+    recognition_overlay = overlay
+    return frame
+
+
+def analyze_frame_tracked(frame):
+    """
+    Suivi + contrôle qualité + reconnaissance en deux temps dans le thread de traitement
+
+    Returns:
+        Tuple (locations retenues, résultats ou None sans encodage, [(location rejetée, mesures)])
+    """
+    # Utiliser le même moteur de détection que Tkinter (optimisé avec CLAHE, multi-tentatives),
+    # la détection complète n'étant relancée qu'en cas de perte de suivi ou périodiquement
+    tracks = tracker.update(frame)
+    tracks, rejected = quality_gate.filter(frame, tracks)
+    face_locations = [track.location for track in tracks]
+    face_encodings = face_engine.encode_tracked_faces(frame, tracks, embedding_cache)
+    results = None
+    if face_locations and face_encodings and len(face_encodings) == len(face_locations):
+        # Reconnaissance de tous les visages en un passage (même moteur que Tkinter)
+        # (ré-encodage précis des seuls visages proches du seuil)
+        _, results = face_engine.recognize_faces_two_stage(
+            frame, face_locations, face_encodings, tracks, embedding_cache
+        )
+    return face_locations, results, [(track.location, report) for track, report in rejected]
+
+
+def analyze_frame_pooled(frame):
+    """
+    Détection + encodage + recherche dans le pool de processus (RECOGNITION_WORKERS > 0)
+
+    La frame est confiée au pool et le plus ancien passage terminé est
+    rendu : jusqu'à un passage en vol par processus, l'attente ne bloque
+    que lorsque tous les processus sont occupés.
+
+    Returns:
+        Même tuple que analyze_frame_tracked, ou None si aucun passage n'est terminé
+    """
+    pool = face_engine.worker_pool
+    pooled_frames[face_engine.submit_frame(frame)] = frame
+    collected = face_engine.collect_frame(timeout=None if pool.pending() > pool.n_workers else 0.005)
+    if collected is None:
+        return None
+
+    task_id, locations, _, results = collected
+    source = pooled_frames.pop(task_id, frame)
+    # Contrôle qualité sur la frame du passage (les mêmes visages que ceux encodés)
+    reports = quality_gate.assess(source, locations) if quality_gate.enabled else []
+    if not reports:
+        return locations, (results if locations else None), []
+    kept = [i for i, report in enumerate(reports) if report.passed]
+    rejected = [(locations[i], report) for i, report in enumerate(reports) if not report.passed]
+    return [locations[i] for i in kept], ([results[i] for i in kept] if kept else None), rejected
+
+
+def discard_pooled_frames():
+    """Oublier les passages en vol (reconnaissance arrêtée : leurs résultats sont périmés)"""
+    if face_engine.worker_pool is None:
+        return
+    while face_engine.worker_pool.pending():
+        if face_engine.collect_frame(timeout=1.0) is None:
+            break
+    pooled_frames.clear()
+
+
+def get_frame_pipeline():
+    """Obtenir le pipeline capture/traitement partagé par tous les flux"""
+    global frame_pipeline, tracker, embedding_cache, quality_gate
+    with camera_lock:
+        if frame_pipeline is None:
+            # Suivi des visages (détection complète périodique) + cache d'encodings + contrôle qualité
+            tracker = FaceTracker(face_engine)
+            embedding_cache = EmbeddingCache()
+            quality_gate = FaceQualityGate()
+            # Reconnaissance à sa propre cadence (budget CPU), le flux suit la caméra
+            frame_pipeline = FramePipeline(get_camera(), process_web_frame, name='web',
+                                           max_fps=WEB_RECOGNITION_FPS)
+            frame_pipeline.start()
+    return frame_pipeline
+
+
+class StreamHub:
+    """
+    Diffusion du flux annoté à tous les clients MJPEG
+
+    Un seul thread lit les frames caméra du pipeline (une capture), y
+    superpose les annotations du dernier passage de reconnaissance (qui
+    tourne à sa propre cadence), encode chaque frame en JPEG une seule fois
+    et dépose les octets dans la file bornée de chaque abonné. Un client
+    lent perd ses frames les plus anciennes sans ralentir les autres ni le
+    pipeline : le coût CPU ne dépend plus du nombre d'onglets ouverts.
+    """
+
+    def __init__(self, pipeline: FramePipeline, queue_size: int = STREAM_CLIENT_QUEUE,
+                 quality: int = STREAM_JPEG_QUALITY):
+        self.pipeline = pipeline
+        self.queue_size = max(1, queue_size)
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._jpeg = None  # (seq, octets) de la dernière frame encodée
+        self._thread = None
+
+        # Statistiques
+        self.encoded = 0
+        self.streamed = 0
+        self.dropped = 0
+        self._encode_ms = 0.0
+        self._interval_ms = 0.0  # entre deux frames diffusées
+        self._last_streamed = 0.0
+
+    def start(self):
+        """Lancer le thread de diffusion"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._broadcast_loop, name='web-broadcast', daemon=True)
+        self._thread.start()
+
+    def subscribe(self) -> queue.Queue:
+        """Nouvelle file de frames JPEG pour un client"""
+        client = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(client)
+        logger.log_debug(f"Flux vidéo: {len(self._subscribers)} client(s)")
+        return client
+
+    def unsubscribe(self, client: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(client)
+
+    def _encode(self, seq: int, frame) -> bytes:
+        """JPEG de la frame caméra annotée (réutilisé s'il est déjà encodé)"""
+        jpeg = self._jpeg
+        if jpeg is not None and jpeg[0] == seq:
+            return jpeg[1]
+        start = time.perf_counter()
+        ok, buffer = cv2.imencode('.jpg', draw_overlay(frame.copy(), recognition_overlay), self.params)
+        if not ok:
+            return None
+        data = buffer.tobytes()
+        self._encode_ms = FramePipeline._smooth(self._encode_ms, (time.perf_counter() - start) * 1000)
+        self.encoded += 1
+        self._jpeg = (seq, data)
+        return data
+
+    def _broadcast_loop(self):
+        last_seq = 0
+        while self.pipeline.is_running:
+            captured = self.pipeline.wait_frame(last_seq, timeout=1.0)
+            if captured is None:
+                continue
+            last_seq = captured[0]
+
+            with self._lock:
+                subscribers = list(self._subscribers)
+            # Personne ne regarde : rien à encoder (snapshot() encode à la demande)
+            if not subscribers:
+                continue
+            data = self._encode(*captured)
+            if data is None:
+                continue
+            now = time.perf_counter()
+            if self._last_streamed:
+                self._interval_ms = FramePipeline._smooth(self._interval_ms, (now - self._last_streamed) * 1000)
+            self._last_streamed = now
+            self.streamed += 1
+
+            for client in subscribers:
+                try:
+                    client.put_nowait(data)
+                except queue.Full:
+                    # Client en retard : remplacer sa frame la plus ancienne
+                    try:
+                        client.get_nowait()
+                    except queue.Empty:
+                        pass
+                    self.dropped += 1
+                    try:
+                        client.put_nowait(data)
+                    except queue.Full:
+                        pass
+
+    def snapshot(self) -> bytes:
+        """JPEG de la dernière frame caméra annotée (None si aucune)"""
+        captured = self.pipeline.wait_frame(0, timeout=0)
+        if captured is None:
+            return None
+        return self._encode(*captured)
+
+    def get_stats(self) -> dict:
+        """Clients connectés, frames diffusées (FPS du flux), encodées et abandonnées (clients lents)"""
+        return {
+            'clients': len(self._subscribers),
+            'streamed': self.streamed,
+            'fps': 1000.0 / self._interval_ms if self._interval_ms > 0 else 0.0,
+            'encoded': self.encoded,
+            'dropped': self.dropped,
+            'encode_ms': self._encode_ms
+        }
+
+
+class EventChannel:
+    """
+    Événements numérotés diffusés aux clients SSE
+
+    Les derniers événements sont gardés dans un tampon circulaire ;
+    chaque client lit avec son propre curseur (id du dernier événement
+    reçu), comme FramePipeline.wait_result, et peut donc reprendre après
+    une déconnexion tant que son curseur est encore couvert (covers()).
+    """
+
+    def __init__(self, capacity: int = EVENT_BUFFER_SIZE, floor: int = 0):
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=capacity)  # (id, type, données)
+        self.last_id = floor
+        self.floor = floor  # tout événement d'id > floor est encore dans le tampon
+
+    def reset_floor(self, floor: int):
+        """Premier id connu (ex. dernier access_id en base au démarrage)"""
+        with self._cond:
+            self.floor = max(self.floor, floor)
+            self.last_id = max(self.last_id, floor)
+
+    def publish(self, kind: str, data: dict, event_id: int = None) -> int:
+        """Ajouter un événement (id imposé, ex. clé en base, ou suivant) et réveiller les clients"""
+        with self._cond:
+            if event_id is None:
+                event_id = self.last_id + 1
+            if len(self._events) == self._events.maxlen:
+                self.floor = self._events[0][0]
+            self._events.append((event_id, kind, data))
+            self.last_id = max(self.last_id, event_id)
+            self._cond.notify_all()
+        return event_id
+
+    def covers(self, after_id: int) -> bool:
+        """Le tampon contient-il tous les événements postérieurs à after_id"""
+        return after_id >= self.floor
+
+    def wait(self, after_id: int, timeout: float = None) -> list:
+        """Événements d'id > after_id (attend au plus timeout s'il n'y en a aucun)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_id > after_id, timeout)
+            return [event for event in self._events if event[0] > after_id]
+
+
+def format_sse(event_id: int, kind: str, data: dict) -> str:
+    """Message SSE (id + type + données JSON)"""
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_stream(channel: EventChannel, last_id: int, initial=None):
+    """Générateur SSE : événements après last_id, keep-alive si rien ne se passe"""
+    if initial is not None:
+        yield format_sse(*initial)
+    while True:
+        events = channel.wait(last_id, timeout=SSE_KEEPALIVE)
+        if not events:
+            # Commentaire ignoré par le navigateur ; détecte aussi les clients partis
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            yield format_sse(*event)
+        last_id = max(event[0] for event in events)
+
+
+recognition_events = EventChannel()
+# Décisions d'accès, id = acces_log.access_id (plancher fixé au démarrage)
+access_events = EventChannel()
+
+
+def publish_recognition(kind: str):
+    """Diffuser une transition de la reconnaissance avec l'état complet"""
+    recognition_events.publish(kind, {'type': kind, 'state': dict(recognition_state)})
+
+
+def get_stream_hub():
+    """Obtenir le diffuseur MJPEG partagé (démarre le pipeline au besoin)"""
+    global stream_hub
+    pipeline = get_frame_pipeline()
+    with camera_lock:
+        if stream_hub is None:
+            stream_hub = StreamHub(pipeline)
+            stream_hub.start()
+    return stream_hub
+
+
+def generate_frames():
+    """Générateur de frames pour le streaming vidéo (JPEG partagé par tous les clients)"""
+    hub = get_stream_hub()
+    client = hub.subscribe()
+    try:
+        while hub.pipeline.is_running:
+            try:
+                frame_bytes = client.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+    finally:
+        # Client déconnecté (GeneratorExit) : libérer sa file
+        hub.unsubscribe(client)
 
 
 # ==================== ROUTES ====================
@@ -225,6 +591,15 @@ def video_feed():
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
+@app.route('/snapshot.jpg')
+def snapshot():
+    """Dernière frame annotée (JPEG déjà encodé pour le flux)"""
+    data = get_stream_hub().snapshot()
+    if data is None:
+        return jsonify({'error': 'Aucune frame disponible'}), 503
+    return Response(data, mimetype='image/jpeg', headers={'Cache-Control': 'no-store'})
+
+
 # ==================== API ====================
 
 @app.route('/api/recognition/start', methods=['POST'])
@@ -233,8 +608,11 @@ def start_recognition():
     recognition_state['active'] = True
     recognition_state['last_result'] = None
     recognition_state['last_user'] = None
+    recognition_state['recognized_users'] = []
     recognition_state['attempts'] = 0
     recognition_state['last_attempt_time'] = 0
+    recognition_state['face_seen'] = False
+    publish_recognition('started')
     return jsonify({'status': 'started'})
 
 
@@ -242,15 +620,50 @@ def start_recognition():
 def stop_recognition():
     """Arrêter la reconnaissance"""
     recognition_state['active'] = False
+    publish_recognition('stopped')
     return jsonify({'status': 'stopped'})
 
 
 @app.route('/api/recognition/status')
 def recognition_status():
-    """État de la reconnaissance"""
+    """État de la reconnaissance (repli des clients sans flux SSE)"""
     return jsonify(recognition_state)
 
 
+@app.route('/api/recognition/events')
+def recognition_events_stream():
+    """
+    Flux SSE des transitions de la reconnaissance
+
+    started, face_seen, attempt, granted, denied, stopped ; chaque
+    événement porte l'état complet. Le premier message est l'état courant.
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    initial = None
+    # Nouveau client, ou reprise trop ancienne pour le tampon : repartir de l'état courant
+    if last_id is None or not recognition_events.covers(last_id):
+        last_id = recognition_events.last_id
+        initial = (last_id, 'state', {'type': 'state', 'state': dict(recognition_state)})
+    return Response(sse_stream(recognition_events, last_id, initial), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/recognition/pipeline')
+def pipeline_stats():
+    """Statistiques du pipeline vidéo (frames abandonnées, latence par étage)"""
+    if frame_pipeline is None:
+        return jsonify({'running': False})
+    stats = frame_pipeline.get_stats()
+    stats['running'] = frame_pipeline.is_running
+    # Cadences indépendantes : reconnaissance (budget WEB_RECOGNITION_FPS) et flux (caméra)
+    stats['recognition_fps'] = stats['fps']
+    stats['stream_fps'] = stream_hub.get_stats()['fps'] if stream_hub is not None else 0.0
+    stats['two_stage'] = face_engine.get_two_stage_stats()
+    stats['quality'] = quality_gate.get_stats() if quality_gate is not None else None
+    stats['stream'] = stream_hub.get_stats() if stream_hub is not None else None
+    return jsonify(stats)
+
+
 @app.route('/api/recognition/grant_access', methods=['POST'])
 def grant_access():
     """Accorder l'accès manuellement (si pas fait automatiquement)"""
@@ -262,6 +675,7 @@ def grant_access():
             access_service.log_access_attempt(user['id'], 'GRANTED', 'FACE_ONLY', similarity_score=user['similarity'])
             recognition_state['last_result'] = 'granted'
         recognition_state['active'] = False
+        publish_recognition('granted')
         return jsonify({'status': 'granted', 'user': user})
     return jsonify({'status': 'error', 'message': 'No user recognized'})
 
@@ -276,6 +690,7 @@ def deny_access():
         threading.Thread(target=send_security_alert, args=(None, "Accès refusé - Web"), daemon=True).start()
         recognition_state['last_result'] = 'failed'
     recognition_state['active'] = False
+    publish_recognition('denied')
     return jsonify({'status': 'denied'})
 
 
@@ -328,29 +743,34 @@ def api_logout():
     return jsonify({'status': 'success'})
 
 
+def page_limit(default: int = PAGE_SIZE_DEFAULT) -> int:
+    """Taille de page demandée (?limit=), bornée"""
+    return max(1, min(request.args.get('limit', default, type=int), PAGE_SIZE_MAX))
+
+
+def paged_response(items: list, next_cursor: str = None):
+    """Liste JSON (format historique) + curseur de la page suivante dans X-Next-Cursor"""
+    response = jsonify(items)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
 @app.route('/api/users')
 def api_get_users():
-    """Liste des utilisateurs - utilise les mêmes services que Tkinter"""
+    """
+    Page d'utilisateurs (du plus récent au plus ancien)
+
+    Paramètres : limit, cursor (X-Next-Cursor de la page précédente),
+    search (nom ou email). Une seule requête, sans embeddings.
+    """
     try:
-        # Utiliser le service comme Tkinter
-        users = user_service.get_all_users()
-        profiles = profile_service.get_all_profiles()
-        
-        # IDs des utilisateurs avec profil facial
-        profile_ids = {p.personne_id for p in profiles}
-        
-        result = []
-        for u in users:
-            result.append({
-                'id': u.personne_id,
-                'username': u.username,
-                'email': u.email,
-                'role': u.role,
-                'is_active': u.is_active,
-                'created_at': str(u.created_at) if u.created_at else None,
-                'has_profile': u.personne_id in profile_ids
-            })
-        return jsonify(result)
+        users, next_cursor = user_service.get_users_page(
+            limit=page_limit(),
+            cursor=request.args.get('cursor', type=int),
+            search=request.args.get('search') or None
+        )
+        return paged_response(users, str(next_cursor) if next_cursor is not None else None)
     except Exception as e:
         logger.log_error(f"Erreur API users: {e}")
         import traceback
@@ -524,7 +944,7 @@ def api_create_user():
         # Charger le profil dans le moteur de reconnaissance
         user = user_service.get_user_by_id(user_id)
         if user:
-            face_engine.load_profile(user_id, username, embeddings_array, user.password)
+            face_engine.load_profile(user_id, username, embeddings_array, user.password, profile_id)
         
         logger.log_info(f"Utilisateur {username} créé avec profil facial (ID: {user_id})")
         return jsonify({'status': 'success', 'id': user_id, 'profile_id': profile_id})
@@ -536,12 +956,36 @@ def api_create_user():
         return jsonify({'status': 'error', 'message': str(e)}), 400
 
 
+@app.route('/api/users/<int:user_id>/templates', methods=['POST'])
+def api_add_template(user_id):
+    """Ajouter un modèle facial (autre éclairage, lunettes, angle) à un utilisateur"""
+    import numpy as np
+
+    embeddings = (request.json or {}).get('embeddings')
+    if not embeddings:
+        return jsonify({'status': 'error', 'message': 'Les embeddings faciaux sont obligatoires'}), 400
+    if not user_service.get_user_by_id(user_id):
+        return jsonify({'status': 'error', 'message': 'Utilisateur introuvable'}), 404
+
+    profile_id = profile_service.create_profile(personne_id=user_id, embedding=np.array(embeddings))
+    if not profile_id:
+        return jsonify({'status': 'error', 'message': 'Erreur création profil facial'}), 400
+
+    # Relire tous ses modèles (le plafond a pu en supprimer un)
+    face_engine.refresh_profiles(profile_service, [user_id])
+    templates = len(profile_service.get_profiles_by_user(user_id))
+    return jsonify({'status': 'success', 'profile_id': profile_id, 'templates': templates})
+
+
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
 def api_update_user(user_id):
     """Modifier un utilisateur"""
     data = request.json
     success = user_service.update_user(user_id, **data)
     if success:
+        # Révocation immédiate sur ce poste (les autres suivent via NOTIFY)
+        if 'is_active' in data and not data['is_active']:
+            face_engine.remove_profile(user_id)
         return jsonify({'status': 'success'})
     return jsonify({'status': 'error'}), 400
 
@@ -551,63 +995,107 @@ def api_delete_user(user_id):
     """Supprimer un utilisateur"""
     success = user_service.delete_user(user_id)
     if success:
+        face_engine.remove_profile(user_id)
         return jsonify({'status': 'success'})
     return jsonify({'status': 'error'}), 400
 
 
+def access_event_stream(last_id: int):
+    """
+    Décisions d'accès après last_id : rattrapage en base jusqu'à la tête du tampon, puis direct
+
+    Le rattrapage est fait à chaque reprise, même si le tampon couvre le
+    curseur : une décision validée après l'expiration de son trou
+    (ACCESS_GAP_TIMEOUT) n'a jamais été publiée, seule la base l'a.
+    """
+    head = access_events.last_id
+    while last_id < head:
+        # Pages keyset sur acces_log.access_id ; la suite viendra du tampon
+        page = [event for event in access_service.get_access_events(last_id, EVENT_BACKFILL_PAGE)
+                if event['id'] <= head]
+        for event in page:
+            yield format_sse(event['id'], 'access', event)
+        if len(page) < EVENT_BACKFILL_PAGE:
+            break
+        last_id = page[-1]['id']
+    yield from sse_stream(access_events, max(last_id, head))
+
+
+@app.route('/api/events')
+def api_events():
+    """
+    Flux SSE des décisions d'accès (SIEM, RH)
+
+    Chaque événement a pour id son access_id : un client reprend avec
+    l'en-tête Last-Event-ID (ou ?last_event_id=N, 0 = tout l'historique).
+    Sans curseur, le flux commence maintenant.
+    """
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('last_event_id', type=int)
+    if last_id is None:
+        last_id = access_events.last_id
+    return Response(access_event_stream(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def encode_log_cursor(cursor) -> str:
+    """Curseur (horaire, access_id) -> texte opaque pour X-Next-Cursor"""
+    horaire, access_id = cursor
+    return f"{horaire.isoformat()}_{access_id}"
+
+
+def decode_log_cursor(value: str):
+    """Inverse de encode_log_cursor (None si absent ou invalide)"""
+    if not value:
+        return None
+    try:
+        horaire, access_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(horaire), int(access_id)
+    except ValueError:
+        return None
+
+
+def parse_date(value: str):
+    """Date AAAA-MM-JJ d'un paramètre de requête (None si absente ou invalide)"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
 @app.route('/api/logs')
 def api_get_logs():
-    """Liste des logs d'accès - utilise les mêmes services que Tkinter"""
+    """
+    Page de logs d'accès (du plus récent au plus ancien, username joint)
+
+    Paramètres : limit, cursor (X-Next-Cursor de la page précédente),
+    result, method, date_from, date_to (AAAA-MM-JJ inclus), username.
+    """
     try:
-        # Utiliser le service comme Tkinter
-        logs = access_service.get_all_access_logs(limit=100)
-        
-        result = []
-        for log in logs:
-            # Récupérer le username
-            username = 'Inconnu'
-            if log.personne_id:
-                user = user_service.get_user_by_id(log.personne_id)
-                if user:
-                    username = user.username
-            
-            result.append({
-                'id': log.access_id,
-                'personne_id': log.personne_id,
-                'access_result': log.access_result if log.access_result else '-',
-                'access_method': log.access_method if log.access_method else '-',
-                'similarity_score': float(log.similarity_score) if log.similarity_score else None,
-                'access_time': str(log.horaire) if log.horaire else None,
-                'username': username
-            })
-        return jsonify(result)
+        logs, next_cursor = access_service.get_access_logs_page(
+            limit=page_limit(),
+            cursor=decode_log_cursor(request.args.get('cursor')),
+            access_result=request.args.get('result') or None,
+            access_method=request.args.get('method') or None,
+            date_from=parse_date(request.args.get('date_from')),
+            date_to=parse_date(request.args.get('date_to')),
+            username=request.args.get('username') or None
+        )
+        return paged_response(logs, encode_log_cursor(next_cursor) if next_cursor else None)
     except Exception as e:
         logger.log_error(f"Erreur API logs: {e}")
         import traceback
         logger.log_error(traceback.format_exc())
         return jsonify([])
 
-
 @app.route('/api/stats')
 def api_get_stats():
-    """Statistiques - utilise les mêmes services que Tkinter"""
+    """Statistiques (agrégats SQL, rien n'est chargé ligne à ligne)"""
     try:
-        # Utiliser les services comme Tkinter
-        users = user_service.get_all_users()
-        profiles = profile_service.get_all_profiles()
-        logs = access_service.get_all_access_logs(limit=1000)
-        
-        total_users = len(users)
-        active_users = sum(1 for u in users if u.is_active)
-        total_profiles = len(profiles)
-        total_access = len(logs)
-        
-        return jsonify({
-            'total_users': total_users,
-            'active_users': active_users,
-            'total_profiles': total_profiles,
-            'total_access': total_access
-        })
+        stats = user_service.get_user_stats()
+        stats.update(access_service.get_access_stats())
+        return jsonify(stats)
     except Exception as e:
         logger.log_error(f"Erreur API stats: {e}")
         import traceback
@@ -619,7 +1107,6 @@ def api_get_stats():
             'total_access': 0
         })
 
-
 def run_app():
     """Lancer l'application"""
     if init_services():
@@ -629,7 +1116,12 @@ def run_app():
         print("   Ouvrez votre navigateur à:")
         print("   http://localhost:5000")
         print("="*50 + "\n")
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        try:
+            app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        finally:
+            # Libérer la mémoire partagée des processus de reconnaissance
+            face_engine.stop_worker_pool()
+            access_listener.stop()
     else:
         print("Erreur: Impossible d'initialiser les services")
 